@@ -1,18 +1,64 @@
 from django.contrib import admin
-from .models import Categoria, Torneo, Equipo, Jugador, Partido
+from django.forms.models import BaseInlineFormSet
+from .models import Organizacion, Categoria, Torneo, Equipo, Jugador, Partido, Pago, TorneoArchivado, Tarea, EventoAuditoria, EventoTorneo, ResultadoMarcador, Notificacion
+from . import busqueda
+
+class JugadorFormSet(BaseInlineFormSet):
+    """Jugador.torneo no se edita, así que el índice (torneo, documento) se valida aquí"""
+    
+    def clean(self):
+        super().clean()
+        torneo_id = self.instance.torneo_id
+        if torneo_id is None:
+            return
+        
+        formularios = {}
+        for form in self.forms:
+            datos = getattr(form, 'cleaned_data', None)
+            if not datos or datos.get('DELETE') or not datos.get('documento'):
+                continue
+            documento = datos['documento']
+            if documento in formularios:
+                form.add_error('documento', 'Documento repetido en el plantel')
+            else:
+                formularios[documento] = form
+        
+        otros = Jugador.todos.filter(torneo_id=torneo_id, documento__in=list(formularios))
+        if self.instance.pk:
+            otros = otros.exclude(equipo_id=self.instance.pk)
+        for documento, equipo in otros.values_list('documento', 'equipo__nombre'):
+            formularios[documento].add_error('documento', f'Ya está inscrito en {equipo}')
 
 class JugadorInline(admin.TabularInline):
     """Para agregar jugadores directamente al crear equipo"""
     model = Jugador
+    formset = JugadorFormSet
     extra = 6  # 6 jugadores por equipo (ajusta si quieres)
     max_num = 12  # Máximo de jugadores
 
+class PagoInline(admin.TabularInline):
+    """Historial de pagos (solo lectura: se registran desde Equipos o conciliando)"""
+    model = Pago
+    extra = 0
+    can_delete = False
+    readonly_fields = ['fecha', 'monto', 'referencia', 'origen']
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
 class EquipoAdmin(admin.ModelAdmin):
     """Configuración especial para Equipos"""
-    list_display = ['nombre', 'torneo', 'capitan', 'pago_confirmado']
+    list_display = ['nombre', 'torneo', 'capitan', 'pago_confirmado', 'monto_pagado', 'rating']
     list_filter = ['pago_confirmado', 'torneo']
     search_fields = ['nombre', 'capitan']
-    inlines = [JugadorInline]  # ¡Jugadores dentro del Equipo!
+    readonly_fields = ['monto_pagado']
+    inlines = [JugadorInline, PagoInline]  # ¡Jugadores dentro del Equipo!
+    
+    def get_search_results(self, request, queryset, search_term):
+        """Usa el índice de texto completo en vez de LIKE '%...%' (incluye jugadores y email)"""
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        return busqueda.filtrar_queryset(queryset, search_term), False
 
 class PartidoAdmin(admin.ModelAdmin):
     """Configuración especial para Partidos"""
@@ -42,6 +88,12 @@ class PartidoAdmin(admin.ModelAdmin):
                 '<a class="button" href="{}" style="background: #2c5282; color: white; padding: 8px 10px; border-radius: 8px; text-decoration: none; font-weight: 500; display: inline-block; min-width: fit-content; text-align: center; border: none;">🏆 GANADOR</a>',
                 url
             )
+        if obj.terminado:
+            from django.urls import reverse
+            from django.utils.html import format_html
+            
+            url = reverse('admin:marcar_ganador', args=[obj.id])
+            return format_html('<a href="{}">✏️ Corregir</a>', url)
         return '-'
     acciones.short_description = 'Acciones'
     
@@ -65,6 +117,20 @@ class PartidoAdmin(admin.ModelAdmin):
         
         partido = get_object_or_404(Partido, id=partido_id)
         
+        if request.method == 'POST' and partido.terminado:
+            # Partido ya jugado: deshacer o corregir desde el historial de eventos
+            from . import eventos
+            try:
+                if 'deshacer' in request.POST:
+                    messages.success(request, eventos.deshacer_resultado(partido))
+                elif 'ganador_local' in request.POST:
+                    messages.success(request, eventos.corregir_resultado(partido, partido.equipo_local))
+                elif 'ganador_visitante' in request.POST:
+                    messages.success(request, eventos.corregir_resultado(partido, partido.equipo_visitante))
+            except ValueError as e:
+                messages.error(request, f'❌ Error: {e}')
+            return redirect('admin:torneos_partido_changelist')
+        
         if request.method == 'POST':
             # Determinar qué equipo ganó
             if 'ganador_local' in request.POST:
@@ -90,13 +156,149 @@ class PartidoAdmin(admin.ModelAdmin):
             'title': f'Marcar ganador: {partido}',
         })
 
-# Registra todos los modelos
+class TorneoArchivadoAdmin(admin.ModelAdmin):
+    """Archivos de torneos finalizados (solo lectura)"""
+    list_display = ['nombre', 'categoria', 'fecha_fin', 'campeon', 'podado', 'tamano']
+    list_filter = ['podado', 'categoria']
+    exclude = ['datos']
+    
+    def tamano(self, obj):
+        return f"{len(obj.datos) / 1024:.1f} KB"
+    tamano.short_description = 'Tamaño'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+class OrganizacionAdmin(admin.ModelAdmin):
+    """Ligas/clubes y los usuarios que las administran"""
+    list_display = ['nombre', 'slug']
+    prepopulated_fields = {'slug': ['nombre']}
+    filter_horizontal = ['miembros']
+
+class TareaAdmin(admin.ModelAdmin):
+    """Cola de tareas en segundo plano (la ejecuta `manage.py procesar_tareas`)"""
+    list_display = ['id', 'nombre', 'estado', 'barra_progreso', 'mensaje', 'intentos', 'creada', 'terminada']
+    list_filter = ['estado', 'nombre']
+    readonly_fields = ['nombre', 'argumentos', 'estado', 'intentos', 'progreso', 'mensaje',
+                       'resultado', 'error', 'ejecutar_desde', 'creada', 'iniciada', 'latido', 'terminada']
+    exclude = ['organizacion', 'max_intentos']
+    actions = ['reintentar']
+    
+    def barra_progreso(self, obj):
+        from django.utils.html import format_html
+        return format_html(
+            '<progress value="{}" max="100" style="width: 100px;"></progress> {}%',
+            obj.progreso, obj.progreso
+        )
+    barra_progreso.short_description = 'Progreso'
+    
+    @admin.action(description='🔁 Reintentar tareas fallidas')
+    def reintentar(self, request, queryset):
+        from django.utils import timezone
+        total = queryset.filter(estado='fallida').update(
+            estado='pendiente', intentos=0, ejecutar_desde=timezone.now(), terminada=None
+        )
+        self.message_user(request, f'✅ {total} tareas vuelven a la cola')
+    
+    def has_add_permission(self, request):
+        return False
+
+class EventoAuditoriaAdmin(admin.ModelAdmin):
+    """Quién anotó cada resultado o pago (solo lectura, no se puede borrar)"""
+    list_display = ['fecha', 'accion', 'objeto', 'torneo', 'usuario']
+    list_filter = ['accion', 'torneo', 'usuario']
+    date_hierarchy = 'fecha'  # rango de fechas
+    list_select_related = ['torneo', 'usuario']
+    readonly_fields = ['fecha', 'usuario', 'accion', 'torneo', 'objeto', 'datos']
+    exclude = ['organizacion']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+class EventoTorneoAdmin(admin.ModelAdmin):
+    """Historial de la llave; para deshacer o corregir usa ✏️ Corregir en Partidos"""
+    list_display = ['torneo', 'numero', 'tipo', 'fecha']
+    list_filter = ['tipo', 'torneo']
+    list_select_related = ['torneo']
+    readonly_fields = ['torneo', 'numero', 'tipo', 'datos', 'fecha']
+    exclude = ['organizacion']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+class ResultadoMarcadorAdmin(admin.ModelAdmin):
+    """Resultados recibidos del marcador sin conexión (para revisar conflictos)"""
+    list_display = ['recibido', 'partido', 'estado', 'mensaje', 'usuario', 'anotado']
+    list_filter = ['estado']
+    list_select_related = ['partido', 'usuario']
+    readonly_fields = ['cliente_id', 'partido', 'ganador_id_enviado', 'estado', 'mensaje', 'anotado', 'recibido', 'usuario']
+    exclude = ['organizacion']
+    
+    def has_add_permission(self, request):
+        return False
+
+class NotificacionAdmin(admin.ModelAdmin):
+    """Avisos a capitanes (los envía la tarea enviar_notificaciones)"""
+    list_display = ['creada', 'tipo', 'canal', 'destinatario', 'equipo', 'estado', 'intentos', 'error', 'enviada']
+    list_filter = ['estado', 'tipo', 'canal']
+    search_fields = ['destinatario']
+    readonly_fields = ['equipo', 'canal', 'tipo', 'destinatario', 'datos', 'clave', 'estado', 'intentos',
+                       'error', 'enviar_desde', 'creada', 'reclamada', 'enviada']
+    exclude = ['organizacion']
+    actions = ['reintentar']
+    
+    @admin.action(description='🔁 Reintentar avisos fallidos')
+    def reintentar(self, request, queryset):
+        from django.db.models import Max
+        from django.utils import timezone
+        from .notificaciones import programar_envio
+        
+        # Uno por clave y solo si no hay ya uno pendiente con esa clave
+        pendientes = Notificacion.todos.filter(estado='pendiente').values('clave')
+        ids = queryset.filter(estado='fallida').exclude(clave__in=pendientes).values('clave').annotate(
+            ultimo=Max('id')
+        ).values_list('ultimo', flat=True)
+        total = Notificacion.todos.filter(id__in=list(ids)).update(
+            estado='pendiente', intentos=0, enviar_desde=timezone.now(), error=''
+        )
+        programar_envio(espera=0)
+        self.message_user(request, f'✅ {total} avisos vuelven a la cola')
+    
+    def has_add_permission(self, request):
+        return False
+
+class CategoriaAdmin(admin.ModelAdmin):
+    """Categorías con sus reglas de edad, plantel y género"""
+    list_display = ['nombre', 'edad_minima', 'edad_maxima', 'min_jugadores', 'max_jugadores', 'genero']
+    exclude = ['organizacion']
 
 # Registra todos los modelos
-admin.site.register(Categoria)
+admin.site.register(Organizacion, OrganizacionAdmin)
+admin.site.register(Categoria, CategoriaAdmin)
 admin.site.register(Torneo)  # ← SIN TorneoAdmin
 admin.site.register(Equipo, EquipoAdmin)
 admin.site.register(Partido, PartidoAdmin)
+admin.site.register(TorneoArchivado, TorneoArchivadoAdmin)
+admin.site.register(Tarea, TareaAdmin)
+admin.site.register(EventoAuditoria, EventoAuditoriaAdmin)
+admin.site.register(EventoTorneo, EventoTorneoAdmin)
+admin.site.register(ResultadoMarcador, ResultadoMarcadorAdmin)
+admin.site.register(Notificacion, NotificacionAdmin)
 # Jugador no necesita registro aparte (está dentro de Equipo)
 
 # Cambiar títulos
@@ -114,15 +316,62 @@ from django.contrib import messages
 class TorneoAdminSimple(admin.ModelAdmin):
     """Admin simple con solo el botón que necesitan los profesores"""
     list_display = ('nombre', 'categoria', 'num_equipos', 'estado', 'campeon', 'boton_preparar')
+    list_filter = ('estado', 'categoria')
+    # El estado solo cambia con las acciones (UPDATE condicional, ver ciclo.py)
+    readonly_fields = ('estado', 'llave_generada')
+    actions = ['validar_elegibilidad', 'cerrar_inscripcion', 'abrir_inscripcion', 'generar_llaves']
+    
+    def _transicionar(self, request, queryset, accion):
+        from .ciclo import TRANSICIONES, transicionar
+        
+        total = transicionar(queryset, accion)
+        omitidos = queryset.count() - total
+        messages.success(request, f'✅ {total} torneos actualizados')
+        if omitidos:
+            messages.warning(request, f'⚠️ {omitidos} torneos omitidos: no se puede {TRANSICIONES[accion][2]} desde su estado')
+    
+    @admin.action(description='🔒 Cerrar inscripción')
+    def cerrar_inscripcion(self, request, queryset):
+        self._transicionar(request, queryset, 'cerrar_inscripcion')
+    
+    @admin.action(description='🔓 Reabrir inscripción')
+    def abrir_inscripcion(self, request, queryset):
+        self._transicionar(request, queryset, 'abrir_inscripcion')
+    
+    @admin.action(description='🎯 Generar llaves (en segundo plano)')
+    def generar_llaves(self, request, queryset):
+        from .ciclo import TRANSICIONES
+        from .tareas import encolar
+        
+        origen = TRANSICIONES['generar_llave'][0]
+        pendientes = list(queryset.filter(llave_generada=False, estado__in=origen).values_list('id', flat=True))
+        for torneo_id in pendientes:
+            encolar('preparar_torneo', torneo_id=torneo_id)
+        messages.success(request, f'⏳ {len(pendientes)} torneos en preparación. Mira el avance en Tareas.')
+    
+    @admin.action(description='✔️ Validar elegibilidad de jugadores')
+    def validar_elegibilidad(self, request, queryset):
+        from .elegibilidad import validar_torneos
+        
+        problemas = validar_torneos(queryset)
+        if not problemas:
+            messages.success(request, f'✅ {queryset.count()} torneos sin problemas de elegibilidad')
+            return
+        for problema in problemas[:20]:
+            messages.warning(request, f'⚠️ {problema.mensaje}')
+        if len(problemas) > 20:
+            messages.warning(request, f'... y {len(problemas) - 20} más (usa `manage.py validar_elegibilidad`)')
     
     def boton_preparar(self, obj):
         """Botón que prepara todo el torneo automáticamente"""
         from django.urls import reverse
         
-        # Si ya tiene llave, mostrar mensaje
+        # Si ya tiene llave, mostrar mensaje y enlace para verla
         if obj.llave_generada:
             return format_html(
-                '<span style="color: #666; padding: 5px 10px;">✅ Llave lista</span>'
+                '<span style="color: #666; padding: 5px 10px;">✅ Llave lista</span> '
+                '<a href="{}" target="_blank">Ver llave</a>',
+                reverse('llave_torneo', args=[obj.id])
             )
         
         # Si no tiene equipos suficientes
@@ -144,21 +393,25 @@ class TorneoAdminSimple(admin.ModelAdmin):
         
         def preparar_torneo_view(request, torneo_id):
             from .models import Torneo
+            from .tareas import encolar
+            from .ciclo import TRANSICIONES
             torneo = Torneo.objects.get(id=torneo_id)
             
-            try:
-                # 1. Generar llave
-                torneo.generar_llave()
-                
-                # 2. Asignar equipos (si hay suficientes)
-                if torneo.equipo_set.count() >= torneo.num_equipos:
-                    torneo.asignar_equipos_llave()
-                    messages.success(request, f'✅ Torneo "{torneo.nombre}" listo. Se crearon {torneo.partido_set.count()} partidos con equipos asignados.')
-                else:
-                    messages.warning(request, f'⚠️ Se creó la llave pero faltan equipos. Necesitas {torneo.num_equipos}, tienes {torneo.equipo_set.count()}.')
-                    
-            except Exception as e:
-                messages.error(request, f'❌ Error: {str(e)}')
+            # Un segundo clic (o un torneo ya preparado) no encola otra tarea
+            en_cola = Tarea.todos.filter(
+                nombre='preparar_torneo', estado__in=('pendiente', 'en_proceso'), argumentos__torneo_id=torneo.id
+            ).first()
+            if torneo.llave_generada or torneo.estado not in TRANSICIONES['generar_llave'][0]:
+                messages.warning(request, f'⚠️ "{torneo.nombre}" ya tiene llave o no está en inscripción')
+            elif en_cola:
+                messages.info(request, f'⏳ "{torneo.nombre}" ya se está preparando (tarea #{en_cola.id})')
+            else:
+                # Generar la llave tarda: se encola y el worker la hace
+                try:
+                    tarea = encolar('preparar_torneo', torneo_id=torneo.id)
+                    messages.success(request, f'⏳ Preparando "{torneo.nombre}" en segundo plano (tarea #{tarea.id}). Mira el avance en Tareas.')
+                except Exception as e:
+                    messages.error(request, f'❌ Error: {str(e)}')
             
             return redirect('admin:torneos_torneo_changelist')
         
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class TorneosConfig(AppConfig):
     name = 'torneos'
+
+    def ready(self):
+        from . import signals  # noqa: F401
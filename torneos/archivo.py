@@ -0,0 +1,136 @@
+"""
+Archivo de torneos finalizados.
+
+``archivar_torneo`` guarda una foto comprimida del torneo en TorneoArchivado;
+con ``podar=True`` además borra sus equipos, jugadores y partidos de las
+tablas en uso (los pagos de cada equipo quedan copiados en la foto). El
+historial se sirve solo desde los archivos.
+
+El archivo se crea con una tarea al terminar la final, así que sin worker
+(y sin ``TAREAS_SINCRONAS``) un torneo puede quedar finalizado sin archivar:
+el historial arma esas fotos en memoria, todas con las mismas consultas.
+"""
+
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+
+from .models import Equipo, Partido, Torneo, TorneoArchivado
+
+# Lo que lee foto_torneo, para cargar uno o muchos torneos en pocas consultas
+DATOS_FOTO = (
+    Prefetch(
+        'equipo_set',
+        queryset=Equipo.todos.order_by('id').prefetch_related('jugador_set', 'pago_set'),
+    ),
+    Prefetch(
+        'partido_set',
+        queryset=Partido.todos.select_related('equipo_local', 'equipo_visitante', 'ganador').order_by('id'),
+    ),
+)
+
+
+def _equipo(equipo):
+    if equipo is None:
+        return None
+    return {'id': equipo.id, 'nombre': equipo.nombre}
+
+
+def foto_torneo(torneo):
+    """Diccionario serializable con lo que muestra el historial y los pagos.
+
+    Usa los datos de ``DATOS_FOTO`` si ya están cargados (si no, los carga).
+    """
+    if 'equipo_set' not in getattr(torneo, '_prefetched_objects_cache', {}):
+        prefetch_related_objects([torneo], *DATOS_FOTO)
+    equipos = list(torneo.equipo_set.all())
+    partidos = list(torneo.partido_set.all())
+
+    subcampeon = None
+    final = next((p for p in partidos if p.ronda == 'final' and p.terminado), None)
+    if final and final.ganador_id:
+        subcampeon = final.equipo_visitante if final.equipo_local_id == final.ganador_id else final.equipo_local
+
+    return {
+        'campeon': _equipo(torneo.campeon),
+        'subcampeon': _equipo(subcampeon),
+        'equipos': [
+            {
+                'id': equipo.id,
+                'nombre': equipo.nombre,
+                'capitan': equipo.capitan,
+                'monto_pagado': str(equipo.monto_pagado),
+                'jugadores': [jugador.nombre for jugador in equipo.jugador_set.all()],
+                'pagos': [
+                    {
+                        'monto': str(pago.monto),
+                        'fecha': pago.fecha.isoformat(),
+                        'referencia': pago.referencia,
+                        'origen': pago.origen,
+                    }
+                    for pago in sorted(equipo.pago_set.all(), key=lambda pago: pago.fecha)
+                ],
+            }
+            for equipo in equipos
+        ],
+        'partidos': [
+            {
+                'ronda': partido.ronda,
+                'ronda_display': partido.get_ronda_display(),
+                'fecha': partido.fecha.isoformat() if partido.fecha else None,
+                'equipo_local': _equipo(partido.equipo_local),
+                'equipo_visitante': _equipo(partido.equipo_visitante),
+                'ganador': _equipo(partido.ganador),
+                'terminado': partido.terminado,
+            }
+            for partido in partidos
+        ],
+    }
+
+
+def _llenar(archivo, torneo):
+    archivo.organizacion_id = torneo.organizacion_id
+    archivo.nombre = torneo.nombre
+    archivo.categoria = str(torneo.categoria)
+    archivo.fecha_inicio = torneo.fecha_inicio
+    archivo.fecha_fin = torneo.fecha_fin
+    archivo.precio_inscripcion = torneo.precio_inscripcion
+    archivo.campeon = str(torneo.campeon or '')
+    archivo.guardar_contenido(foto_torneo(torneo))
+
+
+def archivo_en_memoria(torneo):
+    """Archivo sin guardar, para torneos finalizados que aún no se archivaron"""
+    archivo = TorneoArchivado(torneo=torneo)
+    _llenar(archivo, torneo)
+    return archivo
+
+
+def archivos_en_memoria(torneos):
+    """Como ``archivo_en_memoria`` para muchos torneos, con un número fijo de consultas"""
+    return [archivo_en_memoria(torneo) for torneo in torneos.prefetch_related(*DATOS_FOTO)]
+
+
+@transaction.atomic
+def archivar_torneo(torneo, podar=False):
+    """Archiva (o vuelve a archivar) un torneo finalizado"""
+    if torneo.estado != 'finalizado':
+        raise ValueError(f"El torneo {torneo} no está finalizado")
+
+    archivo = TorneoArchivado.objects.filter(torneo=torneo).first() or TorneoArchivado(torneo=torneo)
+
+    # Si ya se podó, la foto guardada es la única copia: no se sobrescribe
+    if not archivo.podado:
+        _llenar(archivo, torneo)
+
+    if podar and not archivo.podado:
+        # Los pagos se borran en cascada con los equipos: ya quedaron en la foto
+        torneo.partido_set.all().delete()
+        torneo.equipo_set.all().delete()
+        archivo.podado = True
+
+    archivo.save()
+    return archivo
+
+
+def torneos_sin_archivar():
+    return Torneo.objects.filter(estado='finalizado', archivo__isnull=True).select_related('categoria', 'campeon')
@@ -0,0 +1,67 @@
+"""
+Auditoría de resultados y pagos.
+
+``registrar()`` no escribe en la base: guarda el evento en memoria y al
+terminar la petición (señal ``request_finished``, cuando la respuesta ya se
+envió) se insertan todos juntos en un solo INSERT. Así anotar un resultado no
+espera a la auditoría. Fuera de una petición (comandos, tareas, shell) el
+evento se escribe en el momento. En los dos casos el evento se anota al
+confirmarse la transacción (``on_commit``): si se deshace, se descarta.
+"""
+
+from contextvars import ContextVar
+
+from django.core.signals import request_finished
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import EventoAuditoria
+from .organizaciones import organizacion_para_guardar
+
+_pendientes = ContextVar('auditoria_pendientes', default=None)
+_usuario = ContextVar('auditoria_usuario', default=None)
+
+
+def registrar(accion, objeto, torneo_id=None, **datos):
+    """Anota un evento (se guarda al final de la petición).
+
+    Solo cuenta si la transacción donde ocurrió se confirma: una acción que se
+    deshace no deja rastro en la auditoría.
+    """
+    evento = EventoAuditoria(
+        fecha=timezone.now(),
+        usuario_id=_usuario.get(),
+        accion=accion,
+        torneo_id=torneo_id,
+        objeto=str(objeto)[:200],
+        datos=datos,
+        organizacion_id=organizacion_para_guardar(),
+    )
+    pendientes = _pendientes.get()
+    if pendientes is None:
+        transaction.on_commit(evento.save)
+    else:
+        transaction.on_commit(lambda: pendientes.append(evento))
+
+
+class AuditoriaMiddleware:
+    """Abre la lista de eventos de la petición y recuerda quién la hace"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _pendientes.set([])
+        _usuario.set(request.user.pk if request.user.is_authenticated else None)
+        return self.get_response(request)
+
+
+@receiver(request_finished)
+def guardar_pendientes(**kwargs):
+    """Inserta los eventos de la petición que acaba de terminar"""
+    eventos = _pendientes.get()
+    _pendientes.set(None)
+    _usuario.set(None)
+    if eventos:
+        EventoAuditoria.objects.bulk_create(eventos)
@@ -0,0 +1,229 @@
+"""
+Búsqueda de texto completo sobre equipos, capitanes, emails y jugadores.
+
+- SQLite: tabla virtual FTS5 ``torneos_busqueda_fts`` (ranking bm25).
+- PostgreSQL: ``to_tsvector``/``ts_rank`` con índice GIN.
+- Otros motores: ``icontains`` sobre el texto normalizado.
+
+Todo el texto se guarda normalizado (minúsculas y sin tildes), así
+"Jose Perez" encuentra a "José Pérez" en cualquier motor.
+"""
+
+from contextvars import ContextVar
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Equipo, IndiceBusqueda
+from .organizaciones import organizacion_actual
+from .utils import normalizar
+
+POR_PAGINA = 20
+
+# Pesos bm25 de nombre, capitan, email y jugadores (más alto = más relevante)
+PESOS_FTS = (10.0, 5.0, 2.0, 1.0)
+
+# Debe coincidir con el índice GIN creado en la migración 0006
+VECTOR_POSTGRES = "to_tsvector('simple', nombre || ' ' || capitan || ' ' || email || ' ' || jugadores)"
+
+_por_indexar = ContextVar('busqueda_por_indexar', default=None)
+
+
+def datos_indice(equipo, jugadores):
+    return {
+        'torneo_id': equipo.torneo_id,
+        'nombre': normalizar(equipo.nombre),
+        'capitan': normalizar(equipo.capitan),
+        'email': equipo.email.lower(),
+        'jugadores': ' '.join(normalizar(j.nombre) for j in jugadores),
+    }
+
+
+def indexar_equipo(equipo):
+    """Crea o actualiza la fila del índice de un equipo"""
+    IndiceBusqueda.objects.update_or_create(
+        equipo_id=equipo.id,
+        defaults=datos_indice(equipo, equipo.jugador_set.only('nombre')),
+    )
+
+
+def programar_indexado(equipo_id):
+    """Indexa el equipo al confirmar la transacción, una sola vez aunque se
+    guarden el equipo y todos sus jugadores en ella"""
+    pendientes = _por_indexar.get()
+    if pendientes is None:
+        pendientes = set()
+        _por_indexar.set(pendientes)
+    pendientes.add(equipo_id)
+    transaction.on_commit(lambda: _indexar_pendiente(equipo_id))
+
+
+def _indexar_pendiente(equipo_id):
+    pendientes = _por_indexar.get()
+    if pendientes is None or equipo_id not in pendientes:
+        return  # otro aviso de la misma transacción ya lo indexó
+    pendientes.discard(equipo_id)
+    # Se lee de nuevo: si el equipo se borró no hay nada que indexar
+    equipo = Equipo.todos.filter(id=equipo_id).first()
+    if equipo is not None:
+        indexar_equipo(equipo)
+
+
+def reconstruir_indice(tamano_lote=500):
+    """Vuelve a generar todo el índice por lotes; devuelve cuántos equipos indexó"""
+    IndiceBusqueda.objects.all().delete()
+
+    total = 0
+    lote = []
+    equipos = Equipo.objects.only('id', 'torneo_id', 'nombre', 'capitan', 'email').prefetch_related('jugador_set')
+    for equipo in equipos.iterator(chunk_size=tamano_lote):
+        lote.append(IndiceBusqueda(equipo_id=equipo.id, **datos_indice(equipo, equipo.jugador_set.all())))
+        if len(lote) >= tamano_lote:
+            IndiceBusqueda.objects.bulk_create(lote)
+            total += len(lote)
+            lote = []
+
+    IndiceBusqueda.objects.bulk_create(lote)
+    return total + len(lote)
+
+
+def terminos(texto):
+    """Palabras normalizadas de la búsqueda (sin caracteres especiales)"""
+    limpio = ''.join(c if c.isalnum() or c in '@.' else ' ' for c in normalizar(texto))
+    return [t for t in limpio.split() if t.strip('.@')]
+
+
+def consulta_fts(palabras):
+    # Cada palabra como prefijo entre comillas: "jos"* AND "per"*
+    return ' AND '.join('"%s"*' % p.replace('"', '') for p in palabras)
+
+
+def consulta_postgres(palabras):
+    return ' & '.join(f'{p}:*' for p in palabras)
+
+
+def _buscar_sqlite(palabras, torneo_id, limite, desde):
+    consulta = consulta_fts(palabras)
+    filtros = ''
+    params = [consulta]
+    if torneo_id:
+        filtros += ' AND i.torneo_id = %s'
+        params.append(torneo_id)
+    if organizacion_actual() is not None:
+        filtros += ' AND i.torneo_id IN (SELECT id FROM torneos_torneo WHERE organizacion_id = %s)'
+        params.append(organizacion_actual())
+
+    base = f"""
+        FROM torneos_busqueda_fts f
+        JOIN torneos_indicebusqueda i ON i.id = f.rowid
+        WHERE torneos_busqueda_fts MATCH %s {filtros}
+    """
+    pesos = ', '.join(str(p) for p in PESOS_FTS)
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT COUNT(*) ' + base, params)
+        total = cursor.fetchone()[0]
+        cursor.execute(
+            f'SELECT i.equipo_id {base} ORDER BY bm25(torneos_busqueda_fts, {pesos}) LIMIT %s OFFSET %s',
+            params + [limite, desde],
+        )
+        ids = [fila[0] for fila in cursor.fetchall()]
+    return ids, total
+
+
+def _buscar_postgres(palabras, torneo_id, limite, desde):
+    consulta = consulta_postgres(palabras)
+    indices = IndiceBusqueda.objects.extra(
+        where=[f"{VECTOR_POSTGRES} @@ to_tsquery('simple', %s)"],
+        params=[consulta],
+        select={'rank': f"ts_rank({VECTOR_POSTGRES}, to_tsquery('simple', %s))"},
+        select_params=[consulta],
+    )
+    if torneo_id:
+        indices = indices.filter(torneo_id=torneo_id)
+    if organizacion_actual() is not None:
+        indices = indices.filter(torneo__organizacion_id=organizacion_actual())
+    total = indices.count()
+    ids = list(indices.order_by('-rank').values_list('equipo_id', flat=True)[desde:desde + limite])
+    return ids, total
+
+
+def _buscar_generico(palabras, torneo_id, limite, desde):
+    indices = IndiceBusqueda.objects.all()
+    for palabra in palabras:
+        indices = indices.filter(
+            Q(nombre__icontains=palabra) | Q(capitan__icontains=palabra)
+            | Q(email__icontains=palabra) | Q(jugadores__icontains=palabra)
+        )
+    if torneo_id:
+        indices = indices.filter(torneo_id=torneo_id)
+    if organizacion_actual() is not None:
+        indices = indices.filter(torneo__organizacion_id=organizacion_actual())
+    total = indices.count()
+    ids = list(indices.order_by('nombre').values_list('equipo_id', flat=True)[desde:desde + limite])
+    return ids, total
+
+
+def buscar_ids(texto, torneo_id=None, limite=POR_PAGINA, desde=0):
+    """IDs de equipos ordenados por relevancia y el total de coincidencias"""
+    palabras = terminos(texto)
+    if not palabras:
+        return [], 0
+
+    if connection.vendor == 'sqlite':
+        return _buscar_sqlite(palabras, torneo_id, limite, desde)
+    if connection.vendor == 'postgresql':
+        return _buscar_postgres(palabras, torneo_id, limite, desde)
+    return _buscar_generico(palabras, torneo_id, limite, desde)
+
+
+def filtrar_queryset(equipos, texto):
+    """Restringe un queryset de Equipo a las coincidencias (sin ordenar por relevancia).
+
+    Se hace con una subconsulta para no traer miles de IDs a Python; lo usan
+    el admin y la lista de equipos, que ya tienen su propio orden y paginación.
+    """
+    palabras = terminos(texto)
+    if not palabras:
+        return equipos
+
+    if connection.vendor == 'sqlite':
+        return equipos.extra(
+            where=["""torneos_equipo.id IN (
+                SELECT i.equipo_id FROM torneos_busqueda_fts f
+                JOIN torneos_indicebusqueda i ON i.id = f.rowid
+                WHERE torneos_busqueda_fts MATCH %s
+            )"""],
+            params=[consulta_fts(palabras)],
+        )
+
+    if connection.vendor == 'postgresql':
+        return equipos.extra(
+            where=[f"""torneos_equipo.id IN (
+                SELECT equipo_id FROM torneos_indicebusqueda
+                WHERE {VECTOR_POSTGRES} @@ to_tsquery('simple', %s)
+            )"""],
+            params=[consulta_postgres(palabras)],
+        )
+
+    for palabra in palabras:
+        equipos = equipos.filter(
+            Q(indice_busqueda__nombre__icontains=palabra) | Q(indice_busqueda__capitan__icontains=palabra)
+            | Q(indice_busqueda__email__icontains=palabra) | Q(indice_busqueda__jugadores__icontains=palabra)
+        )
+    return equipos
+
+
+def buscar(texto, torneo_id=None, pagina=1, por_pagina=POR_PAGINA):
+    """Página de equipos encontrados (en orden de relevancia) y datos de paginación"""
+    pagina = max(int(pagina), 1)
+    ids, total = buscar_ids(texto, torneo_id, por_pagina, (pagina - 1) * por_pagina)
+
+    equipos = Equipo.objects.filter(id__in=ids).select_related('torneo').prefetch_related('jugador_set')
+    por_id = {equipo.id: equipo for equipo in equipos}
+
+    return {
+        'equipos': [por_id[i] for i in ids if i in por_id],
+        'total': total,
+        'pagina': pagina,
+        'paginas': max((total + por_pagina - 1) // por_pagina, 1),
+    }
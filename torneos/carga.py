@@ -0,0 +1,345 @@
+"""
+Prueba de carga en el mismo proceso (``python manage.py prueba_carga``).
+
+Varios usuarios simulados (un hilo cada uno) llaman directamente a la
+aplicación WSGI del proyecto, con sus cookies, token CSRF y ETags como un
+navegador, sin servidor ni red de por medio. Escenarios:
+
+- ``espectador``: anónimo, mira el historial y las llaves.
+- ``tesorero``: inicia sesión, revisa equipos y marca/desmarca pagos.
+- ``arbitro``: inicia sesión y anota resultados desde el admin.
+
+Cada petición se cuenta por ruta (el patrón de ``urls.py``, no la URL
+concreta) y al final se informan peticiones por segundo y latencias
+p50/p95/p99. Mide el tiempo dentro de Django (vistas, plantillas, base de
+datos): sirve para comparar antes y después de un cambio en la misma
+máquina, no como capacidad absoluta del servidor.
+"""
+
+import math
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from http.cookies import SimpleCookie
+from io import BytesIO
+from urllib.parse import urlencode, urlsplit
+
+from django.core.signals import got_request_exception
+from django.db import connections
+from django.urls import Resolver404, resolve
+
+from .models import Equipo, Partido, Torneo
+
+
+def percentil(ordenados, p):
+    """Percentil ``p`` (0-100) de una lista ordenada, por rango más cercano"""
+    if not ordenados:
+        return None
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+class Registro:
+    """Latencias y códigos por ruta (compartido por todos los hilos)"""
+
+    def __init__(self, desde):
+        self.desde = desde  # lo anterior es calentamiento y no cuenta
+        self.hasta = None
+        self.latencias = defaultdict(list)
+        self.codigos = defaultdict(lambda: defaultdict(int))
+        self.excepciones = Counter()
+        self._candado = threading.Lock()
+
+    def anotar(self, ruta, codigo, inicio, fin):
+        if inicio < self.desde:
+            return
+        with self._candado:
+            self.latencias[ruta].append(fin - inicio)
+            self.codigos[ruta][codigo] += 1
+
+    def excepcion(self, sender, request=None, **kwargs):
+        """Receptor de got_request_exception: sin DEBUG los 500 no dicen nada más"""
+        tipo, error, _ = sys.exc_info()
+        if tipo is not None:
+            with self._candado:
+                self.excepciones[f'{tipo.__name__}: {error}'[:200]] += 1
+
+    def _resumen(self, latencias, codigos, duracion):
+        ordenadas = sorted(latencias)
+        return {
+            'peticiones': len(ordenadas),
+            'rps': round(len(ordenadas) / duracion, 2),
+            'p50_ms': round(percentil(ordenadas, 50) * 1000, 2),
+            'p95_ms': round(percentil(ordenadas, 95) * 1000, 2),
+            'p99_ms': round(percentil(ordenadas, 99) * 1000, 2),
+            'errores': sum(n for codigo, n in codigos.items() if codigo >= 400),
+            'codigos': {str(codigo): n for codigo, n in sorted(codigos.items())},
+        }
+
+    def informe(self):
+        duracion = max((self.hasta or time.perf_counter()) - self.desde, 1e-9)
+        todas = [s for latencias in self.latencias.values() for s in latencias]
+        todos = defaultdict(int)
+        for codigos in self.codigos.values():
+            for codigo, n in codigos.items():
+                todos[codigo] += n
+        return {
+            'duracion_s': round(duracion, 2),
+            'total': self._resumen(todas, todos, duracion) if todas else {'peticiones': 0},
+            'rutas': {
+                ruta: self._resumen(self.latencias[ruta], self.codigos[ruta], duracion)
+                for ruta in sorted(self.latencias)
+            },
+            'excepciones': dict(self.excepciones.most_common()),
+        }
+
+
+class Navegador:
+    """Un usuario simulado: guarda cookies y ETags y llama a la aplicación WSGI"""
+
+    def __init__(self, aplicacion, host, registro):
+        self.aplicacion = aplicacion
+        self.host = host
+        self.registro = registro
+        self.cookies = {}
+        self.etags = {}
+
+    @staticmethod
+    def ruta(metodo, path):
+        """'GET /torneos/<int:torneo_id>/llave/' en vez de la URL concreta"""
+        try:
+            return f'{metodo} /{resolve(path).route}'
+        except Resolver404:
+            return f'{metodo} {path}'
+
+    def _environ(self, metodo, url, datos):
+        path, _, query = url.partition('?')
+        cuerpo = urlencode(datos or {}).encode()
+        environ = {
+            'REQUEST_METHOD': metodo,
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'SERVER_NAME': self.host,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'HTTP_HOST': self.host,
+            'CONTENT_LENGTH': str(len(cuerpo)),
+            'wsgi.input': BytesIO(cuerpo),
+            'wsgi.errors': sys.stderr,
+            'wsgi.url_scheme': 'http',
+            'wsgi.version': (1, 0),
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        if metodo == 'POST':
+            environ['CONTENT_TYPE'] = 'application/x-www-form-urlencoded'
+            environ['HTTP_X_CSRFTOKEN'] = self.cookies.get('csrftoken', '')
+        if self.cookies:
+            environ['HTTP_COOKIE'] = '; '.join(f'{nombre}={valor}' for nombre, valor in self.cookies.items())
+        if metodo == 'GET' and url in self.etags:
+            environ['HTTP_IF_NONE_MATCH'] = self.etags[url]
+        return environ
+
+    def _guardar_cookies(self, cabeceras):
+        for nombre, valor in cabeceras:
+            if nombre.lower() != 'set-cookie':
+                continue
+            for cookie in SimpleCookie(valor).values():
+                if cookie.value and cookie['max-age'] != '0':
+                    self.cookies[cookie.key] = cookie.value
+                else:
+                    self.cookies.pop(cookie.key, None)
+
+    def pedir(self, metodo, url, datos=None, seguir=True):
+        """Hace la petición, la anota y sigue la redirección como un navegador"""
+        environ = self._environ(metodo, url, datos)
+        respuesta = {}
+
+        def start_response(estado, cabeceras, exc_info=None):
+            respuesta['codigo'] = int(estado[:3])
+            respuesta['cabeceras'] = cabeceras
+
+        inicio = time.perf_counter()
+        iterable = self.aplicacion(environ, start_response)
+        try:
+            contenido = b''.join(iterable)
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+        self.registro.anotar(self.ruta(metodo, environ['PATH_INFO']), respuesta['codigo'], inicio, time.perf_counter())
+
+        cabeceras = dict((nombre.lower(), valor) for nombre, valor in respuesta['cabeceras'])
+        self._guardar_cookies(respuesta['cabeceras'])
+        if metodo == 'GET' and respuesta['codigo'] == 200 and 'etag' in cabeceras:
+            self.etags[url] = cabeceras['etag']
+
+        if seguir and respuesta['codigo'] in (301, 302, 303) and 'location' in cabeceras:
+            destino = urlsplit(cabeceras['location'])
+            return self.pedir('GET', destino.path + (f'?{destino.query}' if destino.query else ''))
+        return respuesta['codigo'], contenido
+
+    def iniciar_sesion(self, usuario, clave):
+        """Entra por la LoginView del proyecto (GET para el token CSRF y POST)"""
+        self.pedir('GET', '/login/')
+        codigo, _ = self.pedir('POST', '/login/', {'username': usuario, 'password': clave}, seguir=False)
+        if codigo != 302:
+            raise RuntimeError(f'No se pudo iniciar sesión como {usuario} (HTTP {codigo})')
+
+
+class PartidosListos:
+    """Reparte entre los árbitros los partidos con los dos equipos y sin resultado"""
+
+    def __init__(self):
+        self.tomados = set()
+        self._candado = threading.Lock()
+
+    def tomar(self):
+        with self._candado:
+            partido_id = Partido.todos.filter(
+                terminado=False, equipo_local__isnull=False, equipo_visitante__isnull=False,
+            ).exclude(id__in=self.tomados).order_by('id').values_list('id', flat=True).first()
+            if partido_id is not None:
+                self.tomados.add(partido_id)
+            return partido_id
+
+
+# ===== ESCENARIOS =====
+# Cada uno es una "visita": se repite mientras dure la prueba
+
+def espectador(navegador, datos, azar):
+    navegador.pedir('GET', '/historial/')
+    torneo_id = azar.choice(datos['torneos'])
+    navegador.pedir('GET', f'/torneos/{torneo_id}/llave/')
+    if azar.random() < 0.3:
+        navegador.pedir('GET', f'/torneos/{torneo_id}/llave.svg')
+
+
+def tesorero(navegador, datos, azar):
+    navegador.pedir('GET', '/dashboard/')
+    torneo_id = azar.choice(datos['torneos'])
+    navegador.pedir('GET', f'/equipos/?torneo={torneo_id}')
+    navegador.pedir('POST', f'/equipos/{azar.choice(datos["equipos"])}/pago/')
+    if azar.random() < 0.5:
+        navegador.pedir('GET', '/equipos/?pago=pendiente')
+    navegador.pedir('GET', '/calendario/')
+    navegador.pedir('GET', '/admin/torneos/equipo/')
+
+
+def arbitro(navegador, datos, azar):
+    navegador.pedir('GET', '/admin/torneos/partido/')
+    partido_id = datos['partidos'].tomar()
+    if partido_id is None:
+        navegador.pedir('GET', '/calendario/')  # ya no quedan partidos por jugar
+        return
+    url = f'/admin/torneos/partido/{partido_id}/marcar_ganador/'
+    navegador.pedir('GET', url)
+    navegador.pedir('POST', url, {azar.choice(['ganador_local', 'ganador_visitante']): '1'})
+
+
+ESCENARIOS = {'espectador': espectador, 'tesorero': tesorero, 'arbitro': arbitro}
+
+
+# ===== DATOS Y EJECUCIÓN =====
+
+def preparar(usuario, clave, torneos=4, equipos=16):
+    """Crea un usuario staff y torneos con llave; el primero queda terminado"""
+    from datetime import date, timedelta
+
+    from django.apps import apps
+    from django.contrib.auth import get_user_model
+
+    from .models import Categoria, Jugador
+
+    get_user_model().objects.create_superuser(usuario, f'{usuario}@localhost', clave)
+    if apps.is_installed('admin_interface'):
+        # El tema del admin se crea en la primera página que lo pide: si lo piden
+        # varios usuarios a la vez chocan (UNIQUE en admin_interface_theme.id)
+        from admin_interface.models import Theme
+        Theme.objects.get_active()
+    categoria = Categoria.objects.create(nombre='Prueba de carga')
+    hoy = date.today()
+
+    ids = []
+    for t in range(torneos):
+        torneo = Torneo.objects.create(
+            nombre=f'Torneo de carga {t + 1}', categoria=categoria,
+            fecha_inicio=hoy, fecha_fin=hoy + timedelta(days=2),
+            precio_inscripcion=100, num_equipos=equipos,
+        )
+        for e in range(equipos):
+            equipo = Equipo.objects.create(
+                torneo=torneo, nombre=f'Equipo {t + 1}-{e + 1}', capitan=f'Capitán {e + 1}',
+                telefono='0000000', email=f'equipo{t + 1}-{e + 1}@localhost',
+            )
+            for j in range(6):
+                Jugador.objects.create(equipo=equipo, nombre=f'Jugador {e + 1}-{j + 1}', edad=20)
+        torneo.generar_llave()
+        torneo.asignar_equipos_llave()
+        Partido.todos.filter(torneo=torneo).update(fecha=hoy, hora='10:00')
+        ids.append(torneo.id)
+
+    # Uno terminado para que el historial tenga contenido
+    terminado = Torneo.todos.get(id=ids[0])
+    while (partido := Partido.todos.filter(
+        torneo=terminado, terminado=False, equipo_local__isnull=False, equipo_visitante__isnull=False,
+    ).order_by('id').first()) is not None:
+        terminado.avanzar_ganador(partido, partido.equipo_local)
+
+    return {
+        'torneos': ids,
+        'equipos': list(Equipo.todos.filter(torneo_id__in=ids).values_list('id', flat=True)),
+        'partidos': PartidosListos(),
+    }
+
+
+def _usuario(aplicacion, host, registro, escenario, datos, credenciales, azar, hasta, pausa, errores):
+    funcion = ESCENARIOS[escenario]
+    navegador = Navegador(aplicacion, host, registro)
+    try:
+        if escenario != 'espectador':
+            navegador.iniciar_sesion(*credenciales)
+        while time.perf_counter() < hasta:
+            funcion(navegador, datos, azar)
+            if pausa:
+                time.sleep(azar.uniform(0, 2 * pausa))  # tiempo de lectura del usuario
+    except Exception as e:
+        errores.append(f'{escenario}: {e}')
+    finally:
+        connections.close_all()
+
+
+def ejecutar(aplicacion, host, usuarios, datos, credenciales, duracion, calentamiento=0, pausa=0, semilla=None):
+    """Corre los escenarios en paralelo; ``usuarios`` es {'espectador': 5, ...}"""
+    import random
+
+    inicio = time.perf_counter()
+    registro = Registro(desde=inicio + calentamiento)
+    hasta = registro.desde + duracion
+    errores = []
+    hilos = []
+    numero = 0
+    for escenario, cantidad in usuarios.items():
+        for _ in range(cantidad):
+            azar = random.Random(None if semilla is None else semilla + numero)
+            numero += 1
+            hilos.append(threading.Thread(
+                target=_usuario,
+                args=(aplicacion, host, registro, escenario, datos, credenciales, azar, hasta, pausa, errores),
+                daemon=True,
+            ))
+    got_request_exception.connect(registro.excepcion)
+    try:
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+    finally:
+        got_request_exception.disconnect(registro.excepcion)
+    registro.hasta = time.perf_counter()
+
+    informe = registro.informe()
+    informe['usuarios'] = usuarios
+    informe['fallos_usuarios'] = errores
+    return informe
@@ -0,0 +1,69 @@
+"""
+Ciclo de vida de un torneo:
+
+    planificacion → inscripcion_cerrada → llave_generada → en_curso → finalizado
+
+Cada paso es un UPDATE condicional (``WHERE estado IN (...)``): si otro
+proceso ya movió el torneo, el UPDATE no toca ninguna fila y la transición
+falla sin pisar nada. El mismo UPDATE sirve para muchos torneos a la vez
+(``transicionar``), por ejemplo cerrar la inscripción de toda una categoría
+a fin de mes.
+"""
+
+from django.utils import timezone
+
+ESTADOS = [
+    ('planificacion', 'En planificación'),
+    ('inscripcion_cerrada', 'Inscripción cerrada'),
+    ('llave_generada', 'Llave generada'),
+    ('en_curso', 'En curso'),
+    ('finalizado', 'Finalizado'),
+]
+
+# acción: (estados de origen, estado de destino, descripción)
+TRANSICIONES = {
+    'cerrar_inscripcion': (('planificacion',), 'inscripcion_cerrada', 'cerrar la inscripción'),
+    'abrir_inscripcion': (('inscripcion_cerrada',), 'planificacion', 'reabrir la inscripción'),
+    'generar_llave': (('planificacion', 'inscripcion_cerrada'), 'llave_generada', 'generar la llave'),
+    'iniciar': (('llave_generada',), 'en_curso', 'iniciar el torneo'),
+    'finalizar': (('en_curso',), 'finalizado', 'finalizar el torneo'),
+}
+
+# Las que no crean ni borran nada más que el estado: se pueden hacer en masa
+MASIVAS = ('cerrar_inscripcion', 'abrir_inscripcion')
+
+
+class TransicionNoPermitida(ValueError):
+    pass
+
+
+def transicionar(torneos, accion, **campos):
+    """Aplica ``accion`` a los torneos del queryset que estén en un estado de
+    origen válido (un solo UPDATE). Devuelve cuántos cambiaron."""
+    origen, destino, _ = TRANSICIONES[accion]
+    return torneos.filter(estado__in=origen).update(estado=destino, actualizado=timezone.now(), **campos)
+
+
+def transicionar_torneo(torneo, accion, **campos):
+    """Como ``transicionar`` para un solo torneo, pero falla si no se pudo"""
+    from .models import Torneo
+
+    if not transicionar(Torneo.todos.filter(id=torneo.id), accion, **campos):
+        actual = Torneo.todos.filter(id=torneo.id).values_list('estado', flat=True).first()
+        raise TransicionNoPermitida(
+            f"No se puede {TRANSICIONES[accion][2]}: el torneo está {dict(ESTADOS).get(actual, actual).lower()}"
+        )
+    torneo.estado = TRANSICIONES[accion][1]
+    for campo, valor in campos.items():
+        setattr(torneo, campo, valor)
+
+
+def estado_de_llave(estado):
+    """Estado del torneo que corresponde a una llave reconstruida por eventos"""
+    if estado['campeon'] is not None:
+        return 'finalizado'
+    if any(p['ganador'] is not None for p in estado['partidos'].values()):
+        return 'en_curso'
+    if estado['llave_generada']:
+        return 'llave_generada'
+    return None
@@ -0,0 +1,106 @@
+"""
+Respuestas condicionales (ETag / Last-Modified → 304) y Cache-Control de las
+páginas públicas.
+
+La versión de cada página sale de ``Torneo.actualizado`` (y
+``TorneoArchivado.actualizado``), que se renueva al guardar el torneo, sus
+partidos o sus equipos. La página de la llave también muestra la predicción,
+que el worker guarda después: su hora de cálculo entra en la versión. El ETag
+incluye al usuario y a la organización activa porque el HTML cambia con ellos
+(menú lateral, organización).
+"""
+
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from .models import Torneo, TorneoArchivado
+from .organizaciones import organizacion_actual
+
+
+def _etag(request, *partes):
+    usuario = request.user.pk if request.user.is_authenticated else 'anonimo'
+    texto = '|'.join(str(parte) for parte in (*partes, usuario, organizacion_actual()))
+    return hashlib.md5(texto.encode()).hexdigest()
+
+
+def _memorizar(funcion):
+    """condition() pide ETag y Last-Modified por separado: se calcula una sola vez por petición"""
+    @wraps(funcion)
+    def envoltura(request, *args, **kwargs):
+        clave = f'_version_{funcion.__name__}'
+        if not hasattr(request, clave):
+            setattr(request, clave, funcion(request, *args, **kwargs))
+        return getattr(request, clave)
+    return envoltura
+
+
+@_memorizar
+def version_historial(request):
+    archivos = TorneoArchivado.objects.aggregate(total=Count('id'), ultimo=Max('actualizado'))
+    finalizados = Torneo.objects.filter(estado='finalizado').aggregate(total=Count('id'), ultimo=Max('actualizado'))
+    fechas = [fecha for fecha in (archivos['ultimo'], finalizados['ultimo']) if fecha]
+    etag = _etag(request, 'historial', *archivos.values(), *finalizados.values())
+    return etag, max(fechas) if fechas else None
+
+
+@_memorizar
+def version_torneo(request, torneo_id, formato='html'):
+    torneo = Torneo.objects.filter(id=torneo_id).values(
+        'actualizado', 'estado', 'prediccion_guardada__calculada'
+    ).first()
+    if torneo is None:
+        return None, None, None  # la vista responde 404
+    partes, modificado = [torneo['actualizado']], torneo['actualizado']
+    calculada = torneo['prediccion_guardada__calculada']
+    if formato == 'html' and calculada:
+        # Sin esto, quien vio la llave antes de que llegara la predicción recibiría 304
+        partes.append(calculada)
+        modificado = max(modificado, calculada)
+    etag = _etag(request, 'llave', torneo_id, formato, *partes)
+    return etag, modificado, torneo['estado']
+
+
+def etag_historial(request):
+    return version_historial(request)[0]
+
+
+def modificado_historial(request):
+    return version_historial(request)[1]
+
+
+def etag_torneo(request, torneo_id, formato='html'):
+    return version_torneo(request, torneo_id, formato)[0]
+
+
+def modificado_torneo(request, torneo_id, formato='html'):
+    return version_torneo(request, torneo_id, formato)[1]
+
+
+def politica_cache(segundos):
+    """Cache-Control de una página pública.
+
+    Anónimos: ``public`` con ``max-age`` (lo puede guardar un proxy).
+    Con sesión: ``private, no-cache`` (el navegador revalida con el ETag y
+    recibe 304). ``segundos`` puede ser una función de la petición.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            respuesta = vista(request, *args, **kwargs)
+            if request.user.is_authenticated:
+                patch_cache_control(respuesta, private=True, no_cache=True)
+            else:
+                maximo = segundos(request, *args, **kwargs) if callable(segundos) else segundos
+                patch_cache_control(respuesta, public=True, max_age=maximo)
+            patch_vary_headers(respuesta, ['Cookie'])
+            return respuesta
+        return envoltura
+    return decorador
+
+
+def segundos_torneo(request, torneo_id, formato='html'):
+    """Un torneo finalizado casi no cambia; uno en curso cambia con cada resultado"""
+    return 3600 if version_torneo(request, torneo_id, formato)[2] == 'finalizado' else 30
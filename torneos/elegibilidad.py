@@ -0,0 +1,168 @@
+"""
+Reglas de elegibilidad por categoría (edad, tamaño del plantel y género).
+
+``validar_plantel`` revisa un plantel en memoria antes de guardarlo (la
+inscripción). ``validar_torneos`` revisa temporadas completas con un número
+fijo de consultas agrupadas, sin importar cuántos equipos o jugadores haya:
+
+1. por equipo: cantidad de jugadores y de cada género (una consulta),
+2. jugadores fuera de edad o de género (una consulta),
+3. jugadores repetidos en el mismo torneo (una consulta por documento y otra
+   por nombre).
+"""
+
+from dataclasses import dataclass
+
+from django.db.models import Count, F, Q
+from django.db.models.functions import Lower
+
+from .models import Equipo, Jugador
+
+
+@dataclass
+class Problema:
+    tipo: str
+    mensaje: str
+    torneo_id: int = None
+    equipo_id: int = None
+    jugador_id: int = None
+
+
+def _fuera_de_edad(categoria, edad):
+    if not edad:
+        return False  # 0 = sin registrar, se reporta aparte
+    if categoria.edad_minima is not None and edad < categoria.edad_minima:
+        return True
+    return categoria.edad_maxima is not None and edad > categoria.edad_maxima
+
+
+def _genero_no_permitido(categoria, genero):
+    return (
+        (categoria.genero == 'masculino' and genero == 'F')
+        or (categoria.genero == 'femenino' and genero == 'M')
+    )
+
+
+def validar_plantel(categoria, jugadores):
+    """Problemas de un plantel aún no guardado.
+
+    ``jugadores`` es una lista de diccionarios con nombre, edad y genero.
+    """
+    problemas = []
+    total = len(jugadores)
+    if total < categoria.min_jugadores or total > categoria.max_jugadores:
+        problemas.append(
+            f"{categoria} admite de {categoria.min_jugadores} a {categoria.max_jugadores} jugadores (hay {total})"
+        )
+
+    con_limite = categoria.edad_minima is not None or categoria.edad_maxima is not None
+    for jugador in jugadores:
+        if con_limite and not jugador.get('edad'):
+            problemas.append(f"Falta la edad de {jugador['nombre']}: {categoria} tiene límite de edad")
+        elif _fuera_de_edad(categoria, jugador.get('edad')):
+            problemas.append(f"{jugador['nombre']} ({jugador['edad']} años) no tiene la edad de {categoria}")
+        if _genero_no_permitido(categoria, jugador.get('genero')):
+            problemas.append(f"{jugador['nombre']} no puede jugar en {categoria} ({categoria.get_genero_display()})")
+
+    if categoria.genero == 'mixto' and categoria.min_por_genero:
+        for genero, nombre in Jugador.GENEROS:
+            cantidad = sum(1 for jugador in jugadores if jugador.get('genero') == genero)
+            if cantidad < categoria.min_por_genero:
+                problemas.append(f"{categoria} pide al menos {categoria.min_por_genero} de género {nombre.lower()} (hay {cantidad})")
+    return problemas
+
+
+def _problemas_de_equipos(equipos):
+    """Tamaño del plantel y mezcla de géneros, en una consulta agrupada"""
+    filas = equipos.annotate(
+        total=Count('jugador'),
+        mujeres=Count('jugador', filter=Q(jugador__genero='F')),
+        hombres=Count('jugador', filter=Q(jugador__genero='M')),
+    ).values_list(
+        'id', 'nombre', 'torneo_id', 'total', 'mujeres', 'hombres',
+        'torneo__categoria__nombre', 'torneo__categoria__min_jugadores',
+        'torneo__categoria__max_jugadores', 'torneo__categoria__genero',
+        'torneo__categoria__min_por_genero',
+    )
+
+    for id, nombre, torneo_id, total, mujeres, hombres, categoria, minimo, maximo, genero, por_genero in filas:
+        if total < minimo or total > maximo:
+            yield Problema(
+                'plantel', f"{nombre}: {total} jugadores ({categoria} admite de {minimo} a {maximo})",
+                torneo_id, id,
+            )
+        if genero == 'mixto' and por_genero and min(mujeres, hombres) < por_genero:
+            yield Problema(
+                'genero', f"{nombre}: {mujeres} mujeres y {hombres} hombres ({categoria} pide {por_genero} de cada uno)",
+                torneo_id, id,
+            )
+
+
+def _problemas_de_jugadores(jugadores):
+    """Edad y género contra la categoría, filtrado en la base de datos"""
+    categoria = 'equipo__torneo__categoria__'
+    fuera = jugadores.filter(
+        Q(edad__gt=0, **{f'{categoria}edad_minima__isnull': False}, edad__lt=F(f'{categoria}edad_minima'))
+        | Q(**{f'{categoria}edad_maxima__isnull': False}, edad__gt=F(f'{categoria}edad_maxima'))
+        | Q(edad=0, **{f'{categoria}edad_minima__isnull': False})
+        | Q(edad=0, **{f'{categoria}edad_maxima__isnull': False})
+        | Q(**{f'{categoria}genero': 'masculino'}, genero='F')
+        | Q(**{f'{categoria}genero': 'femenino'}, genero='M')
+    ).values_list(
+        'id', 'nombre', 'edad', 'genero', 'equipo_id', 'equipo__nombre', 'equipo__torneo_id',
+        f'{categoria}nombre', f'{categoria}edad_minima', f'{categoria}edad_maxima', f'{categoria}genero',
+    )
+
+    for id, nombre, edad, genero, equipo_id, equipo, torneo_id, cat, minima, maxima, cat_genero in fuera:
+        datos = (torneo_id, equipo_id, id)
+        if edad == 0 and (minima is not None or maxima is not None):
+            yield Problema('edad', f"{nombre} ({equipo}): edad sin registrar y {cat} tiene límite de edad", *datos)
+        elif (minima is not None and 0 < edad < minima) or (maxima is not None and edad > maxima):
+            yield Problema('edad', f"{nombre} ({equipo}): {edad} años no corresponde a {cat}", *datos)
+        if (cat_genero == 'masculino' and genero == 'F') or (cat_genero == 'femenino' and genero == 'M'):
+            yield Problema('genero', f"{nombre} ({equipo}): género no permitido en {cat}", *datos)
+
+
+def _repetidos(jugadores):
+    """Misma persona en dos equipos de un torneo: por documento y, sin documento, por nombre"""
+    por_documento = jugadores.exclude(documento='').values('torneo_id', 'documento').annotate(
+        equipos=Count('equipo', distinct=True)
+    ).filter(equipos__gt=1)
+    for fila in por_documento:
+        yield Problema(
+            'repetido', f"Documento {fila['documento']} inscrito en {fila['equipos']} equipos del mismo torneo",
+            fila['torneo_id'],
+        )
+
+    por_nombre = jugadores.filter(documento='').values('torneo_id', nombre_min=Lower('nombre')).annotate(
+        equipos=Count('equipo', distinct=True)
+    ).filter(equipos__gt=1)
+    for fila in por_nombre:
+        yield Problema(
+            'repetido', f"Posible jugador repetido: \"{fila['nombre_min']}\" está en {fila['equipos']} equipos (sin documento)",
+            fila['torneo_id'],
+        )
+
+
+def validar_torneos(torneos=None):
+    """Todos los problemas de elegibilidad de los torneos dados (o de todos)"""
+    equipos = Equipo.objects.all()
+    jugadores = Jugador.objects.all()
+    if torneos is not None:
+        equipos = equipos.filter(torneo__in=torneos)
+        jugadores = jugadores.filter(torneo__in=torneos)
+
+    problemas = list(_problemas_de_equipos(equipos))
+    problemas += _problemas_de_jugadores(jugadores)
+    problemas += _repetidos(jugadores)
+    return problemas
+
+
+def documentos_inscritos(torneo, documentos):
+    """De ``documentos``, los que ya juegan en otro equipo del torneo (una consulta)"""
+    documentos = [d for d in documentos if d]
+    if not documentos:
+        return {}
+    return dict(
+        Jugador.todos.filter(torneo=torneo, documento__in=documentos).values_list('documento', 'equipo__nombre')
+    )
@@ -0,0 +1,335 @@
+"""
+Historial de eventos de la llave y motor de reproducción.
+
+Cada acción sobre la llave (generarla, asignar equipos, anotar, corregir o
+deshacer un resultado) se guarda como ``EventoTorneo``. El estado de la llave
+es un diccionario simple::
+
+    {'partidos': {'<id>': {'ronda', 'local', 'visitante', 'ganador'}},
+     'campeon': <equipo_id o None>, 'llave_generada': bool, 'lugares_fijos': bool}
+
+que se obtiene reproduciendo los eventos desde la última ``FotoEventos``.
+
+El ganador pasa a un lugar fijo de la siguiente ronda: el partido ``i`` (en
+orden de id dentro de su ronda) alimenta al ``i // 2``, de local si ``i`` es
+par y de visitante si es impar, como la dibuja ``llave.py``. Las llaves
+generadas antes de eso (sin ``lugares_fijos``) siguen usando el primer hueco
+libre, para que su historial se reproduzca igual que cuando se anotó.
+Deshacer o corregir calcula el estado nuevo y lo vuelca a los ``Partido`` y al
+``Torneo`` de una sola vez (``proyectar``).
+"""
+
+import copy
+
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import auditoria, ciclo
+from .models import EventoTorneo, FotoEventos, Partido, Torneo, TorneoArchivado
+
+SIGUIENTE_RONDA = {
+    'octavos': 'cuartos',
+    'cuartos': 'semifinales',
+    'semifinales': 'final',
+    'final': None,
+}
+ORDEN_RONDAS = ['octavos', 'cuartos', 'semifinales', 'final']
+NOMBRES_RONDAS = {
+    'octavos': 'Octavos de final',
+    'cuartos': 'Cuartos de final',
+    'semifinales': 'Semifinales',
+    'final': 'Final',
+}
+CADA_FOTO = 20  # eventos entre una foto y la siguiente
+DESHACIBLES = ('ganador', 'correccion')
+
+
+def estado_vacio():
+    return {'partidos': {}, 'campeon': None, 'llave_generada': False, 'lugares_fijos': False}
+
+
+def lugar_fijo(ids_ronda, ids_siguiente, partido_id):
+    """(partido, lado) de la siguiente ronda al que pasa el ganador de ``partido_id``"""
+    posicion = ids_ronda.index(partido_id)
+    return ids_siguiente[posicion // 2], ('local', 'visitante')[posicion % 2]
+
+
+# ===== MOTOR (funciones puras sobre el diccionario de estado) =====
+
+def _partido(estado, partido_id):
+    try:
+        return estado['partidos'][str(partido_id)]
+    except KeyError:
+        raise ValueError(f"El partido {partido_id} no está en la llave")
+
+
+def _ganador(estado, datos):
+    """Igual que Torneo.avanzar_ganador: el ganador pasa a su lugar de la siguiente ronda"""
+    partido = _partido(estado, datos['partido'])
+    ganador = datos['ganador']
+    if partido['ganador'] is not None:
+        raise ValueError("Partido ya terminado")
+    if ganador not in (partido['local'], partido['visitante']):
+        raise ValueError("El ganador no juega este partido")
+
+    partido['ganador'] = ganador
+    siguiente = SIGUIENTE_RONDA.get(partido['ronda'])
+    if siguiente is None:
+        estado['campeon'] = ganador
+        return
+
+    def ids(ronda):
+        return sorted(int(pid) for pid, p in estado['partidos'].items() if p['ronda'] == ronda)
+
+    if estado.get('lugares_fijos'):
+        pid, lado = lugar_fijo(ids(partido['ronda']), ids(siguiente), int(datos['partido']))
+        destino = estado['partidos'][str(pid)]
+        if destino[lado] is not None:
+            raise ValueError("El lugar en la siguiente ronda ya está ocupado")
+        destino[lado] = ganador
+        return
+
+    # Llaves anteriores: primer hueco libre
+    for lado in ('local', 'visitante'):
+        for pid in ids(siguiente):
+            p = estado['partidos'][str(pid)]
+            if p[lado] is None:
+                p[lado] = ganador
+                return
+
+
+def _correccion(estado, datos):
+    """Cambia el ganador de un partido si el siguiente todavía no se jugó"""
+    partido = _partido(estado, datos['partido'])
+    nuevo = datos['ganador']
+    anterior = partido['ganador']
+    if anterior is None:
+        raise ValueError("El partido no tiene resultado que corregir")
+    if nuevo not in (partido['local'], partido['visitante']) or nuevo == anterior:
+        raise ValueError("Ganador no válido para la corrección")
+
+    partido['ganador'] = nuevo
+    siguiente = SIGUIENTE_RONDA.get(partido['ronda'])
+    if siguiente is None:
+        estado['campeon'] = nuevo
+        return
+
+    for p in estado['partidos'].values():
+        if p['ronda'] != siguiente:
+            continue
+        for lado in ('local', 'visitante'):
+            if p[lado] == anterior:
+                if p['ganador'] is not None:
+                    raise ValueError("El siguiente partido ya se jugó: deshaz primero ese resultado")
+                p[lado] = nuevo
+                return
+
+
+def aplicar(estado, tipo, datos):
+    """Aplica un evento al estado (lo modifica) y lo devuelve"""
+    if tipo == 'importado':
+        return copy.deepcopy(datos)
+
+    if tipo == 'llave_generada':
+        estado['partidos'] = {
+            str(pid): {'ronda': ronda, 'local': None, 'visitante': None, 'ganador': None}
+            for pid, ronda in datos['partidos']
+        }
+        estado['llave_generada'] = True
+        estado['lugares_fijos'] = datos.get('lugares_fijos', False)
+    elif tipo == 'equipos_asignados':
+        for pid, local, visitante in datos['cruces']:
+            partido = _partido(estado, pid)
+            partido['local'] = local
+            partido['visitante'] = visitante
+    elif tipo == 'ganador':
+        _ganador(estado, datos)
+    elif tipo == 'correccion':
+        _correccion(estado, datos)
+    # 'deshacer' no cambia nada aquí: anula otro evento y reproducir() lo salta
+    return estado
+
+
+def reproducir(eventos, estado=None):
+    """Reproduce ``[(numero, tipo, datos), ...]`` saltando los eventos anulados"""
+    estado = copy.deepcopy(estado) if estado is not None else estado_vacio()
+    eventos = list(eventos)
+    anulados = {datos['evento'] for _, tipo, datos in eventos if tipo == 'deshacer'}
+    for numero, tipo, datos in eventos:
+        if numero not in anulados:
+            estado = aplicar(estado, tipo, datos)
+    return estado
+
+
+def posiciones(estado):
+    """Tabla de partidos jugados/ganados y ronda alcanzada por equipo"""
+    tabla = {}
+    for partido in estado['partidos'].values():
+        for lado in ('local', 'visitante'):
+            equipo = partido[lado]
+            if equipo is None:
+                continue
+            fila = tabla.setdefault(equipo, {'equipo': equipo, 'jugados': 0, 'ganados': 0, 'ronda': partido['ronda']})
+            if ORDEN_RONDAS.index(partido['ronda']) > ORDEN_RONDAS.index(fila['ronda']):
+                fila['ronda'] = partido['ronda']
+            if partido['ganador'] is not None:
+                fila['jugados'] += 1
+                fila['ganados'] += partido['ganador'] == equipo
+
+    for fila in tabla.values():
+        fila['perdidos'] = fila['jugados'] - fila['ganados']
+        fila['campeon'] = fila['equipo'] == estado['campeon']
+
+    return sorted(
+        tabla.values(),
+        key=lambda f: (not f['campeon'], -ORDEN_RONDAS.index(f['ronda']), -f['ganados'], f['perdidos']),
+    )
+
+
+# ===== LECTURA Y ESCRITURA =====
+
+def estado_actual(torneo_id, hasta=None):
+    """Estado tras el evento ``hasta`` (o el último), partiendo de la foto más cercana"""
+    fotos = FotoEventos.objects.filter(torneo_id=torneo_id)
+    eventos = EventoTorneo.todos.filter(torneo_id=torneo_id)
+    if hasta is not None:
+        fotos = fotos.filter(numero__lte=hasta)
+        eventos = eventos.filter(numero__lte=hasta)
+
+    foto = fotos.order_by('-numero').values_list('numero', 'estado').first()
+    base, estado = foto if foto else (0, None)
+    eventos = eventos.filter(numero__gt=base).order_by('numero').values_list('numero', 'tipo', 'datos')
+    return reproducir(eventos, estado)
+
+
+def lugares_fijos(torneo_id):
+    """Si la llave vigente del torneo pasa los ganadores a lugares fijos"""
+    datos = EventoTorneo.todos.filter(
+        torneo_id=torneo_id, tipo__in=('llave_generada', 'importado')
+    ).order_by('-numero').values_list('datos', flat=True).first()
+    return bool(datos and datos.get('lugares_fijos'))
+
+
+def registrar(torneo, tipo, **datos):
+    """Agrega un evento al final del historial del torneo"""
+    for _ in range(3):
+        ultimo = EventoTorneo.todos.filter(torneo=torneo).aggregate(n=Max('numero'))['n'] or 0
+        try:
+            with transaction.atomic():
+                evento = EventoTorneo.objects.create(
+                    torneo=torneo, numero=ultimo + 1, tipo=tipo, datos=datos,
+                )
+            break
+        except IntegrityError:
+            # Otro proceso tomó el mismo número; se reintenta con el siguiente
+            continue
+    else:
+        raise ValueError("No se pudo registrar el evento, intenta de nuevo")
+
+    if evento.numero % CADA_FOTO == 0:
+        FotoEventos.objects.create(torneo=torneo, numero=evento.numero, estado=estado_actual(torneo.id))
+    return evento
+
+
+def proyectar(torneo, estado):
+    """Deja los Partido y el Torneo como dice el estado (solo escribe lo que cambió)"""
+    from . import prediccion
+
+    cambiados = []
+    for partido in Partido.todos.filter(torneo=torneo):
+        fila = estado['partidos'].get(str(partido.id))
+        if fila is None:
+            continue
+        nuevo = (fila['local'], fila['visitante'], fila['ganador'], fila['ganador'] is not None)
+        if nuevo != (partido.equipo_local_id, partido.equipo_visitante_id, partido.ganador_id, partido.terminado):
+            (partido.equipo_local_id, partido.equipo_visitante_id,
+             partido.ganador_id, partido.terminado) = nuevo
+            cambiados.append(partido)
+    Partido.todos.bulk_update(cambiados, ['equipo_local', 'equipo_visitante', 'ganador', 'terminado'])
+
+    # La llave reconstruida manda: deshacer la final vuelve el torneo a en curso
+    torneo.campeon_id = estado['campeon']
+    torneo.estado = ciclo.estado_de_llave(estado) or torneo.estado
+    Torneo.todos.filter(id=torneo.id).update(
+        campeon_id=torneo.campeon_id, estado=torneo.estado, actualizado=timezone.now()
+    )
+    prediccion.actualizar(torneo.id, estado)
+    return len(cambiados)
+
+
+def _no_podado(torneo):
+    if TorneoArchivado.todos.filter(torneo=torneo, podado=True).exists():
+        raise ValueError("El torneo ya fue archivado y podado: no se puede modificar")
+
+
+@transaction.atomic
+def deshacer(torneo, numero):
+    """Anula el evento ``numero`` (un resultado) y rehace la llave sin él"""
+    _no_podado(torneo)
+    evento = EventoTorneo.todos.filter(torneo=torneo, numero=numero).first()
+    if evento is None or evento.tipo not in DESHACIBLES:
+        raise ValueError("Solo se pueden deshacer resultados")
+    if EventoTorneo.todos.filter(torneo=torneo, tipo='deshacer', datos__evento=numero).exists():
+        raise ValueError("Ese resultado ya fue deshecho")
+
+    # Se valida reproduciendo todo sin el evento: si algo posterior dependía
+    # de él (el ganador ya jugó la siguiente ronda) falla aquí
+    eventos = list(
+        EventoTorneo.todos.filter(torneo=torneo).order_by('numero').values_list('numero', 'tipo', 'datos')
+    )
+    try:
+        antes = reproducir(eventos)
+        estado = reproducir(eventos + [(None, 'deshacer', {'evento': numero})])
+    except ValueError:
+        raise ValueError("Un resultado posterior depende de este: deshaz primero ese")
+
+    # Aunque la reproducción funcione, ningún partido ya jugado puede cambiar
+    # (ni sus equipos ni su ganador): solo el del resultado que se deshace
+    propio = str(evento.datos['partido'])
+    for pid, partido in antes['partidos'].items():
+        if pid != propio and partido['ganador'] is not None and estado['partidos'].get(pid) != partido:
+            raise ValueError("Un resultado posterior depende de este: deshaz primero ese")
+
+    era_final = torneo.campeon_id is not None and estado['campeon'] is None
+    # Las fotos posteriores al evento anulado ya no valen
+    FotoEventos.objects.filter(torneo=torneo, numero__gte=numero).delete()
+    registrar(torneo, 'deshacer', evento=numero)
+    proyectar(torneo, estado)
+    if era_final:
+        TorneoArchivado.todos.filter(torneo=torneo).delete()
+    return estado
+
+
+def deshacer_resultado(partido):
+    """Deshace el último resultado anotado (o corregido) de un partido"""
+    anulados = EventoTorneo.todos.filter(torneo_id=partido.torneo_id, tipo='deshacer').values_list('datos__evento', flat=True)
+    evento = EventoTorneo.todos.filter(
+        torneo_id=partido.torneo_id,
+        tipo__in=DESHACIBLES,
+        datos__partido=partido.id,
+    ).exclude(numero__in=list(anulados)).order_by('-numero').first()
+    if evento is None:
+        raise ValueError("Este partido no tiene resultado registrado")
+    deshacer(partido.torneo, evento.numero)
+    auditoria.registrar(
+        'resultado', f"Deshecho: {partido.equipo_local} vs {partido.equipo_visitante}",
+        torneo_id=partido.torneo_id, partido=partido.id, evento=evento.numero,
+    )
+    return f"↩️ Resultado deshecho: {partido.equipo_local} vs {partido.equipo_visitante}"
+
+
+@transaction.atomic
+def corregir_resultado(partido, equipo_ganador):
+    """Cambia el ganador de un partido ya terminado"""
+    torneo = partido.torneo
+    _no_podado(torneo)
+    datos = {'partido': partido.id, 'ganador': equipo_ganador.id}
+    estado = aplicar(estado_actual(torneo.id), 'correccion', datos)  # valida antes de guardar
+    registrar(torneo, 'correccion', **datos)
+    proyectar(torneo, estado)
+    auditoria.registrar(
+        'resultado', f"Corregido: {partido.equipo_local} vs {partido.equipo_visitante}",
+        torneo_id=torneo.id, partido=partido.id, ganador=equipo_ganador.id, ganador_nombre=equipo_ganador.nombre,
+    )
+    return f"✏️ Resultado corregido: ganó {equipo_ganador}"
@@ -1,15 +1,84 @@
+from decimal import Decimal
+
 from django import forms
+from django.db.models import Max
 from .models import Equipo, Jugador, Torneo
 
+MAX_JUGADORES = 12  # lugares del formulario si ninguna categoría pide más
+
 class EquipoForm(forms.ModelForm):
     class Meta:
         model = Equipo
         fields = ['torneo', 'nombre', 'capitan', 'telefono', 'email']
     
-    # Campos para 6 jugadores
-    jugador1 = forms.CharField(label='Jugador 1', max_length=100)
-    jugador2 = forms.CharField(label='Jugador 2', max_length=100)
-    jugador3 = forms.CharField(label='Jugador 3', max_length=100)
-    jugador4 = forms.CharField(label='Jugador 4', max_length=100)
-    jugador5 = forms.CharField(label='Jugador 5', max_length=100)
-    jugador6 = forms.CharField(label='Jugador 6', max_length=100, required=False)
\ No newline at end of file
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Solo torneos con la inscripción abierta
+        self.fields['torneo'].queryset = Torneo.objects.filter(estado='planificacion')
+        # Tantos lugares como admita la categoría más grande (el mínimo y el máximo los valida clean)
+        mayor = self.fields['torneo'].queryset.aggregate(m=Max('categoria__max_jugadores'))['m']
+        self.numeros = range(1, max(mayor or 0, MAX_JUGADORES) + 1)
+        # Nombre, edad, género y documento de cada jugador (para las reglas de la categoría)
+        for i in self.numeros:
+            self.fields[f'jugador{i}'] = forms.CharField(label=f'Jugador {i}', max_length=100, required=False)
+            self.fields[f'edad{i}'] = forms.IntegerField(label=f'Edad {i}', min_value=1, max_value=99, required=False)
+            self.fields[f'genero{i}'] = forms.ChoiceField(
+                label=f'Género {i}', choices=[('', '—')] + Jugador.GENEROS, required=False
+            )
+            self.fields[f'documento{i}'] = forms.CharField(label=f'Documento {i}', max_length=20, required=False)
+    
+    def jugadores(self):
+        """Los jugadores escritos en el formulario (ya validado)"""
+        return [
+            {
+                'nombre': self.cleaned_data[f'jugador{i}'],
+                'edad': self.cleaned_data.get(f'edad{i}') or 0,
+                'genero': self.cleaned_data.get(f'genero{i}', ''),
+                'documento': (self.cleaned_data.get(f'documento{i}') or '').strip(),
+            }
+            for i in self.numeros
+            if self.cleaned_data.get(f'jugador{i}')
+        ]
+    
+    def clean(self):
+        from .elegibilidad import documentos_inscritos, validar_plantel
+        
+        cleaned_data = super().clean()
+        torneo = cleaned_data.get('torneo')
+        if torneo is None or self.errors:
+            return cleaned_data
+        
+        jugadores = self.jugadores()
+        problemas = validar_plantel(torneo.categoria, jugadores)
+        
+        documentos = [j['documento'] for j in jugadores if j['documento']]
+        if len(documentos) != len(set(documentos)):
+            problemas.append('Hay documentos repetidos en el plantel')
+        for documento, equipo in documentos_inscritos(torneo, documentos).items():
+            problemas.append(f'El documento {documento} ya está inscrito en {equipo}')
+        
+        if problemas:
+            raise forms.ValidationError(problemas)
+        return cleaned_data
+
+
+class AbonoForm(forms.Form):
+    """Pago parcial de la inscripción"""
+    monto = forms.DecimalField(label='Monto', max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+    referencia = forms.CharField(label='Referencia', max_length=100, required=False)
+
+
+class ConciliacionForm(forms.Form):
+    """Extracto bancario en CSV (columnas: monto y referencia/email/nombre)"""
+    torneo = forms.ModelChoiceField(
+        label='Torneo',
+        queryset=Torneo.objects.none(),
+        required=False,
+        empty_label='Todos los torneos'
+    )
+    archivo = forms.FileField(label='Extracto (CSV)')
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # En cada petición: el manager filtra por la organización activa en ese momento
+        self.fields['torneo'].queryset = Torneo.objects.all()
@@ -0,0 +1,214 @@
+"""
+Llave (bracket) de un torneo armada en memoria a partir de una sola consulta.
+
+El árbol se arma así: el partido ``i`` de una ronda alimenta al partido
+``i // 2`` de la ronda siguiente (el mismo orden por id que usa
+``Torneo.avanzar_ganador``). El SVG/PNG resultante se guarda en caché con
+``Torneo.actualizado`` en la clave (la misma versión que el ETag, ver
+condicional.py): cualquier cambio en la llave toca el torneo y la clave nueva
+no depende de borrar nada, así que sirve aunque cada proceso tenga su caché.
+"""
+
+import io
+from xml.sax.saxutils import escape
+
+from django.core.cache import cache
+
+from .models import Partido
+
+ORDEN_RONDAS = ['octavos', 'cuartos', 'semifinales', 'final']
+NOMBRES_RONDAS = {
+    'octavos': 'Octavos de final',
+    'cuartos': 'Cuartos de final',
+    'semifinales': 'Semifinales',
+    'final': 'Final',
+}
+FORMATOS = ('svg', 'png')
+CACHE_SEGUNDOS = 60 * 60 * 24
+
+# Medidas del dibujo (en píxeles)
+ANCHO_CAJA = 190
+ALTO_CAJA = 56
+SEPARACION_X = 50
+SEPARACION_Y = 18
+MARGEN = 20
+ALTO_TITULO = 30
+
+
+def clave_cache(torneo, formato):
+    return f'llave:{torneo.id}:{torneo.actualizado:%Y%m%d%H%M%S%f}:{formato}'
+
+
+def construir_llave(torneo):
+    """Lista de rondas (de la primera a la final) con sus partidos en orden"""
+    partidos = Partido.objects.filter(torneo=torneo).select_related(
+        'equipo_local', 'equipo_visitante', 'ganador'
+    ).order_by('id')
+
+    por_ronda = {}
+    for partido in partidos:
+        por_ronda.setdefault(partido.ronda, []).append(partido)
+
+    return [
+        {'ronda': ronda, 'nombre': NOMBRES_RONDAS[ronda], 'partidos': por_ronda[ronda]}
+        for ronda in ORDEN_RONDAS
+        if ronda in por_ronda
+    ]
+
+
+def calcular_posiciones(rondas):
+    """Coordenadas (x, y) de cada partido; cada caja queda centrada entre sus dos hijos"""
+    posiciones = []
+    anteriores = None
+    for columna, ronda in enumerate(rondas):
+        x = MARGEN + columna * (ANCHO_CAJA + SEPARACION_X)
+        actuales = []
+        for i, partido in enumerate(ronda['partidos']):
+            if anteriores and 2 * i + 1 < len(anteriores):
+                y = (anteriores[2 * i][1] + anteriores[2 * i + 1][1]) / 2
+            else:
+                y = MARGEN + ALTO_TITULO + i * (ALTO_CAJA + SEPARACION_Y)
+            actuales.append((x, y, partido))
+        posiciones.append(actuales)
+        anteriores = actuales
+    return posiciones
+
+
+def tamano_dibujo(posiciones):
+    if not posiciones:
+        return 2 * MARGEN + ANCHO_CAJA, 2 * MARGEN + ALTO_TITULO
+    ancho = MARGEN * 2 + len(posiciones) * ANCHO_CAJA + (len(posiciones) - 1) * SEPARACION_X
+    # Margen doble abajo para el renglón del campeón
+    alto = max(y for columna in posiciones for _, y, _ in columna) + ALTO_CAJA + 2 * MARGEN
+    return int(ancho), int(alto)
+
+
+def conexiones(posiciones):
+    """Líneas en codo desde cada partido hasta el partido que alimenta"""
+    lineas = []
+    for columna, siguiente in zip(posiciones, posiciones[1:]):
+        for i, (x, y, _) in enumerate(columna):
+            if i // 2 >= len(siguiente):
+                continue
+            xs, ys, _ = siguiente[i // 2]
+            x1, y1 = x + ANCHO_CAJA, y + ALTO_CAJA / 2
+            x2, y2 = xs, ys + ALTO_CAJA / 2
+            medio = x1 + SEPARACION_X / 2
+            lineas.append([(x1, y1), (medio, y1), (medio, y2), (x2, y2)])
+    return lineas
+
+
+def _equipos(partido):
+    """Los dos renglones de la caja: (texto, ganó)"""
+    filas = []
+    for equipo in (partido.equipo_local, partido.equipo_visitante):
+        nombre = str(equipo) if equipo else 'Por definir'
+        gano = bool(equipo and partido.ganador_id == equipo.id)
+        filas.append((nombre[:24], gano))
+    return filas
+
+
+def render_svg(torneo, rondas):
+    posiciones = calcular_posiciones(rondas)
+    ancho, alto = tamano_dibujo(posiciones)
+
+    partes = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {ancho} {alto}" '
+        f'width="{ancho}" height="{alto}" font-family="Segoe UI, system-ui, sans-serif">',
+        f'<rect width="{ancho}" height="{alto}" fill="#ffffff"/>',
+    ]
+
+    for ronda, columna in zip(rondas, posiciones):
+        x = columna[0][0]
+        partes.append(
+            f'<text x="{x + ANCHO_CAJA / 2}" y="{MARGEN + 14}" text-anchor="middle" '
+            f'font-size="14" font-weight="600" fill="#2c5282">{escape(ronda["nombre"])}</text>'
+        )
+
+    for linea in conexiones(posiciones):
+        puntos = ' '.join(f'{x},{y}' for x, y in linea)
+        partes.append(f'<polyline points="{puntos}" fill="none" stroke="#a0aec0" stroke-width="2"/>')
+
+    for columna in posiciones:
+        for x, y, partido in columna:
+            borde = '#38a169' if partido.terminado else '#4299e1'
+            partes.append(
+                f'<rect x="{x}" y="{y}" width="{ANCHO_CAJA}" height="{ALTO_CAJA}" rx="8" '
+                f'fill="#ebf8ff" stroke="{borde}" stroke-width="2"/>'
+            )
+            partes.append(
+                f'<line x1="{x}" y1="{y + ALTO_CAJA / 2}" x2="{x + ANCHO_CAJA}" y2="{y + ALTO_CAJA / 2}" stroke="#cbd5e0"/>'
+            )
+            for fila, (nombre, gano) in enumerate(_equipos(partido)):
+                peso = '700' if gano else '400'
+                color = '#22543d' if gano else '#2d3748'
+                marca = ' 🏆' if gano else ''
+                partes.append(
+                    f'<text x="{x + 10}" y="{y + 19 + fila * ALTO_CAJA / 2}" font-size="13" '
+                    f'font-weight="{peso}" fill="{color}">{escape(nombre)}{marca}</text>'
+                )
+
+    if torneo.campeon_id:
+        partes.append(
+            f'<text x="{ancho - MARGEN}" y="{alto - 6}" text-anchor="end" font-size="12" fill="#2c5282">'
+            f'Campeón: {escape(str(torneo.campeon))}</text>'
+        )
+
+    partes.append('</svg>')
+    return '\n'.join(partes)
+
+
+def render_png(torneo, rondas):
+    """PNG de la llave; necesita Pillow (devuelve None si no está instalado)"""
+    try:
+        from PIL import Image, ImageDraw, ImageFont
+    except ImportError:
+        return None
+
+    posiciones = calcular_posiciones(rondas)
+    ancho, alto = tamano_dibujo(posiciones)
+    imagen = Image.new('RGB', (ancho, alto), '#ffffff')
+    dibujo = ImageDraw.Draw(imagen)
+    try:
+        # La fuente por defecto de Pillow no trae tildes ni eñes
+        dibujo.font = ImageFont.truetype('DejaVuSans.ttf', 13)
+    except OSError:
+        pass
+
+    for ronda, columna in zip(rondas, posiciones):
+        dibujo.text((columna[0][0] + 10, MARGEN), ronda['nombre'], fill='#2c5282')
+
+    for linea in conexiones(posiciones):
+        dibujo.line(linea, fill='#a0aec0', width=2)
+
+    for columna in posiciones:
+        for x, y, partido in columna:
+            borde = '#38a169' if partido.terminado else '#4299e1'
+            dibujo.rounded_rectangle(
+                [x, y, x + ANCHO_CAJA, y + ALTO_CAJA], radius=8, fill='#ebf8ff', outline=borde, width=2
+            )
+            dibujo.line([x, y + ALTO_CAJA / 2, x + ANCHO_CAJA, y + ALTO_CAJA / 2], fill='#cbd5e0')
+            for fila, (nombre, gano) in enumerate(_equipos(partido)):
+                texto = f'{nombre} *' if gano else nombre
+                dibujo.text(
+                    (x + 10, y + 8 + fila * ALTO_CAJA / 2), texto, fill='#22543d' if gano else '#2d3748'
+                )
+
+    if torneo.campeon_id:
+        dibujo.text((MARGEN, alto - MARGEN), f'Campeón: {torneo.campeon}', fill='#2c5282')
+
+    salida = io.BytesIO()
+    imagen.save(salida, format='PNG', optimize=True)
+    return salida.getvalue()
+
+
+def llave_renderizada(torneo, formato='svg'):
+    """SVG (str) o PNG (bytes) de la llave, desde la caché si está disponible"""
+    clave = clave_cache(torneo, formato)
+    contenido = cache.get(clave)
+    if contenido is None:
+        rondas = construir_llave(torneo)
+        contenido = render_png(torneo, rondas) if formato == 'png' else render_svg(torneo, rondas)
+        if contenido is not None:
+            cache.set(clave, contenido, CACHE_SEGUNDOS)
+    return contenido
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from torneos.archivo import archivar_torneo
+from torneos.models import Torneo
+
+
+class Command(BaseCommand):
+    help = 'Archiva los torneos finalizados y opcionalmente poda sus equipos, jugadores y partidos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--torneo', type=int, action='append', help='ID del torneo (se puede repetir)')
+        parser.add_argument(
+            '--podar',
+            action='store_true',
+            help='Borra equipos, jugadores y partidos de las tablas en uso después de archivar',
+        )
+
+    def handle(self, *args, **options):
+        torneos = Torneo.objects.filter(estado='finalizado').select_related('categoria', 'campeon')
+        if options['torneo']:
+            torneos = torneos.filter(id__in=options['torneo'])
+
+        total = 0
+        for torneo in torneos:
+            archivo = archivar_torneo(torneo, podar=options['podar'])
+            total += 1
+            estado = 'podado' if archivo.podado else 'archivado'
+            self.stdout.write(f'  {torneo.nombre}: {estado} ({len(archivo.datos)} bytes)')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {total} torneos archivados'))
@@ -0,0 +1,84 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from torneos import tareas
+
+CADA_LIBERAR = 60  # segundos entre búsquedas de tareas de workers caídos (y latidos de las propias)
+
+
+def _ejecutar_en_proceso(tarea_id):
+    """Punto de entrada en un proceso hijo (Django ya configurado por el padre)"""
+    import django
+    django.setup()
+    from torneos.tareas import ejecutar
+    ejecutar(tarea_id)
+
+
+class Command(BaseCommand):
+    help = 'Worker de la cola de tareas: reclama las tareas pendientes y las ejecuta'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=2, help='Tareas en paralelo (por defecto 2)')
+        parser.add_argument(
+            '--procesos',
+            action='store_true',
+            help='Usa un pool de procesos en vez de hilos (para trabajo pesado de CPU)',
+        )
+        parser.add_argument('--intervalo', type=float, default=2.0, help='Segundos entre consultas a la cola')
+        parser.add_argument('--una-vez', action='store_true', help='Procesa lo pendiente y termina')
+
+    def handle(self, *args, **options):
+        hilos = max(1, options['hilos'])
+        if options['procesos']:
+            # Los hijos no deben heredar la conexión abierta del padre
+            connections.close_all()
+            executor = ProcessPoolExecutor(max_workers=hilos)
+            funcion = _ejecutar_en_proceso
+        else:
+            executor = ThreadPoolExecutor(max_workers=hilos)
+            funcion = tareas.ejecutar
+
+        self.stdout.write(f'🔧 Worker iniciado con {hilos} {"procesos" if options["procesos"] else "hilos"}')
+        total = 0
+        en_curso = set()
+        tarea_de = {}  # futuro -> id de la tarea, para latir por las que siguen en curso
+        proxima_liberacion = 0
+        try:
+            with executor:
+                while True:
+                    # Otro worker pudo morir con tareas tomadas: se revisa cada tanto, no solo al iniciar
+                    if time.monotonic() >= proxima_liberacion:
+                        tareas.latir(tarea_de[futuro] for futuro in en_curso)
+                        liberadas = tareas.liberar_atascadas()
+                        if liberadas:
+                            self.stdout.write(f'  {liberadas} tareas atascadas liberadas')
+                        proxima_liberacion = time.monotonic() + CADA_LIBERAR
+
+                    # Cada lugar que se libera se llena enseguida: una tarea lenta no frena a las demás
+                    libres = hilos - len(en_curso)
+                    ids = tareas.reclamar(libres) if libres else []
+                    for tarea_id in ids:
+                        futuro = executor.submit(funcion, tarea_id)
+                        tarea_de[futuro] = tarea_id
+                        en_curso.add(futuro)
+
+                    if not en_curso:
+                        if options['una_vez']:
+                            break
+                        time.sleep(options['intervalo'])
+                        continue
+
+                    # Vuelve apenas termina una (o al intervalo, para ver si llegaron tareas nuevas)
+                    listas, en_curso = wait(en_curso, timeout=options['intervalo'], return_when=FIRST_COMPLETED)
+                    total += len(listas)
+                    for futuro in listas:
+                        del tarea_de[futuro]
+                    if listas:
+                        self.stdout.write(f'  {len(listas)} tareas procesadas')
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {total} tareas procesadas'))
@@ -0,0 +1,98 @@
+import json
+import shutil
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import get_internal_wsgi_application
+from django.db import connections
+from django.test.utils import override_settings, setup_databases, teardown_databases
+
+from torneos import carga
+
+USUARIO = 'carga'
+CLAVE = 'carga-prueba'
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga: usuarios simulados (espectadores, tesoreros, árbitros) contra la '
+        'aplicación WSGI, sobre una base de prueba temporal. Informa peticiones por segundo y '
+        'latencias p50/p95/p99 por ruta en JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--espectadores', type=int, default=6, help='Usuarios anónimos que miran llaves e historial')
+        parser.add_argument('--tesoreros', type=int, default=2, help='Staff que revisa equipos y marca pagos')
+        parser.add_argument('--arbitros', type=int, default=2, help='Staff que anota resultados en el admin')
+        parser.add_argument('--duracion', type=float, default=30, help='Segundos medidos (por defecto 30)')
+        parser.add_argument('--calentamiento', type=float, default=3, help='Segundos iniciales que no se cuentan')
+        parser.add_argument('--pausa', type=float, default=0, help='Pausa media entre visitas de cada usuario (segundos)')
+        parser.add_argument('--torneos', type=int, default=4, help='Torneos de prueba que se crean')
+        parser.add_argument('--equipos', type=int, choices=[4, 8, 16], default=16, help='Equipos por torneo')
+        parser.add_argument('--semilla', type=int, default=1, help='Semilla para repetir la misma secuencia')
+        parser.add_argument('--host', default='localhost', help='Cabecera Host de las peticiones')
+        parser.add_argument('--salida', help='Además de mostrarlo, guarda el informe JSON en este archivo')
+
+    def handle(self, *args, **options):
+        usuarios = {
+            'espectador': options['espectadores'],
+            'tesorero': options['tesoreros'],
+            'arbitro': options['arbitros'],
+        }
+        if sum(usuarios.values()) < 1 or min(usuarios.values()) < 0:
+            raise CommandError('Hace falta al menos un usuario simulado')
+        if options['duracion'] <= 0:
+            raise CommandError('La duración tiene que ser mayor que 0')
+
+        # SQLite en memoria no se comparte bien entre hilos: la base de prueba va a un archivo
+        directorio = tempfile.mkdtemp(prefix='prueba_carga_')
+        for conexion in connections.all():
+            if conexion.vendor == 'sqlite' and not conexion.settings_dict['TEST'].get('NAME'):
+                conexion.settings_dict['TEST']['NAME'] = f'{directorio}/{conexion.alias}.sqlite3'
+
+        # Como en producción (sin DEBUG ni registro de consultas) y sin enviar correos de verdad
+        ajustes = override_settings(
+            DEBUG=False,
+            ALLOWED_HOSTS=[options['host']],
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+        )
+        ajustes.enable()
+        bases = setup_databases(verbosity=0, interactive=False)
+        try:
+            self.stderr.write('🏐 Preparando torneos de prueba...')
+            datos = carga.preparar(USUARIO, CLAVE, torneos=options['torneos'], equipos=options['equipos'])
+            self.stderr.write(
+                f'⏱️ {sum(usuarios.values())} usuarios durante {options["duracion"]:g} s '
+                f'(+{options["calentamiento"]:g} s de calentamiento)'
+            )
+            informe = carga.ejecutar(
+                get_internal_wsgi_application(),
+                options['host'],
+                usuarios,
+                datos,
+                (USUARIO, CLAVE),
+                duracion=options['duracion'],
+                calentamiento=options['calentamiento'],
+                pausa=options['pausa'],
+                semilla=options['semilla'],
+            )
+        finally:
+            connections.close_all()
+            teardown_databases(bases, verbosity=0)
+            ajustes.disable()
+            shutil.rmtree(directorio, ignore_errors=True)
+
+        texto = json.dumps(informe, indent=2, ensure_ascii=False)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(texto)
+        self.stdout.write(texto)
+
+        total = informe['total']
+        if total['peticiones']:
+            self.stderr.write(self.style.SUCCESS(
+                f'✅ {total["peticiones"]} peticiones, {total["rps"]} por segundo, '
+                f'p95 {total["p95_ms"]} ms, {total["errores"]} errores'
+            ))
+        for fallo in informe['fallos_usuarios']:
+            self.stderr.write(self.style.ERROR(f'❌ {fallo}'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from torneos.busqueda import reconstruir_indice
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda de equipos y jugadores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help='Equipos por lote')
+
+    def handle(self, *args, **options):
+        total = reconstruir_indice(tamano_lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f'✅ {total} equipos indexados'))
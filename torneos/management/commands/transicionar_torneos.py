@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from torneos.ciclo import ESTADOS, MASIVAS, TRANSICIONES, transicionar
+from torneos.models import Torneo
+
+
+class Command(BaseCommand):
+    help = 'Cambia el estado de muchos torneos a la vez (p. ej. cerrar la inscripción a fin de mes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('accion', choices=MASIVAS)
+        parser.add_argument('--categoria', type=int, action='append', help='ID de la categoría (se puede repetir)')
+        parser.add_argument('--torneo', type=int, action='append', help='ID del torneo (se puede repetir)')
+        parser.add_argument('--inicio-hasta', help='Solo torneos que empiezan hasta esta fecha (AAAA-MM-DD)')
+        parser.add_argument('--simular', action='store_true', help='Solo cuenta los torneos, no cambia nada')
+
+    def handle(self, *args, **options):
+        torneos = Torneo.objects.all()
+        if options['categoria']:
+            torneos = torneos.filter(categoria_id__in=options['categoria'])
+        if options['torneo']:
+            torneos = torneos.filter(id__in=options['torneo'])
+        if options['inicio_hasta']:
+            fecha = parse_date(options['inicio_hasta'])
+            if fecha is None:
+                raise CommandError('Fecha no válida, usa AAAA-MM-DD')
+            torneos = torneos.filter(fecha_inicio__lte=fecha)
+
+        origen, destino, descripcion = TRANSICIONES[options['accion']]
+        if options['simular']:
+            total = torneos.filter(estado__in=origen).count()
+            self.stdout.write(f'🔎 Se podría {descripcion} en {total} torneos')
+            return
+
+        total = transicionar(torneos, options['accion'])
+        self.stdout.write(self.style.SUCCESS(f'✅ {total} torneos pasaron a "{dict(ESTADOS)[destino]}"'))
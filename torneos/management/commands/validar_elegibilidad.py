@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from torneos.elegibilidad import validar_torneos
+from torneos.models import Torneo
+
+
+class Command(BaseCommand):
+    help = 'Revisa edad, plantel, género y jugadores repetidos de todos los torneos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--torneo', type=int, action='append', help='ID del torneo (se puede repetir)')
+
+    def handle(self, *args, **options):
+        torneos = None
+        if options['torneo']:
+            torneos = Torneo.objects.filter(id__in=options['torneo'])
+
+        inicio = time.perf_counter()
+        problemas = validar_torneos(torneos)
+        segundos = time.perf_counter() - inicio
+
+        for problema in problemas:
+            self.stdout.write(f'  [{problema.tipo}] {problema.mensaje}')
+
+        if problemas:
+            self.stdout.write(self.style.WARNING(f'⚠️ {len(problemas)} problemas ({segundos:.2f} s)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ Sin problemas ({segundos:.2f} s)'))
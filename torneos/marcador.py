@@ -0,0 +1,139 @@
+"""
+Marcador sin conexión: el navegador guarda los resultados y los manda por lotes.
+
+Cada resultado trae un ``id`` generado en el dispositivo. Si ya lo recibimos
+se devuelve la misma respuesta sin volver a aplicarlo, así reenviar un lote
+(porque se cortó la conexión a mitad) nunca anota dos veces.
+"""
+
+import json
+import zlib
+
+from django.db import IntegrityError, transaction
+from django.utils.dateparse import parse_datetime
+
+from .models import Equipo, Partido, PartidoTerminado, ResultadoMarcador
+
+MAX_LOTE = 200
+MAX_BYTES = 1024 * 1024  # tamaño máximo del lote ya descomprimido
+
+
+def leer_lote(request):
+    """Lista de resultados del cuerpo JSON (acepta Content-Encoding: gzip)"""
+    cuerpo = request.body
+    if request.headers.get('Content-Encoding') == 'gzip':
+        descompresor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            cuerpo = descompresor.decompress(cuerpo, MAX_BYTES)
+        except zlib.error:
+            raise ValueError("Lote comprimido no válido")
+        if descompresor.unconsumed_tail:
+            raise ValueError("Lote demasiado grande")
+
+    try:
+        resultados = json.loads(cuerpo).get('resultados')
+    except (ValueError, AttributeError):
+        raise ValueError("JSON no válido")
+
+    if not isinstance(resultados, list) or len(resultados) > MAX_LOTE:
+        raise ValueError(f"Se esperaba una lista 'resultados' de hasta {MAX_LOTE} elementos")
+
+    for resultado in resultados:
+        if not isinstance(resultado, dict) or not {'id', 'partido', 'ganador'} <= resultado.keys():
+            raise ValueError("Cada resultado necesita id, partido y ganador")
+    return resultados
+
+
+def _respuesta(registro, duplicado=False):
+    return {
+        'id': registro.cliente_id,
+        'estado': registro.estado,
+        'mensaje': registro.mensaje,
+        'duplicado': duplicado,
+    }
+
+
+def _aplicar(partido, ganador_id):
+    """Anota el resultado; el conflicto lo decide el UPDATE condicional de avanzar_ganador"""
+    if partido is None:
+        return 'error', '❌ El partido no existe'
+
+    if ganador_id not in (partido.equipo_local_id, partido.equipo_visitante_id):
+        return 'conflicto', '⚠️ Ese equipo ya no juega este partido (la llave cambió)'
+
+    equipo = Equipo.todos.get(id=ganador_id)
+    try:
+        return 'aplicado', partido.torneo.avanzar_ganador(partido, equipo)
+    except PartidoTerminado:
+        # Otro lo anotó antes (quizá entre que leímos el partido y ahora): se mira qué quedó
+        anotado = Partido.todos.select_related('ganador').get(id=partido.id).ganador
+        if anotado is not None and anotado.id == ganador_id:
+            return 'aplicado', '✅ Ya estaba registrado'
+        return 'conflicto', f'⚠️ Ya se registró como ganador a {anotado}'
+
+
+def aplicar_lote(resultados, usuario=None):
+    """Aplica los resultados en el orden en que se anotaron; devuelve uno por cada uno"""
+    ids = [str(r['id'])[:64] for r in resultados]
+    previos = {r.cliente_id: r for r in ResultadoMarcador.todos.filter(cliente_id__in=ids)}
+
+    respuesta = []
+    for cliente_id, resultado in zip(ids, resultados):
+        if cliente_id in previos:
+            respuesta.append(_respuesta(previos[cliente_id], duplicado=True))
+            continue
+
+        try:
+            partido_id = int(resultado['partido'])
+            ganador_id = int(resultado['ganador'])
+            anotado = parse_datetime(str(resultado.get('anotado') or ''))
+        except (TypeError, ValueError):
+            respuesta.append({'id': cliente_id, 'estado': 'error', 'mensaje': '❌ Datos no válidos', 'duplicado': False})
+            continue
+
+        try:
+            with transaction.atomic():
+                # Se lee en cada vuelta: un resultado anterior del lote pudo llenar este partido
+                partido = Partido.objects.select_related('torneo', 'ganador').filter(id=partido_id).first()
+                try:
+                    estado, mensaje = _aplicar(partido, ganador_id)
+                except ValueError as e:
+                    estado, mensaje = 'error', f'❌ {e}'
+                registro = ResultadoMarcador.objects.create(
+                    cliente_id=cliente_id,
+                    partido=partido,
+                    ganador_id_enviado=ganador_id,
+                    estado=estado,
+                    mensaje=mensaje[:200],
+                    anotado=anotado,
+                    usuario=usuario,
+                )
+        except IntegrityError:
+            # Llegó el mismo id por otra petición al mismo tiempo
+            registro = ResultadoMarcador.todos.get(cliente_id=cliente_id)
+            respuesta.append(_respuesta(registro, duplicado=True))
+            continue
+
+        previos[cliente_id] = registro
+        respuesta.append(_respuesta(registro))
+    return respuesta
+
+
+def partidos_pendientes():
+    """Partidos listos para jugarse, para que el marcador los guarde sin conexión"""
+    partidos = Partido.objects.filter(
+        terminado=False,
+        equipo_local__isnull=False,
+        equipo_visitante__isnull=False,
+    ).select_related('torneo', 'equipo_local', 'equipo_visitante').order_by('torneo_id', 'id')
+
+    return [
+        {
+            'id': p.id,
+            'torneo': p.torneo.nombre,
+            'ronda': p.get_ronda_display(),
+            'local': {'id': p.equipo_local_id, 'nombre': p.equipo_local.nombre},
+            'visitante': {'id': p.equipo_visitante_id, 'nombre': p.equipo_visitante.nombre},
+        }
+        for p in partidos
+    ]
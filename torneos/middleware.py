@@ -0,0 +1,66 @@
+from .models import Organizacion
+from .organizaciones import NINGUNA, activar, desactivar
+
+CLAVE_SESION = 'organizacion'
+
+
+class OrganizacionMiddleware:
+    """Activa la organización de la petición para que los managers filtren por ella.
+
+    Se elige con ``?org=<slug>`` y queda guardada en la sesión junto con el
+    usuario que la eligió. Si no hay una elegida, los usuarios usan la primera
+    organización de la que son miembros y los anónimos la única que haya.
+    Si no corresponde ninguna se activa ``NINGUNA`` (no ven datos de nadie);
+    solo un superusuario sin organizaciones creadas ve todo sin filtro.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.organizacion_id = self.resolver(request)
+        token = activar(request.organizacion_id)
+        try:
+            return self.get_response(request)
+        finally:
+            desactivar(token)
+
+    def resolver(self, request):
+        usuario = request.user if request.user.is_authenticated else None
+        usuario_id = usuario.pk if usuario else None
+
+        slug = request.GET.get('org')
+        if slug:
+            organizacion_id = self.permitidas(usuario).filter(slug=slug).values_list('id', flat=True).first()
+            if organizacion_id:
+                return self.guardar(request, organizacion_id, usuario_id)
+
+        # La elección guardada solo vale para quien la hizo (p. ej. no tras iniciar sesión)
+        guardada = request.session.get(CLAVE_SESION)
+        if guardada and guardada['usuario'] == usuario_id and guardada['id']:
+            # Si al usuario lo sacaron de la organización, la elección ya no vale
+            if usuario is None or usuario.is_superuser or self.permitidas(usuario).filter(id=guardada['id']).exists():
+                return guardada['id']
+
+        if usuario is None:
+            # Sin organizaciones no hay nada que aislar (instalación de un solo club)
+            unicas = list(Organizacion.objects.values_list('id', flat=True)[:2])
+            if not unicas:
+                return None
+            return unicas[0] if len(unicas) == 1 else NINGUNA
+
+        organizacion_id = self.permitidas(usuario).values_list('id', flat=True).order_by('id').first()
+        if organizacion_id is None:
+            # Sin organización: falla cerrado (salvo superusuarios si aún no hay ninguna)
+            return None if usuario.is_superuser else NINGUNA
+        return self.guardar(request, organizacion_id, usuario_id)
+
+    def permitidas(self, usuario):
+        organizaciones = Organizacion.objects.all()
+        if usuario is not None and not usuario.is_superuser:
+            organizaciones = organizaciones.filter(miembros=usuario)
+        return organizaciones
+
+    def guardar(self, request, organizacion_id, usuario_id):
+        request.session[CLAVE_SESION] = {'id': organizacion_id, 'usuario': usuario_id}
+        return organizacion_id
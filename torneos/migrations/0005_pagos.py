@@ -0,0 +1,54 @@
+# Generated by Django 4.2.25 on 2026-10-19 11:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import OuterRef, Subquery
+
+
+def equipos_pagados_con_monto(apps, schema_editor):
+    """Los equipos ya marcados como pagados pagaron la inscripción completa"""
+    Equipo = apps.get_model('torneos', 'Equipo')
+    Torneo = apps.get_model('torneos', 'Torneo')
+    precio = Torneo.objects.filter(id=OuterRef('torneo_id')).values('precio_inscripcion')[:1]
+    Equipo.objects.filter(pago_confirmado=True).update(monto_pagado=Subquery(precio))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torneos', '0004_alter_partido_equipo_local_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipo',
+            name='monto_pagado',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.CreateModel(
+            name='Pago',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('monto', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+                ('referencia', models.CharField(blank=True, max_length=100)),
+                ('origen', models.CharField(choices=[('manual', 'Manual'), ('banco', 'Extracto bancario')], default='manual', max_length=20)),
+                ('equipo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='torneos.equipo')),
+            ],
+            options={
+                'ordering': ['-fecha'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LibroPagos',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('equipos_total', models.PositiveIntegerField(default=0)),
+                ('equipos_pagados', models.PositiveIntegerField(default=0)),
+                ('monto_recaudado', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('torneo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='libro_pagos', to='torneos.torneo')),
+            ],
+        ),
+        migrations.RunPython(equipos_pagados_con_monto, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from torneos.utils import normalizar
+
+FTS_SQLITE = [
+    """CREATE VIRTUAL TABLE torneos_busqueda_fts USING fts5(
+        nombre, capitan, email, jugadores,
+        content='torneos_indicebusqueda', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER torneos_busqueda_ai AFTER INSERT ON torneos_indicebusqueda BEGIN
+        INSERT INTO torneos_busqueda_fts(rowid, nombre, capitan, email, jugadores)
+        VALUES (new.id, new.nombre, new.capitan, new.email, new.jugadores);
+    END""",
+    """CREATE TRIGGER torneos_busqueda_ad AFTER DELETE ON torneos_indicebusqueda BEGIN
+        INSERT INTO torneos_busqueda_fts(torneos_busqueda_fts, rowid, nombre, capitan, email, jugadores)
+        VALUES ('delete', old.id, old.nombre, old.capitan, old.email, old.jugadores);
+    END""",
+    """CREATE TRIGGER torneos_busqueda_au AFTER UPDATE ON torneos_indicebusqueda BEGIN
+        INSERT INTO torneos_busqueda_fts(torneos_busqueda_fts, rowid, nombre, capitan, email, jugadores)
+        VALUES ('delete', old.id, old.nombre, old.capitan, old.email, old.jugadores);
+        INSERT INTO torneos_busqueda_fts(rowid, nombre, capitan, email, jugadores)
+        VALUES (new.id, new.nombre, new.capitan, new.email, new.jugadores);
+    END""",
+]
+
+BORRAR_FTS_SQLITE = [
+    "DROP TRIGGER IF EXISTS torneos_busqueda_au",
+    "DROP TRIGGER IF EXISTS torneos_busqueda_ad",
+    "DROP TRIGGER IF EXISTS torneos_busqueda_ai",
+    "DROP TABLE IF EXISTS torneos_busqueda_fts",
+]
+
+# Debe coincidir con VECTOR_POSTGRES de torneos/busqueda.py para que se use el índice
+GIN_POSTGRES = """CREATE INDEX torneos_busqueda_gin ON torneos_indicebusqueda USING GIN (
+    to_tsvector('simple', nombre || ' ' || capitan || ' ' || email || ' ' || jugadores)
+)"""
+
+
+def crear_indice_texto(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for sql in FTS_SQLITE:
+            schema_editor.execute(sql)
+    elif vendor == 'postgresql':
+        schema_editor.execute(GIN_POSTGRES)
+
+    # Llenar el índice con los equipos que ya existen
+    Equipo = apps.get_model('torneos', 'Equipo')
+    IndiceBusqueda = apps.get_model('torneos', 'IndiceBusqueda')
+    IndiceBusqueda.objects.bulk_create([
+        IndiceBusqueda(
+            equipo_id=equipo.id,
+            torneo_id=equipo.torneo_id,
+            nombre=normalizar(equipo.nombre),
+            capitan=normalizar(equipo.capitan),
+            email=equipo.email.lower(),
+            jugadores=' '.join(normalizar(j.nombre) for j in equipo.jugador_set.all()),
+        )
+        for equipo in Equipo.objects.prefetch_related('jugador_set')
+    ])
+
+
+def borrar_indice_texto(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for sql in BORRAR_FTS_SQLITE:
+            schema_editor.execute(sql)
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS torneos_busqueda_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torneos', '0005_pagos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndiceBusqueda',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('capitan', models.CharField(max_length=100)),
+                ('email', models.CharField(max_length=254)),
+                ('jugadores', models.TextField(blank=True)),
+                ('equipo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='indice_busqueda', to='torneos.equipo')),
+                ('torneo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='torneos.torneo')),
+            ],
+        ),
+        migrations.RunPython(crear_indice_texto, borrar_indice_texto),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torneos', '0006_busqueda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TorneoArchivado',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('categoria', models.CharField(max_length=50)),
+                ('fecha_inicio', models.DateField()),
+                ('fecha_fin', models.DateField(db_index=True)),
+                ('precio_inscripcion', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('campeon', models.CharField(blank=True, max_length=100)),
+                ('datos', models.BinaryField()),
+                ('podado', models.BooleanField(default=False)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('torneo', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archivo', to='torneos.torneo')),
+            ],
+            options={
+                'ordering': ['-fecha_fin'],
+            },
+        ),
+    ]
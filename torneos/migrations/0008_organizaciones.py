@@ -0,0 +1,98 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def organizacion_inicial(apps, schema_editor):
+    """Los datos que ya existen pasan a una organización por defecto"""
+    Organizacion = apps.get_model('torneos', 'Organizacion')
+    Torneo = apps.get_model('torneos', 'Torneo')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+
+    if not Torneo.objects.exists():
+        return
+
+    organizacion = Organizacion.objects.create(nombre='Liga principal', slug='liga-principal')
+    organizacion.miembros.set(User.objects.all())
+    for nombre in ['Categoria', 'Torneo', 'Equipo', 'Partido', 'TorneoArchivado']:
+        apps.get_model('torneos', nombre).objects.update(organizacion=organizacion)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('torneos', '0007_archivo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Organizacion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('slug', models.SlugField(unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='organizacion',
+            name='miembros',
+            field=models.ManyToManyField(blank=True, related_name='organizaciones', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='categoria',
+            name='organizacion',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='torneos.organizacion'),
+        ),
+        migrations.AddField(
+            model_name='equipo',
+            name='organizacion',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='torneos.organizacion'),
+        ),
+        migrations.AddField(
+            model_name='partido',
+            name='organizacion',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='torneos.organizacion'),
+        ),
+        migrations.AddField(
+            model_name='torneo',
+            name='organizacion',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='torneos.organizacion'),
+        ),
+        migrations.AddField(
+            model_name='torneoarchivado',
+            name='organizacion',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='torneos.organizacion'),
+        ),
+        migrations.RunPython(organizacion_inicial, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='categoria',
+            index=models.Index(fields=['organizacion', 'nombre'], name='categoria_org_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipo',
+            index=models.Index(fields=['organizacion', 'pago_confirmado'], name='equipo_org_pago_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipo',
+            index=models.Index(fields=['organizacion', 'torneo'], name='equipo_org_torneo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='partido',
+            index=models.Index(fields=['organizacion', 'fecha', 'hora'], name='partido_org_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='torneo',
+            index=models.Index(fields=['organizacion', 'estado', 'fecha_fin'], name='torneo_org_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='torneo',
+            index=models.Index(fields=['organizacion', 'fecha_inicio'], name='torneo_org_inicio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='torneoarchivado',
+            index=models.Index(fields=['organizacion', 'fecha_fin'], name='archivo_org_fecha_idx'),
+        ),
+    ]
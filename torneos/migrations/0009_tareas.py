@@ -0,0 +1,39 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torneos', '0008_organizaciones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tarea',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50)),
+                ('argumentos', models.JSONField(blank=True, default=dict)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('completada', 'Completada'), ('fallida', 'Fallida')], default='pendiente', max_length=20)),
+                ('intentos', models.PositiveIntegerField(default=0)),
+                ('max_intentos', models.PositiveIntegerField(default=3)),
+                ('progreso', models.PositiveIntegerField(default=0)),
+                ('mensaje', models.CharField(blank=True, max_length=200)),
+                ('resultado', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('ejecutar_desde', models.DateTimeField(default=django.utils.timezone.now)),
+                ('creada', models.DateTimeField(auto_now_add=True)),
+                ('iniciada', models.DateTimeField(blank=True, null=True)),
+                ('terminada', models.DateTimeField(blank=True, null=True)),
+                ('organizacion', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='torneos.organizacion')),
+            ],
+            options={
+                'ordering': ['-creada'],
+                'indexes': [models.Index(fields=['estado', 'ejecutar_desde'], name='tarea_estado_turno_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('torneos', '0009_tareas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoAuditoria',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('accion', models.CharField(choices=[('resultado', 'Resultado'), ('pago', 'Pago'), ('anulacion', 'Anulación de pago'), ('confirmacion', 'Pago confirmado sin monto'), ('conciliacion', 'Conciliación bancaria')], max_length=20)),
+                ('objeto', models.CharField(max_length=200)),
+                ('datos', models.JSONField(blank=True, default=dict)),
+                ('organizacion', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='torneos.organizacion')),
+                ('torneo', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='torneos.torneo')),
+                ('usuario', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'evento de auditoría',
+                'verbose_name_plural': 'auditoría',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['organizacion', 'fecha'], name='auditoria_org_fecha_idx'), models.Index(fields=['torneo', 'fecha'], name='auditoria_torneo_fecha_idx'), models.Index(fields=['usuario', 'fecha'], name='auditoria_usuario_fecha_idx')],
+            },
+        ),
+    ]
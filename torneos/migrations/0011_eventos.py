@@ -0,0 +1,73 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def importar_llaves(apps, schema_editor):
+    """Las llaves que ya existen empiezan su historial con un evento 'importado'"""
+    Torneo = apps.get_model('torneos', 'Torneo')
+    Partido = apps.get_model('torneos', 'Partido')
+    EventoTorneo = apps.get_model('torneos', 'EventoTorneo')
+
+    eventos = []
+    for torneo in Torneo.objects.filter(llave_generada=True):
+        partidos = {
+            str(p['id']): {
+                'ronda': p['ronda'],
+                'local': p['equipo_local_id'],
+                'visitante': p['equipo_visitante_id'],
+                'ganador': p['ganador_id'] if p['terminado'] else None,
+            }
+            for p in Partido.objects.filter(torneo=torneo).values(
+                'id', 'ronda', 'equipo_local_id', 'equipo_visitante_id', 'ganador_id', 'terminado'
+            )
+        }
+        estado = {'partidos': partidos, 'campeon': torneo.campeon_id, 'llave_generada': True}
+        eventos.append(EventoTorneo(
+            torneo=torneo, numero=1, tipo='importado', datos=estado, organizacion_id=torneo.organizacion_id
+        ))
+    EventoTorneo.objects.bulk_create(eventos)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torneos', '0010_auditoria'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FotoEventos',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.PositiveIntegerField()),
+                ('estado', models.JSONField()),
+                ('torneo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fotos_eventos', to='torneos.torneo')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EventoTorneo',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.PositiveIntegerField()),
+                ('tipo', models.CharField(choices=[('importado', 'Estado importado'), ('llave_generada', 'Llave generada'), ('equipos_asignados', 'Equipos asignados'), ('ganador', 'Ganador anotado'), ('correccion', 'Resultado corregido'), ('deshacer', 'Resultado deshecho')], max_length=20)),
+                ('datos', models.JSONField(blank=True, default=dict)),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+                ('organizacion', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='torneos.organizacion')),
+                ('torneo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eventos', to='torneos.torneo')),
+            ],
+            options={
+                'ordering': ['torneo', 'numero'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='fotoeventos',
+            constraint=models.UniqueConstraint(fields=('torneo', 'numero'), name='foto_eventos_numero_unica'),
+        ),
+        migrations.AddConstraint(
+            model_name='eventotorneo',
+            constraint=models.UniqueConstraint(fields=('torneo', 'numero'), name='evento_torneo_numero_unico'),
+        ),
+        migrations.RunPython(importar_llaves, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('torneos', '0011_eventos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultadoMarcador',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cliente_id', models.CharField(max_length=64, unique=True)),
+                ('ganador_id_enviado', models.PositiveIntegerField()),
+                ('estado', models.CharField(choices=[('aplicado', 'Aplicado'), ('conflicto', 'Conflicto'), ('error', 'Error')], max_length=20)),
+                ('mensaje', models.CharField(blank=True, max_length=200)),
+                ('anotado', models.DateTimeField(blank=True, null=True)),
+                ('recibido', models.DateTimeField(auto_now_add=True)),
+                ('organizacion', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='torneos.organizacion')),
+                ('partido', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='torneos.partido')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-recibido'],
+            },
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+import re
+
+
+def completar_datos(apps, schema_editor):
+    """Copia el torneo a cada jugador y deduce reglas del nombre de la categoría"""
+    Jugador = apps.get_model('torneos', 'Jugador')
+    Equipo = apps.get_model('torneos', 'Equipo')
+    Categoria = apps.get_model('torneos', 'Categoria')
+
+    Jugador.objects.update(
+        torneo_id=models.Subquery(Equipo.objects.filter(id=models.OuterRef('equipo_id')).values('torneo_id')[:1])
+    )
+
+    for categoria in Categoria.objects.all():
+        nombre = categoria.nombre.lower()
+        sub = re.search(r'sub[- ]?(\d+)', nombre)
+        if sub:
+            categoria.edad_maxima = int(sub.group(1))
+        if 'mixto' in nombre:
+            categoria.genero = 'mixto'
+            categoria.min_por_genero = 2
+        elif 'femenin' in nombre or 'damas' in nombre:
+            categoria.genero = 'femenino'
+        elif 'masculin' in nombre or 'varones' in nombre:
+            categoria.genero = 'masculino'
+        categoria.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torneos', '0012_marcador'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categoria',
+            name='edad_maxima',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='categoria',
+            name='edad_minima',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='categoria',
+            name='genero',
+            field=models.CharField(choices=[('abierto', 'Abierto'), ('masculino', 'Masculino'), ('femenino', 'Femenino'), ('mixto', 'Mixto')], default='abierto', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='categoria',
+            name='max_jugadores',
+            field=models.PositiveIntegerField(default=12),
+        ),
+        migrations.AddField(
+            model_name='categoria',
+            name='min_jugadores',
+            field=models.PositiveIntegerField(default=5),
+        ),
+        migrations.AddField(
+            model_name='categoria',
+            name='min_por_genero',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='jugador',
+            name='documento',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='jugador',
+            name='genero',
+            field=models.CharField(blank=True, choices=[('F', 'Femenino'), ('M', 'Masculino')], max_length=1),
+        ),
+        migrations.AddField(
+            model_name='jugador',
+            name='torneo',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='jugadores', to='torneos.torneo'),
+        ),
+        migrations.RunPython(completar_datos, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='jugador',
+            constraint=models.UniqueConstraint(condition=models.Q(('documento', ''), _negated=True), fields=('torneo', 'documento'), name='jugador_documento_torneo_unico'),
+        ),
+    ]
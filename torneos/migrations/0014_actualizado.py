@@ -0,0 +1,23 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torneos', '0013_elegibilidad'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='torneo',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='torneoarchivado',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
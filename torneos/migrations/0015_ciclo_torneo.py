@@ -0,0 +1,34 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:21
+
+from django.db import migrations, models
+
+
+def separar_llave_generada(apps, schema_editor):
+    """Antes generar la llave ponía el torneo en curso: si aún no hay resultados queda en llave generada"""
+    Torneo = apps.get_model('torneos', 'Torneo')
+    Partido = apps.get_model('torneos', 'Partido')
+    Torneo.objects.filter(estado='en_curso').exclude(
+        id__in=Partido.objects.filter(terminado=True).values('torneo_id')
+    ).update(estado='llave_generada')
+
+
+def juntar_llave_generada(apps, schema_editor):
+    Torneo = apps.get_model('torneos', 'Torneo')
+    Torneo.objects.filter(estado='llave_generada').update(estado='en_curso')
+    Torneo.objects.filter(estado='inscripcion_cerrada').update(estado='planificacion')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torneos', '0014_actualizado'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='torneo',
+            name='estado',
+            field=models.CharField(choices=[('planificacion', 'En planificación'), ('inscripcion_cerrada', 'Inscripción cerrada'), ('llave_generada', 'Llave generada'), ('en_curso', 'En curso'), ('finalizado', 'Finalizado')], default='planificacion', max_length=20),
+        ),
+        migrations.RunPython(separar_llave_generada, juntar_llave_generada),
+    ]
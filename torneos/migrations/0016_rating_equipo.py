@@ -0,0 +1,18 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torneos', '0015_ciclo_torneo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipo',
+            name='rating',
+            field=models.FloatField(default=1500, editable=False),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torneos', '0016_rating_equipo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notificacion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('canal', models.CharField(choices=[('email', 'Email'), ('sms', 'SMS')], max_length=10)),
+                ('tipo', models.CharField(choices=[('pago_confirmado', 'Pago confirmado'), ('partido_programado', 'Partido programado'), ('avance', 'Avance en la llave')], max_length=30)),
+                ('destinatario', models.CharField(max_length=254)),
+                ('datos', models.JSONField(default=dict)),
+                ('clave', models.CharField(max_length=200)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('enviando', 'Enviando'), ('enviada', 'Enviada'), ('fallida', 'Fallida')], default='pendiente', max_length=20)),
+                ('intentos', models.PositiveIntegerField(default=0)),
+                ('error', models.CharField(blank=True, max_length=200)),
+                ('enviar_desde', models.DateTimeField(default=django.utils.timezone.now)),
+                ('creada', models.DateTimeField(auto_now_add=True)),
+                ('reclamada', models.DateTimeField(blank=True, null=True)),
+                ('enviada', models.DateTimeField(blank=True, null=True)),
+                ('equipo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notificaciones', to='torneos.equipo')),
+                ('organizacion', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='torneos.organizacion')),
+            ],
+            options={
+                'ordering': ['-creada'],
+                'indexes': [models.Index(fields=['estado', 'enviar_desde'], name='notificacion_turno_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='notificacion',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado', 'pendiente')), fields=('clave',), name='notificacion_pendiente_unica'),
+        ),
+    ]
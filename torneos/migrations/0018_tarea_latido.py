@@ -0,0 +1,18 @@
+# Generated by Django 4.2.25 on 2026-10-19 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torneos', '0017_notificaciones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tarea',
+            name='latido',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.25 on 2026-10-19 13:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torneos', '0018_tarea_latido'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrediccionTorneo',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.DateTimeField()),
+                ('datos', models.JSONField()),
+                ('calculada', models.DateTimeField(default=django.utils.timezone.now)),
+                ('torneo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='prediccion_guardada', to='torneos.torneo')),
+            ],
+        ),
+    ]
@@ -1,13 +1,91 @@
-from django.db import models
+import json
+import zlib
 
-class Categoria(models.Model):
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .ciclo import ESTADOS as ESTADOS_TORNEO
+from .organizaciones import (
+    PorEquipoOrganizacionManager,
+    PorOrganizacionManager,
+    PorTorneoOrganizacionManager,
+    organizacion_actual,
+)
+
+
+class PartidoTerminado(ValueError):
+    """Otro ya anotó el ganador del partido (el UPDATE condicional no lo tomó)"""
+    pass
+
+
+class Organizacion(models.Model):
+    """Liga o club dueño de sus categorías, torneos y equipos"""
+    nombre = models.CharField(max_length=100)
+    slug = models.SlugField(unique=True)
+    miembros = models.ManyToManyField(settings.AUTH_USER_MODEL, blank=True, related_name='organizaciones')
+    
+    def __str__(self):
+        return self.nombre
+
+class DeOrganizacion(models.Model):
+    """Base de los modelos que pertenecen a una organización.
+    
+    ``objects`` solo ve las filas de la organización activa; ``todos`` ve todo.
+    """
+    # Sin índice propio: los índices compuestos de cada modelo empiezan por este campo
+    organizacion = models.ForeignKey(
+        Organizacion,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        db_index=False
+    )
+    
+    objects = PorOrganizacionManager()
+    todos = models.Manager()
+    
+    class Meta:
+        abstract = True
+    
+    def organizacion_heredada(self):
+        return organizacion_actual()
+    
+    def save(self, *args, **kwargs):
+        if self.organizacion_id is None:
+            # NINGUNA no es una organización de verdad: la fila queda sin asignar
+            self.organizacion_id = self.organizacion_heredada() or None
+        super().save(*args, **kwargs)
+
+class Categoria(DeOrganizacion):
     """Ejemplo: Sub-15, Sub-17, Libre, Mixto"""
+    GENEROS = [
+        ('abierto', 'Abierto'),
+        ('masculino', 'Masculino'),
+        ('femenino', 'Femenino'),
+        ('mixto', 'Mixto'),
+    ]
+    
     nombre = models.CharField(max_length=50)
     
+    # Reglas de elegibilidad (ver torneos/elegibilidad.py)
+    edad_minima = models.PositiveIntegerField(null=True, blank=True)
+    edad_maxima = models.PositiveIntegerField(null=True, blank=True)  # Sub-15 → 15
+    min_jugadores = models.PositiveIntegerField(default=5)
+    max_jugadores = models.PositiveIntegerField(default=12)
+    genero = models.CharField(max_length=10, choices=GENEROS, default='abierto')
+    min_por_genero = models.PositiveIntegerField(default=0)  # solo mixto: mínimo de cada género
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['organizacion', 'nombre'], name='categoria_org_nombre_idx'),
+        ]
+    
     def __str__(self):
         return self.nombre
 
-class Torneo(models.Model):
+class Torneo(DeOrganizacion):
     nombre = models.CharField(max_length=100)
     categoria = models.ForeignKey(Categoria, on_delete=models.CASCADE)
     fecha_inicio = models.DateField()
@@ -20,13 +98,10 @@ class Torneo(models.Model):
         default=8
     )
     llave_generada = models.BooleanField(default=False)
+    # Solo cambia con transicionar() (ver ciclo.py)
     estado = models.CharField(
         max_length=20,
-        choices=[
-            ('planificacion', 'En planificación'),
-            ('en_curso', 'En curso'),
-            ('finalizado', 'Finalizado')
-        ],
+        choices=ESTADOS_TORNEO,
         default='planificacion'
     )
     campeon = models.ForeignKey(
@@ -36,8 +111,25 @@ class Torneo(models.Model):
         blank=True,
         related_name='torneos_ganados'
     )
+    # Última vez que cambió el torneo, su llave o sus equipos (ETag/Last-Modified)
+    actualizado = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['organizacion', 'estado', 'fecha_fin'], name='torneo_org_estado_idx'),
+            models.Index(fields=['organizacion', 'fecha_inicio'], name='torneo_org_inicio_idx'),
+        ]
+    
+    def organizacion_heredada(self):
+        return self.categoria.organizacion_id or organizacion_actual()
+    
+    def transicionar(self, accion, **campos):
+        """Cambia el estado con un UPDATE condicional (TransicionNoPermitida si no corresponde)"""
+        from .ciclo import transicionar_torneo
+        transicionar_torneo(self, accion, **campos)
     
     # MÉTODO AQUÍ (4 espacios de indentación)
+    @transaction.atomic
     def generar_llave(self):
         if self.llave_generada:
             return
@@ -52,9 +144,13 @@ class Torneo(models.Model):
         if self.num_equipos not in config:
             raise ValueError("Número de equipos no válido")
         
+        # El UPDATE condicional hace de candado: dos clics o dos workers no crean dos llaves
+        self.transicionar('generar_llave', llave_generada=True)
+        
+        creados = []
         for ronda, cantidad in config[self.num_equipos].items():
             for i in range(cantidad):
-                self.partido_set.create(
+                partido = self.partido_set.create(
                     ronda=ronda,
                     fecha=None,
                     hora=None,
@@ -62,10 +158,10 @@ class Torneo(models.Model):
                     equipo_visitante=None,
                     terminado=False
                 )
+                creados.append([partido.id, ronda])
         
-        self.llave_generada = True
-        self.estado = 'en_curso'
-        self.save()
+        from .eventos import registrar
+        registrar(self, 'llave_generada', partidos=creados, lugares_fijos=True)
         
     # NUEVO MÉTODO - 4 espacios desde el margen
     def asignar_equipos_llave(self):
@@ -86,12 +182,17 @@ class Torneo(models.Model):
         
         partidos = self.partido_set.filter(ronda=primera_ronda[self.num_equipos]).order_by('id')
         
+        cruces = []
         for i in range(0, len(equipos), 2):
             if i + 1 < len(equipos):
                 partido = partidos[i // 2]
                 partido.equipo_local = equipos[i]
                 partido.equipo_visitante = equipos[i + 1]
-                partido.save()   
+                partido.save()
+                cruces.append([partido.id, equipos[i].id, equipos[i + 1].id])
+        
+        from .eventos import registrar
+        registrar(self, 'equipos_asignados', cruces=cruces)
                 
     def generar_llave_desde_admin(self):
         """Versión simple para usar desde Admin - Solo genera partidos vacíos"""
@@ -115,21 +216,52 @@ class Torneo(models.Model):
             
             return f"✅ Llave generada: {rondas.get(self.num_equipos, '')}. Total: {total_partidos} partidos creados."
             
-        except Exception as e:
+        except ValueError as e:
             return f"❌ Error: {str(e)}"             
                 
+    @transaction.atomic
     def avanzar_ganador(self, partido, equipo_ganador):
         """Mueve un equipo ganador a la siguiente ronda"""
-        if partido.torneo != self:
+        if partido.torneo_id != self.id:
             raise ValueError("Partido no pertenece a este torneo")
         
-        if partido.terminado:
-            raise ValueError("Partido ya terminado")
-        
-        # Marcar ganador en partido actual
+        # Marcar ganador con un UPDATE condicional: de dos anotaciones del mismo
+        # partido (dos instancias viejas, dos árbitros) solo una lo toma
+        tomado = Partido.todos.filter(id=partido.id, terminado=False).update(
+            ganador=equipo_ganador, terminado=True
+        )
+        if not tomado:
+            raise PartidoTerminado("Partido ya terminado")
         partido.ganador = equipo_ganador
         partido.terminado = True
-        partido.save()
+        
+        # Se valida contra la llave reconstruida antes de registrar el evento: un
+        # partido que no es de la llave (p. ej. del calendario) o un ganador que no
+        # lo juega falla aquí y la transacción deshace el UPDATE
+        from .eventos import aplicar, estado_actual, registrar as registrar_evento
+        datos = {'partido': partido.id, 'ganador': equipo_ganador.id}
+        estado = aplicar(estado_actual(self.id), 'ganador', datos)
+        registrar_evento(self, 'ganador', **datos)
+        Torneo.tocar(self.id)
+        
+        # Nuevos ratings y probabilidades para el resto de la llave
+        from . import prediccion
+        prediccion.actualizar(self.id, estado)
+        
+        # El primer resultado pone el torneo en curso (los siguientes no cambian nada)
+        from .ciclo import transicionar
+        if transicionar(Torneo.todos.filter(id=self.id), 'iniciar'):
+            self.estado = 'en_curso'
+        
+        from .auditoria import registrar
+        registrar(
+            'resultado',
+            f"{partido.get_ronda_display()}: {partido.equipo_local} vs {partido.equipo_visitante}",
+            torneo_id=self.id,
+            partido=partido.id,
+            ganador=equipo_ganador.id,
+            ganador_nombre=equipo_ganador.nombre,
+        )
         
         # Determinar siguiente ronda
         siguiente_ronda = {
@@ -143,39 +275,62 @@ class Torneo(models.Model):
         
         if siguiente == 'terminado':
             # ¡Es la final! Tenemos campeón
-            self.campeon = equipo_ganador
-            self.estado = 'finalizado'
-            self.save()
+            self.transicionar('finalizar', campeon=equipo_ganador)
+            
+            from .notificaciones import avance
+            avance(equipo_ganador, 'Final', campeon=True)
+            
+            # Guardar la foto para el historial (en segundo plano)
+            from .tareas import encolar
+            encolar('archivar_torneo', torneo_id=self.id)
             return f"🏆 ¡{equipo_ganador} es el CAMPEÓN!"
         
-        # Buscar partido vacío en siguiente ronda
-        partidos_siguiente = self.partido_set.filter(
-            ronda=siguiente,
-            equipo_local__isnull=True
-        ).order_by('id').first()
-        
-        if not partidos_siguiente:
+        from .eventos import lugar_fijo, lugares_fijos
+        if lugares_fijos(self.id):
+            # Lugar fijo: el partido i de la ronda alimenta al i // 2 de la siguiente
+            def ids(ronda):
+                return list(self.partido_set.filter(ronda=ronda).order_by('id').values_list('id', flat=True))
+
+            pid, lado = lugar_fijo(ids(partido.ronda), ids(siguiente), partido.id)
+            partidos_siguiente = self.partido_set.get(id=pid)
+        else:
+            # Llaves anteriores: primer partido vacío en siguiente ronda
             partidos_siguiente = self.partido_set.filter(
                 ronda=siguiente,
-                equipo_visitante__isnull=True
+                equipo_local__isnull=True
             ).order_by('id').first()
-        
+
+            if not partidos_siguiente:
+                partidos_siguiente = self.partido_set.filter(
+                    ronda=siguiente,
+                    equipo_visitante__isnull=True
+                ).order_by('id').first()
+            if partidos_siguiente:
+                lado = 'local' if partidos_siguiente.equipo_local is None else 'visitante'
+
         if partidos_siguiente:
-            # Asignar ganador
-            if partidos_siguiente.equipo_local is None:
-                partidos_siguiente.equipo_local = equipo_ganador
-            else:
-                partidos_siguiente.equipo_visitante = equipo_ganador
-            partidos_siguiente.save()
+            # Asignar ganador (solo su lado: el otro lo puede estar anotando otro árbitro)
+            campo = f'equipo_{lado}'
+            setattr(partidos_siguiente, campo, equipo_ganador)
+            partidos_siguiente.save(update_fields=[campo])
+            
+            from .eventos import NOMBRES_RONDAS
+            from .notificaciones import avance
+            avance(equipo_ganador, NOMBRES_RONDAS.get(siguiente, siguiente))
             
             return f"✅ {equipo_ganador} avanza a {siguiente}"
         
         return "⚠️ No hay partido disponible en siguiente ronda"            
     
+    @classmethod
+    def tocar(cls, torneo_id):
+        """Marca el torneo como modificado sin pasar por save()"""
+        cls.todos.filter(id=torneo_id).update(actualizado=timezone.now())
+    
     def __str__(self):
         return f"{self.nombre} ({self.categoria})"
 
-class Equipo(models.Model):
+class Equipo(DeOrganizacion):
     """Equipo de vóley"""
     torneo = models.ForeignKey(Torneo, on_delete=models.CASCADE)
     nombre = models.CharField(max_length=100)
@@ -183,21 +338,190 @@ class Equipo(models.Model):
     telefono = models.CharField(max_length=20)
     email = models.EmailField()
     pago_confirmado = models.BooleanField(default=False)  # ¡TU IDEA!
+    monto_pagado = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     fecha_inscripcion = models.DateTimeField(auto_now_add=True)
+    # Rating Elo: se recalcula con cada resultado de la llave (ver prediccion.py)
+    rating = models.FloatField(default=1500, editable=False)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['organizacion', 'pago_confirmado'], name='equipo_org_pago_idx'),
+            models.Index(fields=['organizacion', 'torneo'], name='equipo_org_torneo_idx'),
+        ]
+    
+    def organizacion_heredada(self):
+        return self.torneo.organizacion_id
+    
+    @property
+    def referencia_pago(self):
+        """Referencia que el equipo debe poner en la transferencia"""
+        return f"EQ-{self.id}"
+    
+    def saldo_pendiente(self):
+        return max(self.torneo.precio_inscripcion - self.monto_pagado, 0)
     
     def __str__(self):
         return self.nombre
 
+class Pago(models.Model):
+    """Abono (total o parcial) a la inscripción de un equipo.
+    
+    Los montos negativos son anulaciones; nunca se editan pagos ya registrados.
+    """
+    equipo = models.ForeignKey(Equipo, on_delete=models.CASCADE)
+    monto = models.DecimalField(max_digits=10, decimal_places=2)
+    fecha = models.DateTimeField(auto_now_add=True)
+    referencia = models.CharField(max_length=100, blank=True)
+    origen = models.CharField(
+        max_length=20,
+        choices=[
+            ('manual', 'Manual'),
+            ('banco', 'Extracto bancario')
+        ],
+        default='manual'
+    )
+    
+    class Meta:
+        ordering = ['-fecha']
+    
+    def __str__(self):
+        return f"{self.equipo} - ${self.monto}"
+
+class LibroPagos(models.Model):
+    """Totales de pagos precalculados por torneo (se actualizan al escribir)"""
+    torneo = models.OneToOneField(Torneo, on_delete=models.CASCADE, related_name='libro_pagos')
+    equipos_total = models.PositiveIntegerField(default=0)
+    equipos_pagados = models.PositiveIntegerField(default=0)
+    monto_recaudado = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+    
+    objects = PorTorneoOrganizacionManager()
+    todos = models.Manager()
+    
+    @property
+    def equipos_pendientes(self):
+        return self.equipos_total - self.equipos_pagados
+    
+    @classmethod
+    def recalcular(cls, torneo_ids, crear=False):
+        """Recalcula el libro de varios torneos con una sola consulta agregada.
+        
+        Sin ``crear`` solo actualiza libros que ya existen, para no revivir el
+        libro de un torneo que se está borrando en cascada.
+        """
+        torneo_ids = set(torneo_ids)
+        totales = {
+            fila['torneo_id']: fila
+            for fila in Equipo.objects.filter(torneo_id__in=torneo_ids).values('torneo_id').annotate(
+                total=models.Count('id'),
+                pagados=models.Count('id', filter=models.Q(pago_confirmado=True)),
+                recaudado=models.Sum('monto_pagado'),
+            )
+        }
+        existentes = {
+            libro.torneo_id: libro
+            for libro in cls.objects.filter(torneo_id__in=torneo_ids)
+        }
+        if crear:
+            # get_or_create: dos inscripciones a la vez no crean dos libros
+            for torneo_id in torneo_ids - existentes.keys():
+                existentes[torneo_id], _ = cls.todos.get_or_create(torneo_id=torneo_id)
+        
+        for torneo_id, libro in existentes.items():
+            fila = totales.get(torneo_id, {})
+            libro.equipos_total = fila.get('total', 0)
+            libro.equipos_pagados = fila.get('pagados', 0)
+            libro.monto_recaudado = fila.get('recaudado') or 0
+            libro.save()
+    
+    @classmethod
+    def resumen(cls, torneo_id=None):
+        """Totales de un torneo (o de todos) leyendo los libros.
+        
+        No escribe nada (se usa desde la réplica): los torneos que aún no
+        tienen libro se suman desde sus equipos.
+        """
+        faltantes = Torneo.objects.filter(libro_pagos__isnull=True)
+        libros = cls.objects.all()
+        if torneo_id:
+            faltantes = faltantes.filter(id=torneo_id)
+            libros = libros.filter(torneo_id=torneo_id)
+        
+        totales = libros.aggregate(
+            total=models.Sum('equipos_total'),
+            pagados=models.Sum('equipos_pagados'),
+            recaudado=models.Sum('monto_recaudado'),
+        )
+        sin_libro = Equipo.objects.filter(torneo__in=faltantes).aggregate(
+            total=models.Count('id'),
+            pagados=models.Count('id', filter=models.Q(pago_confirmado=True)),
+            recaudado=models.Sum('monto_pagado'),
+        )
+        totales = {clave: (totales[clave] or 0) + (sin_libro[clave] or 0) for clave in totales}
+        total = totales['total'] or 0
+        pagados = totales['pagados'] or 0
+        return {
+            'total': total,
+            'pagados': pagados,
+            'pendientes': total - pagados,
+            'recaudado': totales['recaudado'] or 0,
+        }
+    
+    def __str__(self):
+        return f"Pagos de {self.torneo}"
+
 class Jugador(models.Model):
     """Jugador individual dentro de un equipo"""
+    GENEROS = [
+        ('F', 'Femenino'),
+        ('M', 'Masculino'),
+    ]
+    
     equipo = models.ForeignKey(Equipo, on_delete=models.CASCADE)
+    # Copia de equipo.torneo para el índice único (torneo, documento)
+    torneo = models.ForeignKey(Torneo, on_delete=models.CASCADE, null=True, blank=True, editable=False, related_name='jugadores')
     nombre = models.CharField(max_length=100)
-    edad = models.PositiveIntegerField()
+    edad = models.PositiveIntegerField()  # 0 = sin registrar
+    genero = models.CharField(max_length=1, choices=GENEROS, blank=True)
+    documento = models.CharField(max_length=20, blank=True)  # cédula / DNI
+    
+    objects = PorEquipoOrganizacionManager()
+    todos = models.Manager()
+    
+    class Meta:
+        constraints = [
+            # Una persona no puede jugar en dos equipos del mismo torneo
+            models.UniqueConstraint(
+                fields=['torneo', 'documento'],
+                condition=~models.Q(documento=''),
+                name='jugador_documento_torneo_unico'
+            ),
+        ]
+    
+    def save(self, *args, **kwargs):
+        self.torneo_id = self.equipo.torneo_id
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.nombre} ({self.equipo})"
 
-class Partido(models.Model):
+class IndiceBusqueda(models.Model):
+    """Texto normalizado (sin tildes) de cada equipo para la búsqueda.
+    
+    En SQLite una tabla FTS5 se mantiene sincronizada con esta tabla mediante
+    triggers (ver migración 0006); en otros motores se consulta directamente.
+    """
+    equipo = models.OneToOneField(Equipo, on_delete=models.CASCADE, related_name='indice_busqueda')
+    torneo = models.ForeignKey(Torneo, on_delete=models.CASCADE)
+    nombre = models.CharField(max_length=100)
+    capitan = models.CharField(max_length=100)
+    email = models.CharField(max_length=254)
+    jugadores = models.TextField(blank=True)
+    
+    def __str__(self):
+        return f"Índice de {self.equipo_id}"
+
+class Partido(DeOrganizacion):
     """Un partido programado"""
     torneo = models.ForeignKey(Torneo, on_delete=models.CASCADE)
     fecha = models.DateField(null=True, blank=True)
@@ -227,19 +551,328 @@ class Partido(models.Model):
     
     terminado = models.BooleanField(default=False)
     
-    # Método para marcar ganador
-    def marcar_ganador(self, equipo_ganador):
-        self.ganador = equipo_ganador
-        self.terminado = True
-        self.save()
-        
-        # Aquí después agregaremos la lógica para mover a siguiente ronda
-        return True
-    
     class Meta:
         ordering = ['fecha', 'hora']
+        indexes = [
+            models.Index(fields=['organizacion', 'fecha', 'hora'], name='partido_org_fecha_idx'),
+        ]
+    
+    def organizacion_heredada(self):
+        return self.torneo.organizacion_id
     
     def __str__(self):
         if self.terminado and self.ganador:
             return f"{self.equipo_local} vs {self.equipo_visitante} - Ganó: {self.ganador}"
         return f"{self.equipo_local} vs {self.equipo_visitante} - {self.fecha}"
+
+
+class TorneoArchivado(DeOrganizacion):
+    """Foto de solo lectura de un torneo finalizado (llave, campeón y planteles).
+    
+    El detalle va en ``datos`` como JSON comprimido con zlib, así el historial
+    se sirve sin tocar Equipo/Jugador/Partido y esas tablas se pueden podar.
+    """
+    torneo = models.OneToOneField(
+        Torneo,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='archivo'
+    )
+    nombre = models.CharField(max_length=100)
+    categoria = models.CharField(max_length=50)
+    fecha_inicio = models.DateField()
+    fecha_fin = models.DateField(db_index=True)
+    precio_inscripcion = models.DecimalField(max_digits=10, decimal_places=2)
+    campeon = models.CharField(max_length=100, blank=True)
+    datos = models.BinaryField()
+    podado = models.BooleanField(default=False)
+    creado = models.DateTimeField(auto_now_add=True)
+    actualizado = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-fecha_fin']
+        indexes = [
+            models.Index(fields=['organizacion', 'fecha_fin'], name='archivo_org_fecha_idx'),
+        ]
+    
+    def organizacion_heredada(self):
+        return self.torneo.organizacion_id if self.torneo_id else organizacion_actual()
+    
+    def guardar_contenido(self, contenido):
+        self.datos = zlib.compress(json.dumps(contenido, separators=(',', ':')).encode('utf-8'), 9)
+        self._contenido = contenido
+    
+    @property
+    def contenido(self):
+        if not hasattr(self, '_contenido'):
+            self._contenido = json.loads(zlib.decompress(bytes(self.datos)).decode('utf-8'))
+        return self._contenido
+    
+    def datos_historial(self):
+        """Mismo formato que espera torneos/historial.html"""
+        contenido = self.contenido
+        equipos = contenido['equipos']
+        campeon = contenido['campeon']
+        
+        return {
+            'torneo': {
+                'id': self.torneo_id or f"archivo-{self.id}",
+                'existe': self.torneo_id is not None,
+                'nombre': self.nombre,
+                'categoria': self.categoria,
+                'fecha_inicio': self.fecha_inicio,
+                'fecha_fin': self.fecha_fin,
+                'precio_inscripcion': self.precio_inscripcion,
+                'campeon': campeon,
+            },
+            'campeon': campeon,
+            'subcampeon': contenido['subcampeon'],
+            'equipos_con_jugadores': [
+                {
+                    'equipo': equipo,
+                    'jugadores': [{'nombre': nombre} for nombre in equipo['jugadores'][:5]],
+                    'total_jugadores': len(equipo['jugadores']),
+                }
+                for equipo in equipos
+            ],
+            'total_equipos': len(equipos),
+            'total_partidos': sum(1 for p in contenido['partidos'] if p['terminado']),
+            'partidos_finales': sorted(
+                (
+                    dict(p, fecha=parse_date(p['fecha']) if p['fecha'] else None)
+                    for p in contenido['partidos']
+                    if p['ronda'] in ('final', 'semifinales')
+                ),
+                key=lambda p: p['ronda']
+            )[:3],
+        }
+    
+    def __str__(self):
+        return f"{self.nombre} (archivado)"
+
+
+class Tarea(DeOrganizacion):
+    """Trabajo pesado que se ejecuta fuera de la petición (ver torneos/tareas.py)"""
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('en_proceso', 'En proceso'),
+        ('completada', 'Completada'),
+        ('fallida', 'Fallida'),
+    ]
+    
+    nombre = models.CharField(max_length=50)
+    argumentos = models.JSONField(default=dict, blank=True)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='pendiente')
+    intentos = models.PositiveIntegerField(default=0)
+    max_intentos = models.PositiveIntegerField(default=3)
+    progreso = models.PositiveIntegerField(default=0)  # 0 a 100
+    mensaje = models.CharField(max_length=200, blank=True)
+    resultado = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    ejecutar_desde = models.DateTimeField(default=timezone.now)
+    creada = models.DateTimeField(auto_now_add=True)
+    iniciada = models.DateTimeField(null=True, blank=True)
+    latido = models.DateTimeField(null=True, blank=True)  # última señal de vida del worker
+    terminada = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-creada']
+        indexes = [
+            # El worker busca: pendientes cuyo turno ya llegó, en orden
+            models.Index(fields=['estado', 'ejecutar_desde'], name='tarea_estado_turno_idx'),
+        ]
+    
+    def reportar(self, progreso, mensaje=''):
+        """Actualiza el progreso sin tocar el resto de la fila (y cuenta como latido)"""
+        self.progreso = max(0, min(int(progreso), 100))
+        self.mensaje = mensaje[:200]
+        Tarea.todos.filter(id=self.id).update(progreso=self.progreso, mensaje=self.mensaje, latido=timezone.now())
+    
+    def __str__(self):
+        return f"#{self.id} {self.nombre} ({self.get_estado_display()})"
+
+
+class EventoAuditoria(DeOrganizacion):
+    """Registro de solo escritura de resultados y pagos (ver torneos/auditoria.py)"""
+    ACCIONES = [
+        ('resultado', 'Resultado'),
+        ('pago', 'Pago'),
+        ('anulacion', 'Anulación de pago'),
+        ('confirmacion', 'Pago confirmado sin monto'),
+        ('conciliacion', 'Conciliación bancaria'),
+    ]
+    
+    fecha = models.DateTimeField(default=timezone.now)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False
+    )
+    accion = models.CharField(max_length=20, choices=ACCIONES)
+    torneo = models.ForeignKey(Torneo, on_delete=models.SET_NULL, null=True, blank=True, db_index=False)
+    objeto = models.CharField(max_length=200)  # "Final: A vs B", "Equipo X"...
+    datos = models.JSONField(default=dict, blank=True)
+    
+    class Meta:
+        ordering = ['-fecha']
+        verbose_name = 'evento de auditoría'
+        verbose_name_plural = 'auditoría'
+        indexes = [
+            models.Index(fields=['organizacion', 'fecha'], name='auditoria_org_fecha_idx'),
+            models.Index(fields=['torneo', 'fecha'], name='auditoria_torneo_fecha_idx'),
+            models.Index(fields=['usuario', 'fecha'], name='auditoria_usuario_fecha_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("Los eventos de auditoría no se modifican")
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        raise ValueError("Los eventos de auditoría no se borran")
+    
+    def __str__(self):
+        return f"{self.fecha:%d/%m/%Y %H:%M} {self.get_accion_display()}: {self.objeto}"
+
+
+class EventoTorneo(DeOrganizacion):
+    """Lo que pasó en la llave de un torneo, en orden (ver torneos/eventos.py).
+
+    Los partidos y el campeón se pueden reconstruir reproduciendo estos eventos.
+    """
+    TIPOS = [
+        ('importado', 'Estado importado'),
+        ('llave_generada', 'Llave generada'),
+        ('equipos_asignados', 'Equipos asignados'),
+        ('ganador', 'Ganador anotado'),
+        ('correccion', 'Resultado corregido'),
+        ('deshacer', 'Resultado deshecho'),
+    ]
+    
+    torneo = models.ForeignKey(Torneo, on_delete=models.CASCADE, related_name='eventos')
+    numero = models.PositiveIntegerField()  # 1, 2, 3... dentro del torneo
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    datos = models.JSONField(default=dict, blank=True)
+    fecha = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['torneo', 'numero']
+        constraints = [
+            models.UniqueConstraint(fields=['torneo', 'numero'], name='evento_torneo_numero_unico'),
+        ]
+    
+    def organizacion_heredada(self):
+        return self.torneo.organizacion_id
+    
+    def __str__(self):
+        return f"{self.torneo} #{self.numero} {self.get_tipo_display()}"
+
+
+class FotoEventos(models.Model):
+    """Estado de la llave tras el evento ``numero`` para no reproducir desde el inicio"""
+    torneo = models.ForeignKey(Torneo, on_delete=models.CASCADE, related_name='fotos_eventos')
+    numero = models.PositiveIntegerField()
+    estado = models.JSONField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['torneo', 'numero'], name='foto_eventos_numero_unica'),
+        ]
+
+
+class PrediccionTorneo(models.Model):
+    """Última predicción calculada de la llave (ver torneos/prediccion.py).
+    
+    Vale mientras ``version`` sea igual a ``Torneo.actualizado``: la calcula
+    el worker y la leen todos los procesos web.
+    """
+    torneo = models.OneToOneField(Torneo, on_delete=models.CASCADE, related_name='prediccion_guardada')
+    version = models.DateTimeField()
+    datos = models.JSONField()
+    calculada = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"Predicción de {self.torneo_id}"
+
+
+class ResultadoMarcador(DeOrganizacion):
+    """Resultado enviado por el marcador sin conexión (ver torneos/marcador.py).
+
+    ``cliente_id`` lo genera el navegador: si el mismo resultado llega dos
+    veces se responde lo mismo sin volver a aplicarlo.
+    """
+    ESTADOS = [
+        ('aplicado', 'Aplicado'),
+        ('conflicto', 'Conflicto'),
+        ('error', 'Error'),
+    ]
+    
+    cliente_id = models.CharField(max_length=64, unique=True)
+    partido = models.ForeignKey(Partido, on_delete=models.SET_NULL, null=True, blank=True)
+    ganador_id_enviado = models.PositiveIntegerField()
+    estado = models.CharField(max_length=20, choices=ESTADOS)
+    mensaje = models.CharField(max_length=200, blank=True)
+    anotado = models.DateTimeField(null=True, blank=True)  # hora en el dispositivo
+    recibido = models.DateTimeField(auto_now_add=True)
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-recibido']
+    
+    def __str__(self):
+        return f"{self.cliente_id} ({self.get_estado_display()})"
+
+
+class Notificacion(DeOrganizacion):
+    """Aviso pendiente o enviado a un capitán (ver torneos/notificaciones.py)"""
+    CANALES = [
+        ('email', 'Email'),
+        ('sms', 'SMS'),
+    ]
+    TIPOS = [
+        ('pago_confirmado', 'Pago confirmado'),
+        ('partido_programado', 'Partido programado'),
+        ('avance', 'Avance en la llave'),
+    ]
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('enviando', 'Enviando'),
+        ('enviada', 'Enviada'),
+        ('fallida', 'Fallida'),
+    ]
+    
+    equipo = models.ForeignKey(Equipo, on_delete=models.CASCADE, related_name='notificaciones')
+    canal = models.CharField(max_length=10, choices=CANALES)
+    tipo = models.CharField(max_length=30, choices=TIPOS)
+    destinatario = models.CharField(max_length=254)
+    datos = models.JSONField(default=dict)  # contexto de la plantilla (no se vuelve a leer la base)
+    clave = models.CharField(max_length=200)  # avisos pendientes con la misma clave se juntan en uno
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='pendiente')
+    intentos = models.PositiveIntegerField(default=0)
+    error = models.CharField(max_length=200, blank=True)
+    enviar_desde = models.DateTimeField(default=timezone.now)
+    creada = models.DateTimeField(auto_now_add=True)
+    reclamada = models.DateTimeField(null=True, blank=True)
+    enviada = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-creada']
+        indexes = [
+            models.Index(fields=['estado', 'enviar_desde'], name='notificacion_turno_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['clave'],
+                condition=models.Q(estado='pendiente'),
+                name='notificacion_pendiente_unica',
+            ),
+        ]
+    
+    def organizacion_heredada(self):
+        return self.equipo.organizacion_id
+    
+    def __str__(self):
+        return f"{self.get_tipo_display()} → {self.destinatario} ({self.get_estado_display()})"
@@ -0,0 +1,249 @@
+"""
+Avisos a los capitanes por email (y SMS si hay una pasarela configurada).
+
+Los eventos (pago confirmado, partido programado, avance en la llave) solo
+crean filas ``Notificacion`` dentro de la misma transacción: la petición no
+espera a ningún servidor de correo. La tarea ``enviar_notificaciones`` las
+manda por lotes:
+
+- una sola conexión SMTP por lote,
+- cada plantilla se carga una vez y cada contenido distinto se renderiza una
+  vez (el aviso de un partido es el mismo texto para los dos equipos),
+- los avisos repetidos se juntan: una clave pendiente se actualiza en vez de
+  crear otra fila, y mismo destinatario + mismo texto sale una sola vez,
+- si un envío falla se reintenta más tarde (espera que se duplica); si fallan
+  varios seguidos el servidor se da por caído y el resto del lote se pospone
+  sin gastar intentos.
+
+Las plantillas están en ``templates/notificaciones/<tipo>.txt``: la primera
+línea es el asunto (y el texto del SMS), el resto el cuerpo del correo.
+
+Para SMS, ``NOTIFICACIONES_SMS`` es la ruta a una función
+``enviar(telefono, texto)`` que lanza una excepción si no pudo enviar.
+"""
+
+import json
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import IntegrityError, transaction
+from django.db.models import F, Min
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Notificacion, Tarea
+
+logger = logging.getLogger(__name__)
+
+LOTE = 100
+MAX_INTENTOS = 5
+ESPERA_BASE_REINTENTO = 60  # segundos; se duplica en cada intento
+ESPERA_LOTE = 30  # segundos que se juntan avisos antes de enviar
+MAX_ERRORES_SEGUIDOS = 3  # después de esto el servidor se da por caído
+
+
+# ===== ENCOLAR =====
+
+def _sms_configurado():
+    return bool(getattr(settings, 'NOTIFICACIONES_SMS', None))
+
+
+def notificar(tipo, equipo, clave, datos):
+    """Deja en cola el aviso ``tipo`` para el capitán de ``equipo``.
+
+    ``datos`` es todo el contexto de la plantilla. Si ya hay uno pendiente con
+    la misma clave se reemplazan sus datos (el capitán recibe solo la versión
+    más reciente).
+    """
+    destinos = [('email', equipo.email)]
+    if _sms_configurado() and equipo.telefono:
+        destinos.append(('sms', equipo.telefono))
+
+    for canal, destinatario in destinos:
+        if not destinatario:
+            continue
+        clave_canal = f'{clave}:{canal}'[:200]
+        campos = {'datos': datos, 'destinatario': destinatario}
+        if Notificacion.todos.filter(clave=clave_canal, estado='pendiente').update(**campos):
+            continue
+        try:
+            with transaction.atomic():
+                Notificacion.objects.create(equipo=equipo, canal=canal, tipo=tipo, clave=clave_canal, **campos)
+        except IntegrityError:
+            # Otra petición creó la misma clave al mismo tiempo
+            Notificacion.todos.filter(clave=clave_canal, estado='pendiente').update(**campos)
+
+    programar_envio()
+
+
+def programar_envio(espera=None):
+    """Encola la tarea de envío si hay avisos y no hay ya una tarea esperando"""
+    proximo = Notificacion.todos.filter(estado='pendiente').aggregate(primero=Min('enviar_desde'))['primero']
+    if proximo is None:
+        return None
+
+    if espera is None:
+        # Sin worker no tiene sentido esperar a juntar avisos
+        espera = 0 if getattr(settings, 'TAREAS_SINCRONAS', False) else ESPERA_LOTE
+    cuando = max(proximo, timezone.now() + timedelta(seconds=espera))
+    if Tarea.todos.filter(nombre='enviar_notificaciones', estado='pendiente', ejecutar_desde__lte=cuando).exists():
+        return None
+
+    from .tareas import encolar
+    return encolar('enviar_notificaciones', ejecutar_desde=cuando)
+
+
+# ===== EVENTOS =====
+
+def pago_confirmado(equipo):
+    notificar('pago_confirmado', equipo, f'pago:{equipo.id}', {
+        'equipo': equipo.nombre,
+        'capitan': equipo.capitan,
+        'torneo': equipo.torneo.nombre,
+        'monto': str(equipo.monto_pagado),
+        'referencia': equipo.referencia_pago,
+    })
+
+
+def partido_programado(partido):
+    """Avisa a los dos equipos con el mismo texto: se renderiza una vez y, si los
+    dos capitanes usan el mismo correo, sale un solo email"""
+    datos = {
+        'torneo': partido.torneo.nombre,
+        'local': partido.equipo_local.nombre,
+        'visitante': partido.equipo_visitante.nombre,
+        'fecha': str(partido.fecha),
+        'hora': str(partido.hora)[:5],
+    }
+    for equipo in (partido.equipo_local, partido.equipo_visitante):
+        notificar('partido_programado', equipo, f'partido:{partido.id}:{equipo.id}', datos)
+
+
+def avance(equipo, ronda, campeon=False):
+    notificar('avance', equipo, f'avance:{equipo.id}:{ronda}', {
+        'equipo': equipo.nombre,
+        'capitan': equipo.capitan,
+        'torneo': equipo.torneo.nombre,
+        'ronda': ronda,
+        'campeon': campeon,
+    })
+
+
+# ===== ENVIAR =====
+
+def reclamar(limite=LOTE):
+    """IDs de hasta ``limite`` avisos pendientes que este worker pudo tomar"""
+    candidatas = Notificacion.todos.filter(
+        estado='pendiente',
+        enviar_desde__lte=timezone.now(),
+    ).order_by('enviar_desde').values_list('id', flat=True)[:limite]
+
+    reclamadas = []
+    for notificacion_id in candidatas:
+        tomada = Notificacion.todos.filter(id=notificacion_id, estado='pendiente').update(
+            estado='enviando',
+            reclamada=timezone.now(),
+        )
+        if tomada:
+            reclamadas.append(notificacion_id)
+    return reclamadas
+
+
+def liberar_atascadas(minutos=30):
+    """Devuelve a la cola avisos 'enviando' de un worker que murió"""
+    limite = timezone.now() - timedelta(minutes=minutos)
+    return Notificacion.todos.filter(estado='enviando', reclamada__lt=limite).update(estado='pendiente')
+
+
+def _renderizar(notificaciones):
+    """(asunto, cuerpo) de cada aviso: una plantilla y un render por contenido distinto"""
+    plantillas = {}
+    textos = {}
+    for notificacion in notificaciones:
+        clave = (notificacion.tipo, json.dumps(notificacion.datos, sort_keys=True))
+        if clave not in textos:
+            if notificacion.tipo not in plantillas:
+                plantillas[notificacion.tipo] = get_template(f'notificaciones/{notificacion.tipo}.txt')
+            texto = plantillas[notificacion.tipo].render(notificacion.datos).strip()
+            asunto, _, cuerpo = texto.partition('\n')
+            textos[clave] = (asunto.strip(), cuerpo.strip())
+        yield notificacion, textos[clave]
+
+
+def _enviar(conexion, canal, destinatario, asunto, cuerpo):
+    if canal == 'sms':
+        import_string(settings.NOTIFICACIONES_SMS)(destinatario, asunto)
+    else:
+        EmailMessage(asunto, cuerpo, to=[destinatario], connection=conexion).send()
+
+
+def _fallo(grupo, error):
+    """Reintento con espera creciente; tras MAX_INTENTOS queda como fallida"""
+    for notificacion in grupo:
+        intentos = notificacion.intentos + 1
+        espera = ESPERA_BASE_REINTENTO * 2 ** (intentos - 1)
+        Notificacion.todos.filter(id=notificacion.id).update(
+            estado='pendiente' if intentos < MAX_INTENTOS else 'fallida',
+            intentos=intentos,
+            error=f'❌ {error}'[:200],
+            enviar_desde=timezone.now() + timedelta(seconds=espera),
+        )
+
+
+def _posponer(ids, segundos=ESPERA_BASE_REINTENTO):
+    """Vuelven a la cola sin contar un intento (el problema es el servidor)"""
+    Notificacion.todos.filter(id__in=ids).update(
+        estado='pendiente',
+        enviar_desde=timezone.now() + timedelta(seconds=segundos),
+    )
+
+
+def enviar_pendientes(limite=LOTE):
+    """Envía un lote de avisos; devuelve cuántos se enviaron, fallaron o se pospusieron"""
+    liberar_atascadas()
+    ids = reclamar(limite)
+    if not ids:
+        return {'enviadas': 0, 'fallidas': 0, 'pospuestas': 0}
+
+    # Mismo canal, destinatario y texto: se envía una sola vez
+    grupos = {}
+    for notificacion, (asunto, cuerpo) in _renderizar(Notificacion.todos.filter(id__in=ids)):
+        clave = (notificacion.canal, notificacion.destinatario.lower(), asunto, cuerpo)
+        grupos.setdefault(clave, []).append(notificacion)
+
+    resultado = {'enviadas': 0, 'fallidas': 0, 'pospuestas': 0}
+    conexion = get_connection()
+    try:
+        conexion.open()
+    except Exception as e:
+        logger.warning('No se pudo conectar al servidor de correo: %s', e)
+        _posponer(ids)
+        resultado['pospuestas'] = len(ids)
+        return resultado
+
+    errores_seguidos = 0
+    try:
+        for (canal, destinatario, asunto, cuerpo), grupo in grupos.items():
+            if errores_seguidos >= MAX_ERRORES_SEGUIDOS:
+                _posponer([n.id for n in grupo])
+                resultado['pospuestas'] += len(grupo)
+                continue
+            try:
+                _enviar(conexion, canal, destinatario, asunto, cuerpo)
+            except Exception as e:
+                logger.warning('Falló el aviso a %s: %s', destinatario, e)
+                errores_seguidos += 1
+                _fallo(grupo, e)
+                resultado['fallidas'] += len(grupo)
+            else:
+                errores_seguidos = 0
+                Notificacion.todos.filter(id__in=[n.id for n in grupo]).update(
+                    estado='enviada', enviada=timezone.now(), intentos=F('intentos') + 1, error='',
+                )
+                resultado['enviadas'] += len(grupo)
+    finally:
+        conexion.close()
+    return resultado
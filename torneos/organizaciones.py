@@ -0,0 +1,90 @@
+"""
+Organización (liga/club) activa en la petición y managers que filtran por ella.
+
+El middleware ``OrganizacionMiddleware`` activa la organización al inicio de
+cada petición; fuera de una petición (comandos, shell) no hay organización
+activa y los managers devuelven todas las filas. En una petición sin
+organización (usuario que no es miembro de ninguna) se activa ``NINGUNA``,
+que no coincide con ninguna fila: el aislamiento falla cerrado.
+"""
+
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import models
+
+_organizacion_actual = ContextVar('organizacion_actual', default=None)
+
+# Organización "vacía": los managers filtran por ella y no devuelven nada
+NINGUNA = 0
+
+
+def organizacion_actual():
+    """ID de la organización activa, NINGUNA, o None (sin filtro)"""
+    return _organizacion_actual.get()
+
+
+def organizacion_para_guardar():
+    """Organización con la que se crean filas nuevas (None en vez de NINGUNA)"""
+    return _organizacion_actual.get() or None
+
+
+def activar(organizacion_id):
+    return _organizacion_actual.set(organizacion_id)
+
+
+def desactivar(token):
+    _organizacion_actual.reset(token)
+
+
+@contextmanager
+def usar_organizacion(organizacion_id):
+    """Para comandos y pruebas: ``with usar_organizacion(org.id): ...``"""
+    token = activar(organizacion_id)
+    try:
+        yield
+    finally:
+        desactivar(token)
+
+
+def organizacion_del_torneo(vista):
+    """Para páginas públicas de un torneo (la llave): se ven con la organización
+    del torneo, aunque quien la mira no tenga ninguna elegida"""
+
+    @functools.wraps(vista)
+    def envoltura(request, torneo_id, *args, **kwargs):
+        from .models import Torneo
+
+        organizacion_id = Torneo.todos.filter(id=torneo_id).values_list('organizacion_id', flat=True).first()
+        if organizacion_id is None:
+            return vista(request, torneo_id, *args, **kwargs)
+        with usar_organizacion(organizacion_id):
+            return vista(request, torneo_id, *args, **kwargs)
+
+    return envoltura
+
+
+class PorOrganizacionManager(models.Manager):
+    """Manager por defecto de los modelos de una organización.
+
+    ``campo`` es la ruta hasta la organización. Es atributo de clase (y no
+    argumento) porque Django crea los managers de relaciones inversas
+    (``torneo.equipo_set``) a partir de esta clase sin argumentos.
+    """
+    campo = 'organizacion'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        organizacion_id = organizacion_actual()
+        if organizacion_id is None:
+            return queryset
+        return queryset.filter(**{f'{self.campo}_id': organizacion_id})
+
+
+class PorEquipoOrganizacionManager(PorOrganizacionManager):
+    campo = 'equipo__organizacion'
+
+
+class PorTorneoOrganizacionManager(PorOrganizacionManager):
+    campo = 'torneo__organizacion'
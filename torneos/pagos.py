@@ -0,0 +1,204 @@
+"""
+Registro de pagos de inscripción y conciliación de extractos bancarios.
+
+Todas las funciones dejan ``Equipo.monto_pagado``, ``Equipo.pago_confirmado`` y
+el ``LibroPagos`` del torneo consistentes entre sí.
+"""
+
+import csv
+import io
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import F
+
+from . import auditoria, notificaciones
+from .models import Equipo, LibroPagos, Pago
+from .utils import normalizar
+
+PATRON_REFERENCIA = re.compile(r'EQ-?(\d+)', re.IGNORECASE)
+
+
+def _aplicar(equipo, monto):
+    """Suma el monto al equipo en memoria y recalcula si quedó pagado"""
+    equipo.monto_pagado += monto
+    equipo.pago_confirmado = equipo.monto_pagado >= equipo.torneo.precio_inscripcion
+
+
+def _releer_bloqueado(equipo):
+    """Trae el total guardado del equipo bloqueando su fila hasta el fin de la transacción.
+
+    El bloqueo es un UPDATE que no cambia nada, antes de leer: en SQLite
+    ``select_for_update`` no bloquea y una transacción que empieza leyendo no
+    espera a la otra al escribir (falla con "database is locked").
+    """
+    Equipo.todos.filter(id=equipo.id).update(monto_pagado=F('monto_pagado'))
+    actual = Equipo.todos.values('monto_pagado', 'pago_confirmado').get(id=equipo.id)
+    equipo.monto_pagado = actual['monto_pagado']
+    equipo.pago_confirmado = actual['pago_confirmado']
+
+
+@transaction.atomic
+def registrar_pago(equipo, monto, referencia='', origen='manual'):
+    """Registra un abono (puede ser parcial) a la inscripción de un equipo"""
+    monto = Decimal(monto)
+    if not monto.is_finite() or monto <= 0:
+        raise ValueError("El monto debe ser mayor que cero")
+
+    # Se bloquea la fila del equipo y se parte del total guardado: dos abonos
+    # a la vez no se pisan el monto pagado
+    _releer_bloqueado(equipo)
+    pago = Pago.objects.create(equipo=equipo, monto=monto, referencia=referencia, origen=origen)
+    ya_pagado = equipo.pago_confirmado
+    _aplicar(equipo, monto)
+    Equipo.objects.filter(id=equipo.id).update(
+        monto_pagado=equipo.monto_pagado,
+        pago_confirmado=equipo.pago_confirmado,
+    )
+    LibroPagos.recalcular([equipo.torneo_id])
+    auditoria.registrar(
+        'pago', equipo, torneo_id=equipo.torneo_id,
+        equipo=equipo.id, monto=str(monto), referencia=referencia, origen=origen,
+    )
+    if equipo.pago_confirmado and not ya_pagado:
+        notificaciones.pago_confirmado(equipo)
+    return pago
+
+
+@transaction.atomic
+def anular_pagos(equipo, referencia='Anulación manual'):
+    """Deja al equipo sin pagos registrando un movimiento negativo"""
+    _releer_bloqueado(equipo)
+    anulado = equipo.monto_pagado
+    if anulado:
+        Pago.objects.create(equipo=equipo, monto=-anulado, referencia=referencia)
+
+    equipo.monto_pagado = 0
+    equipo.pago_confirmado = False
+    Equipo.objects.filter(id=equipo.id).update(monto_pagado=0, pago_confirmado=False)
+    LibroPagos.recalcular([equipo.torneo_id])
+    auditoria.registrar('anulacion', equipo, torneo_id=equipo.torneo_id, equipo=equipo.id, monto=str(anulado))
+
+
+def leer_extracto(archivo):
+    """Lee un CSV de banco con columnas monto y al menos una de
+    referencia / email / nombre (los encabezados no distinguen mayúsculas)"""
+    contenido = archivo.read()
+    if isinstance(contenido, bytes):
+        try:
+            contenido = contenido.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ValueError('El archivo no está en UTF-8: guárdalo como "CSV UTF-8" y vuelve a subirlo')
+
+    muestra = contenido[:2048]
+    try:
+        dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+    except csv.Error:
+        dialecto = csv.excel
+
+    lector = csv.DictReader(io.StringIO(contenido), dialect=dialecto)
+    for fila in lector:
+        yield {normalizar(k): (v or '').strip() for k, v in fila.items() if k}
+
+
+class IndiceEquipos:
+    """Índices en memoria por referencia, email y nombre.
+
+    Se construye con una sola consulta para que conciliar N filas no haga
+    N consultas.
+    """
+
+    def __init__(self, equipos):
+        self.por_id = {}
+        self.por_email = {}
+        self.por_nombre = {}
+        for equipo in equipos:
+            self.por_id[equipo.id] = equipo
+            self.por_email.setdefault(equipo.email.strip().lower(), equipo)
+            self.por_nombre.setdefault(normalizar(equipo.nombre), equipo)
+
+    def buscar(self, fila):
+        texto = ' '.join([fila.get('referencia', ''), fila.get('descripcion', ''), fila.get('concepto', '')])
+        for encontrado in PATRON_REFERENCIA.findall(texto):
+            equipo = self.por_id.get(int(encontrado))
+            if equipo:
+                return equipo, 'referencia'
+
+        email = fila.get('email', '').lower()
+        if email in self.por_email:
+            return self.por_email[email], 'email'
+
+        nombre = normalizar(fila.get('nombre', '') or fila.get('equipo', ''))
+        if nombre in self.por_nombre:
+            return self.por_nombre[nombre], 'nombre'
+
+        return None, None
+
+
+@transaction.atomic
+def conciliar_extracto(archivo, torneo=None):
+    """Concilia un extracto bancario completo en una sola pasada.
+
+    Devuelve un diccionario con las filas conciliadas y las que no se
+    pudieron asociar a ningún equipo. ValueError si el archivo no se puede leer.
+    """
+    filas = list(leer_extracto(archivo))
+
+    equipos = Equipo.objects.all()
+    if torneo is not None:
+        equipos = equipos.filter(torneo=torneo)
+    # Bloqueados hasta el final (con una escritura, como _releer_bloqueado):
+    # un abono manual o otra conciliación a la vez esperan y no se pisan
+    equipos.update(monto_pagado=F('monto_pagado'))
+    indice = IndiceEquipos(equipos.select_related('torneo'))
+
+    pagos = []
+    modificados = {}
+    ya_pagados = {}
+    conciliados = []
+    sin_conciliar = []
+
+    for numero, fila in enumerate(filas, start=2):
+        try:
+            monto = Decimal(fila.get('monto', '').replace(',', '.'))
+            if not monto.is_finite():  # 'NaN', 'Infinity'
+                raise InvalidOperation
+        except InvalidOperation:
+            sin_conciliar.append({'linea': numero, 'fila': fila, 'motivo': 'Monto inválido'})
+            continue
+
+        if monto <= 0:
+            sin_conciliar.append({'linea': numero, 'fila': fila, 'motivo': 'Monto no positivo'})
+            continue
+
+        equipo, criterio = indice.buscar(fila)
+        if equipo is None:
+            sin_conciliar.append({'linea': numero, 'fila': fila, 'motivo': 'Sin equipo asociado'})
+            continue
+
+        referencia = fila.get('referencia') or fila.get('descripcion', '')
+        pagos.append(Pago(equipo=equipo, monto=monto, referencia=referencia[:100], origen='banco'))
+        ya_pagados.setdefault(equipo.id, equipo.pago_confirmado)
+        _aplicar(equipo, monto)
+        modificados[equipo.id] = equipo
+        conciliados.append({'linea': numero, 'equipo': equipo, 'monto': monto, 'criterio': criterio})
+
+    Pago.objects.bulk_create(pagos)
+    Equipo.objects.bulk_update(modificados.values(), ['monto_pagado', 'pago_confirmado'])
+    LibroPagos.recalcular({equipo.torneo_id for equipo in modificados.values()})
+    for c in conciliados:
+        auditoria.registrar(
+            'conciliacion', c['equipo'], torneo_id=c['equipo'].torneo_id,
+            equipo=c['equipo'].id, monto=str(c['monto']), linea=c['linea'], criterio=c['criterio'],
+        )
+    for equipo in modificados.values():
+        if equipo.pago_confirmado and not ya_pagados[equipo.id]:
+            notificaciones.pago_confirmado(equipo)
+
+    return {
+        'conciliados': conciliados,
+        'sin_conciliar': sin_conciliar,
+        'equipos_pagados': sum(1 for e in modificados.values() if e.pago_confirmado),
+        'total': sum((c['monto'] for c in conciliados), Decimal(0)),
+    }
@@ -0,0 +1,220 @@
+"""
+Perfilado de peticiones en producción (solo lo ve el staff).
+
+Se activa para una petición con ``?perfilar=1`` o la cabecera
+``X-Perfilar: 1`` (usuarios staff), o al azar con la proporción
+``PERFILADO_MUESTREO`` (0.01 = una de cada cien peticiones). Modos:
+
+- ``muestreo``: un hilo mira la pila de la petición cada 5 ms (barato).
+- ``cprofile``: además del muestreo, cProfile completo (cuenta llamadas
+  exactas, pero hace más lenta la petición).
+
+Cada perfil se guarda en ``PERFILADO_DIR`` junto con las consultas SQL de la
+petición; se conservan solo los ``PERFILADO_MAXIMO`` más recientes. Se ven
+en /admin/perfiles/ y se exportan en formato "folded" (flamegraph.pl,
+speedscope).
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+MODOS = ('cprofile', 'muestreo')
+
+
+def directorio():
+    return Path(getattr(settings, 'PERFILADO_DIR', settings.BASE_DIR / 'perfiles'))
+
+
+def _nombre_funcion(codigo_archivo, linea, funcion):
+    return f"{funcion} ({os.path.basename(codigo_archivo)}:{linea})"
+
+
+class Muestreador(threading.Thread):
+    """Perfil estadístico: cuenta las pilas del hilo de la petición"""
+
+    def __init__(self, hilo_id, intervalo=0.005):
+        super().__init__(daemon=True)
+        self.hilo_id = hilo_id
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            frame = sys._current_frames().get(self.hilo_id)
+            pila = []
+            while frame is not None:
+                codigo = frame.f_code
+                pila.append(_nombre_funcion(codigo.co_filename, codigo.co_firstlineno, codigo.co_name))
+                frame = frame.f_back
+            if pila:
+                self.pilas[';'.join(reversed(pila))] += 1
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+
+class RegistroSQL:
+    """execute_wrapper que anota cada consulta y cuánto tardó"""
+
+    def __init__(self):
+        self.consultas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas.append({
+                'sql': sql,
+                'ms': round((time.perf_counter() - inicio) * 1000, 2),
+                'db': context['connection'].alias,
+            })
+
+
+def _rotar(carpeta, maximo):
+    perfiles = sorted(carpeta.glob('*.json'))
+    for viejo in perfiles[:max(0, len(perfiles) - maximo)]:
+        for archivo in carpeta.glob(viejo.stem + '.*'):
+            archivo.unlink(missing_ok=True)
+
+
+def guardar(request, modo, segundos, consultas, perfil=None, pilas=None):
+    """Escribe el perfil y sus metadatos; devuelve el nombre"""
+    carpeta = directorio()
+    carpeta.mkdir(parents=True, exist_ok=True)
+
+    ruta = re.sub(r'[^a-zA-Z0-9]+', '-', request.path).strip('-') or 'inicio'
+    nombre = f"{timezone.now():%Y%m%d-%H%M%S-%f}-{ruta[:40]}"
+
+    if perfil is not None:
+        perfil.dump_stats(str(carpeta / f'{nombre}.prof'))
+    if pilas is not None:
+        (carpeta / f'{nombre}.folded').write_text(
+            '\n'.join(f'{pila} {cantidad}' for pila, cantidad in pilas.most_common()), encoding='utf-8'
+        )
+
+    metadatos = {
+        'nombre': nombre,
+        'fecha': timezone.now().isoformat(),
+        'metodo': request.method,
+        'ruta': request.get_full_path(),
+        'usuario': request.user.get_username() if request.user.is_authenticated else '',
+        'modo': modo,
+        'ms': round(segundos * 1000, 1),
+        'consultas': consultas,
+    }
+    (carpeta / f'{nombre}.json').write_text(json.dumps(metadatos, ensure_ascii=False), encoding='utf-8')
+
+    _rotar(carpeta, getattr(settings, 'PERFILADO_MAXIMO', 50))
+    return nombre
+
+
+def listar():
+    """Metadatos de los perfiles guardados, del más nuevo al más viejo"""
+    carpeta = directorio()
+    if not carpeta.exists():
+        return []
+    perfiles = []
+    for archivo in sorted(carpeta.glob('*.json'), reverse=True):
+        datos = json.loads(archivo.read_text(encoding='utf-8'))
+        datos['total_consultas'] = len(datos['consultas'])
+        datos['ms_sql'] = round(sum(c['ms'] for c in datos['consultas']), 1)
+        perfiles.append(datos)
+    return perfiles
+
+
+def abrir(nombre):
+    """Metadatos de un perfil (None si no existe o el nombre no es válido)"""
+    if not re.fullmatch(r'[\w-]+', nombre):
+        return None
+    archivo = directorio() / f'{nombre}.json'
+    if not archivo.exists():
+        return None
+    return json.loads(archivo.read_text(encoding='utf-8'))
+
+
+def folded(nombre):
+    """Pilas muestreadas en formato folded (una pila y su cantidad por línea)"""
+    return (directorio() / f'{nombre}.folded').read_text(encoding='utf-8')
+
+
+def funciones_principales(nombre, limite=30):
+    """Las funciones con más tiempo acumulado (solo perfiles de cProfile)"""
+    archivo = directorio() / f'{nombre}.prof'
+    if not archivo.exists():
+        return []
+    estadisticas = pstats.Stats(str(archivo)).stats
+    filas = sorted(estadisticas.items(), key=lambda item: item[1][3], reverse=True)[:limite]
+    return [
+        {
+            'funcion': _nombre_funcion(*funcion),
+            'llamadas': datos[1],
+            'propio_ms': round(datos[2] * 1000, 2),
+            'acumulado_ms': round(datos[3] * 1000, 2),
+        }
+        for funcion, datos in filas
+    ]
+
+
+class PerfiladoMiddleware:
+    """Perfila la petición si el staff lo pide o si toca por muestreo"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def modo(self, request):
+        pedido = request.GET.get('perfilar') or request.headers.get('X-Perfilar')
+        if pedido and request.user.is_authenticated and request.user.is_staff:
+            return pedido if pedido in MODOS else 'cprofile'
+
+        muestreo = getattr(settings, 'PERFILADO_MUESTREO', 0)
+        if muestreo and random.random() < muestreo:
+            return 'muestreo'
+        return None
+
+    def __call__(self, request):
+        modo = self.modo(request)
+        if modo is None or request.path.startswith('/admin/perfiles/'):
+            return self.get_response(request)
+
+        sql = RegistroSQL()
+        perfil = None
+        with ExitStack() as pila:
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(sql))
+
+            # El muestreador corre siempre: cProfile no guarda pilas completas y
+            # el gráfico de llamas sale de las muestras
+            inicio = time.perf_counter()
+            muestreador = Muestreador(threading.get_ident())
+            muestreador.start()
+            if modo == 'cprofile':
+                perfil = cProfile.Profile()
+                perfil.enable()
+            try:
+                respuesta = self.get_response(request)
+            finally:
+                if perfil is not None:
+                    perfil.disable()
+                muestreador.parar()
+                segundos = time.perf_counter() - inicio
+
+        nombre = guardar(request, modo, segundos, sql.consultas, perfil=perfil, pilas=muestreador.pilas)
+        respuesta['X-Perfil'] = nombre
+        return respuesta
@@ -0,0 +1,262 @@
+"""
+Ratings tipo Elo y probabilidad de que cada equipo llegue a cada ronda.
+
+Cada resultado de la llave mueve el rating de los dos equipos (a lo sumo
+``K`` puntos). Los ratings se recalculan desde la llave completa, así
+deshacer o corregir un resultado los deja bien sin más trabajo.
+
+La predicción simula el resto de la llave muchas veces a la vez con NumPy:
+cada ronda es una matriz (partidos × simulaciones) y todos sus partidos se
+sortean en una sola operación, sin bucles de Python por simulación. Los
+ganadores pasan a la ronda siguiente como lo hace ``avanzar_ganador``: el
+partido ``i`` alimenta al ``i // 2`` (o, en las llaves anteriores a los
+lugares fijos, al primer hueco libre, con los partidos pendientes jugados en
+orden de id).
+
+Tras cada resultado la predicción se recalcula en segundo plano (tarea
+``predecir``), así ningún visitante espera la simulación. Se guarda en la base
+(``PrediccionTorneo``) con la versión del torneo (``Torneo.actualizado``) de la
+que salió, para que la vean todos los procesos web y no solo el worker. Si la
+guardada es de otra versión, la página sale sin probabilidades y se encola el
+recálculo (una sola tarea pendiente por torneo).
+
+NumPy es opcional: sin él no hay predicción (``predecir`` devuelve None).
+"""
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .eventos import NOMBRES_RONDAS, ORDEN_RONDAS, estado_actual
+from .models import Equipo, PrediccionTorneo, Tarea, Torneo
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: sin él no se calculan probabilidades
+    np = None
+
+RATING_INICIAL = 1500
+K = 32
+SIMULACIONES = 100_000
+LOTE = 25_000  # simulaciones por pasada, para acotar la memoria
+
+
+# ===== RATINGS =====
+
+def esperado(rating_a, rating_b):
+    """Probabilidad de que gane A según la diferencia de ratings"""
+    return 1 / (1 + 10 ** ((rating_b - rating_a) / 400))
+
+
+def actualizar_elo(ganador, perdedor, k=K):
+    """Ratings del ganador y del perdedor después del partido"""
+    cambio = k * (1 - esperado(ganador, perdedor))
+    return ganador + cambio, perdedor - cambio
+
+
+def calcular_ratings(estado):
+    """Rating de cada equipo que jugó, repasando los resultados ronda por ronda"""
+    ratings = {}
+    jugados = sorted(
+        (ORDEN_RONDAS.index(p['ronda']), int(pid), p)
+        for pid, p in estado['partidos'].items()
+        if p['ganador'] is not None
+    )
+    for _, _, partido in jugados:
+        ganador = partido['ganador']
+        perdedor = partido['visitante'] if ganador == partido['local'] else partido['local']
+        ratings[ganador], ratings[perdedor] = actualizar_elo(
+            ratings.get(ganador, RATING_INICIAL), ratings.get(perdedor, RATING_INICIAL)
+        )
+    return ratings
+
+
+def actualizar(torneo_id, estado=None):
+    """Recalcula los ratings del torneo y programa su predicción (tras cada resultado)"""
+    ratings = calcular_ratings(estado or estado_actual(torneo_id))
+    cambiados = []
+    for equipo in Equipo.todos.filter(torneo_id=torneo_id).only('id', 'rating'):
+        nuevo = round(ratings.get(equipo.id, RATING_INICIAL), 1)
+        if nuevo != equipo.rating:
+            equipo.rating = nuevo
+            cambiados.append(equipo)
+    Equipo.todos.bulk_update(cambiados, ['rating'])
+    programar(torneo_id)
+
+
+def programar(torneo_id):
+    """Encola el recálculo de la predicción si no hay ya uno esperando"""
+    if np is None:
+        return None
+    if Tarea.todos.filter(nombre='predecir', estado='pendiente', argumentos__torneo_id=torneo_id).exists():
+        return None
+
+    from .tareas import encolar
+    return encolar('predecir', torneo_id=torneo_id)
+
+
+# ===== SIMULACIÓN =====
+
+def _lugares(partidos, anteriores, lugares_fijos):
+    """(partido, lado) al que llega el ganador de cada partido pendiente de la ronda anterior"""
+    if lugares_fijos:
+        return [(j // 2, j % 2) for j in anteriores]
+    # Llaves anteriores: en el orden en que los llena avanzar_ganador
+    return (
+        [(j, 0) for j, partido in enumerate(partidos) if partido[0] is None]
+        + [(j, 1) for j, partido in enumerate(partidos) if partido[1] is None]
+    )
+
+
+def _simular_lote(rondas, probabilidad, simulaciones, generador, conteo, lugares_fijos=True):
+    """Simula ``simulaciones`` llaves y suma en ``conteo`` quién llegó a cada ronda.
+
+    Las matrices son partidos × simulaciones: cada fila (un partido) queda
+    contigua en memoria. Los partidos con los dos equipos ya conocidos (la
+    primera ronda) usan una sola probabilidad por fila; solo los que dependen
+    de rondas simuladas buscan la probabilidad de cada cruce.
+    """
+    total_equipos = len(probabilidad)
+    pendientes = []  # (partido, ganadores) de la ronda anterior que aún no tienen lugar
+    for numero, partidos in enumerate(rondas):
+        libres = _lugares(partidos, [j for j, _ in pendientes], lugares_fijos)
+        if len(libres) != len(pendientes) or any(
+            j >= len(partidos) or partidos[j][lado] is not None for j, lado in libres
+        ):
+            raise ValueError("La llave no está completa: faltan equipos o partidos")
+        equipos = [[local, visitante] for local, visitante, _ in partidos]
+        for (j, lado), (_, ganadores) in zip(libres, pendientes):
+            equipos[j][lado] = ganadores
+
+        ganadores = np.empty((len(partidos), simulaciones), dtype=np.int32)
+        fijos, variables = [], []
+        for j, (_, _, ganador) in enumerate(partidos):
+            if ganador is not None:
+                ganadores[j] = ganador
+            elif isinstance(equipos[j][0], int) and isinstance(equipos[j][1], int):
+                fijos.append(j)
+            else:
+                variables.append(j)
+
+        # Todos los partidos de la ronda en todas las simulaciones de una vez
+        if fijos:
+            locales, visitantes = np.array([equipos[j] for j in fijos]).T[:, :, None]
+            gana_local = generador.random((len(fijos), simulaciones), dtype=np.float32) < probabilidad[locales, visitantes]
+            ganadores[fijos] = np.where(gana_local, locales, visitantes)
+        if variables:
+            locales = np.empty((len(variables), simulaciones), dtype=np.int32)
+            visitantes = np.empty_like(locales)
+            for fila, j in enumerate(variables):
+                locales[fila], visitantes[fila] = equipos[j]
+            # Índice plano del cruce (local, visitante) en la matriz de probabilidades
+            cruces = locales * total_equipos + visitantes
+            gana_local = generador.random(locales.shape, dtype=np.float32) < probabilidad.ravel()[cruces]
+            np.copyto(visitantes, locales, where=gana_local)  # visitantes queda con los ganadores
+            ganadores[variables] = visitantes
+
+        # Los ganadores de esta ronda son los que llegan a la siguiente (o al título)
+        conteo[:, numero + 1] += np.bincount(ganadores.ravel(), minlength=total_equipos)
+        pendientes = [(j, ganadores[j]) for j, partido in enumerate(partidos) if partido[2] is None]
+
+
+def simular(rondas, ratings, simulaciones=SIMULACIONES, semilla=None, lugares_fijos=True):
+    """Probabilidad de que cada equipo llegue a cada ronda y sea campeón.
+
+    ``rondas`` va de la primera a la final; cada una es una lista de
+    ``(local, visitante, ganador)`` con índices de equipo (0..n-1) o None.
+    Devuelve una matriz equipos × (rondas + 1); la última columna es el título.
+    ``lugares_fijos=False`` es para las llaves anteriores (primer hueco libre).
+    """
+    ratings = np.asarray(ratings, dtype=np.float64)
+    # Probabilidad de cada cruce posible, calculada una sola vez (equipos × equipos)
+    probabilidad = esperado(ratings[:, None], ratings[None, :]).astype(np.float32)
+
+    conteo = np.zeros((len(ratings), len(rondas) + 1), dtype=np.int64)
+    conteo[:, 0] = simulaciones  # la primera ronda la juegan todos
+    generador = np.random.default_rng(semilla)
+    hechas = 0
+    while hechas < simulaciones:
+        lote = min(LOTE, simulaciones - hechas)
+        _simular_lote(rondas, probabilidad, lote, generador, conteo, lugares_fijos)
+        hechas += lote
+    return conteo / simulaciones
+
+
+def _rondas(estado):
+    """Partidos de la llave por ronda (de la primera a la final), en orden de id"""
+    rondas = {}
+    for pid in sorted(estado['partidos'], key=int):
+        partido = estado['partidos'][pid]
+        rondas.setdefault(partido['ronda'], []).append((partido['local'], partido['visitante'], partido['ganador']))
+    return [(ronda, rondas[ronda]) for ronda in ORDEN_RONDAS if ronda in rondas]
+
+
+def _calcular(torneo):
+    estado = estado_actual(torneo.id)
+    rondas = _rondas(estado)
+    if not rondas or any(None in partido[:2] for partido in rondas[0][1]):
+        return {}  # sin llave o sin equipos asignados
+
+    ids = sorted({equipo for partido in rondas[0][1] for equipo in partido[:2]})
+    indice = {equipo_id: i for i, equipo_id in enumerate(ids)}
+    equipos = Equipo.todos.in_bulk(ids)
+
+    def a_indice(equipo_id):
+        return None if equipo_id is None else indice[equipo_id]
+
+    probabilidades = simular(
+        [[tuple(a_indice(e) for e in partido) for partido in partidos] for _, partidos in rondas],
+        [equipos[equipo_id].rating for equipo_id in ids],
+        lugares_fijos=estado.get('lugares_fijos', False),
+    )
+
+    filas = [
+        {
+            'equipo': equipo_id,
+            'nombre': equipos[equipo_id].nombre,
+            'rating': round(equipos[equipo_id].rating),
+            # La primera ronda la juegan todos: se muestra desde la segunda
+            'probabilidades': [round(float(p) * 100, 1) for p in probabilidades[indice[equipo_id], 1:]],
+        }
+        for equipo_id in ids
+    ]
+    filas.sort(key=lambda fila: fila['probabilidades'][::-1], reverse=True)
+    return {
+        'columnas': [NOMBRES_RONDAS[ronda] for ronda, _ in rondas[1:]] + ['Campeón'],
+        'filas': filas,
+        'simulaciones': SIMULACIONES,
+    }
+
+
+def _guardar(torneo):
+    """Calcula la predicción y la guarda con la versión del torneo que se leyó antes"""
+    version = torneo.actualizado
+    prediccion = _calcular(torneo)
+    # Solo pisa una guardada de la misma versión o anterior: un cálculo lento
+    # que termina tarde no reemplaza a uno posterior
+    guardadas = PrediccionTorneo.objects.filter(torneo=torneo, version__lte=version).update(
+        version=version, datos=prediccion, calculada=timezone.now()
+    )
+    if not guardadas:
+        try:
+            with transaction.atomic():
+                PrediccionTorneo.objects.create(torneo=torneo, version=version, datos=prediccion)
+        except IntegrityError:
+            pass  # ya hay una más nueva (u otra tarea la creó recién)
+    return prediccion
+
+
+def recalcular(torneo_id):
+    """Para la tarea: calcula con el estado actual de la llave y lo guarda"""
+    return _guardar(Torneo.todos.get(id=torneo_id))
+
+
+def predecir(torneo):
+    """Probabilidades por equipo y ronda de la versión actual del torneo (None si no hay)"""
+    if np is None:
+        return None
+    guardada = PrediccionTorneo.objects.filter(torneo=torneo).values_list('version', 'datos').first()
+    if guardada is None or guardada[0] != torneo.actualizado:
+        # Vieja o sin calcular: la calcula la tarea, no el visitante
+        programar(torneo.id)
+        return None
+    return guardada[1] or None
@@ -0,0 +1,107 @@
+"""
+Lecturas desde una réplica de la base de datos.
+
+Si ``DATABASES`` tiene el alias ``replica``, las vistas públicas marcadas con
+``@solo_lectura`` (historial, calendario, llave...) leen de ella y dejan el
+principal para las escrituras (anotar resultados, pagos). Todo lo demás
+(admin, formularios, comandos, tareas) sigue usando ``default``.
+
+La réplica puede ir unos segundos atrasada. Para que quien acaba de escribir
+vea su cambio, ``ReplicaMiddleware`` nota si la petición escribió algo y deja
+una cookie por ``REPLICA_RETRASO`` segundos: mientras exista, ese navegador
+lee del principal. Dentro de una petición, después de la primera escritura
+también se lee del principal.
+"""
+
+import functools
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA = 'replica'
+COOKIE = 'escribio'
+
+_leer_replica = ContextVar('leer_replica', default=False)
+_escribio = ContextVar('escribio', default=None)
+
+
+def hay_replica():
+    return REPLICA in connections.settings
+
+
+def retraso():
+    """Segundos que quien escribió sigue leyendo del principal"""
+    return getattr(settings, 'REPLICA_RETRASO', 10)
+
+
+class ReplicaRouter:
+    """Escrituras al principal; lecturas a la réplica solo si la vista lo pidió"""
+
+    def db_for_read(self, model, **hints):
+        if not _leer_replica.get() or _escribio.get() or not hay_replica():
+            return DEFAULT_DB_ALIAS
+        # Dentro de una transacción se lee lo que la transacción ve
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        if _escribio.get() is False:
+            _escribio.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        alias = {DEFAULT_DB_ALIAS, REPLICA}
+        if obj1._state.db in alias and obj2._state.db in alias:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # La réplica recibe el esquema del principal al replicar
+        return False if db == REPLICA else None
+
+
+class ReplicaMiddleware:
+    """Recuerda (con una cookie) a quien escribió para no mandarlo a la réplica"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _escribio.set(False)
+        try:
+            response = self.get_response(request)
+            escribio = _escribio.get()
+        finally:
+            _escribio.reset(token)
+
+        if escribio and hay_replica():
+            response.set_cookie(
+                COOKIE, int(time.time()) + retraso(), max_age=retraso(), httponly=True, samesite='Lax',
+            )
+        return response
+
+
+def _escribio_hace_poco(request):
+    try:
+        return int(request.COOKIES.get(COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def solo_lectura(vista):
+    """La vista lee de la réplica en GET/HEAD, salvo que el navegador haya escrito hace poco"""
+
+    @functools.wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or _escribio_hace_poco(request):
+            return vista(request, *args, **kwargs)
+        token = _leer_replica.set(True)
+        try:
+            return vista(request, *args, **kwargs)
+        finally:
+            _leer_replica.reset(token)
+
+    return envoltura
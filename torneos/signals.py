@@ -0,0 +1,51 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import busqueda
+from .models import Equipo, Jugador, LibroPagos, Partido, Torneo
+
+
+@receiver(post_save, sender=Equipo)
+@receiver(post_delete, sender=Equipo)
+def actualizar_libro_pagos(sender, instance, signal, **kwargs):
+    """Inscripciones, bajas y cambios hechos desde el admin también cuentan"""
+    # Al borrar no se crea: el torneo puede estar borrándose en cascada
+    LibroPagos.recalcular([instance.torneo_id], crear=signal is post_save)
+
+
+@receiver(post_save, sender=Equipo)
+def indexar_equipo(sender, instance, raw=False, **kwargs):
+    if not raw:
+        busqueda.programar_indexado(instance.id)
+
+
+@receiver(post_save, sender=Equipo)
+def copiar_torneo_jugadores(sender, instance, raw=False, created=False, **kwargs):
+    """Si el equipo cambia de torneo, sus jugadores también (índice único por torneo)"""
+    if not raw and not created:
+        Jugador.todos.filter(equipo=instance).exclude(torneo_id=instance.torneo_id).update(torneo_id=instance.torneo_id)
+
+
+@receiver(post_save, sender=Jugador)
+@receiver(post_delete, sender=Jugador)
+def indexar_jugadores(sender, instance, raw=False, **kwargs):
+    """Inscribir un equipo con 6 jugadores reindexa el equipo una vez, no 7"""
+    if not raw:
+        busqueda.programar_indexado(instance.equipo_id)
+
+
+@receiver(post_save, sender=Partido)
+@receiver(post_delete, sender=Partido)
+def invalidar_llave_partido(sender, instance, raw=False, **kwargs):
+    """avanzar_ganador, asignar equipos o editar en el admin cambian la llave (y su versión,
+    que también deja vieja a la predicción guardada)"""
+    if not raw:
+        Torneo.tocar(instance.torneo_id)
+
+
+@receiver(post_save, sender=Equipo)
+@receiver(post_delete, sender=Equipo)
+def tocar_torneo_equipo(sender, instance, raw=False, **kwargs):
+    """Los nombres de los equipos salen en la llave: cambia su ETag"""
+    if not raw:
+        Torneo.tocar(instance.torneo_id)
@@ -0,0 +1,179 @@
+// Marcador sin conexión: guarda los resultados en localStorage y los envía por lotes
+(function () {
+    const COLA = 'marcador:cola';
+    const PARTIDOS = 'marcador:partidos';
+    const AVISOS = 'marcador:avisos';
+    const MAX_LOTE = 200;
+
+    const raiz = document.getElementById('marcador');
+    let enviando = false;
+
+    function leer(clave, defecto) {
+        try {
+            return JSON.parse(localStorage.getItem(clave)) || defecto;
+        } catch (e) {
+            return defecto;
+        }
+    }
+
+    function guardar(clave, valor) {
+        localStorage.setItem(clave, JSON.stringify(valor));
+    }
+
+    function nuevoId() {
+        if (window.crypto && crypto.randomUUID) {
+            return crypto.randomUUID();
+        }
+        return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2);
+    }
+
+    function texto(etiqueta, contenido, clase) {
+        const elemento = document.createElement(etiqueta);
+        elemento.textContent = contenido;
+        if (clase) elemento.className = clase;
+        return elemento;
+    }
+
+    // ===== PANTALLA =====
+
+    function pintar() {
+        const cola = leer(COLA, []);
+        const enCola = new Map(cola.map(r => [r.partido, r]));
+        const contenedor = document.getElementById('partidos');
+        contenedor.replaceChildren();
+
+        const partidos = leer(PARTIDOS, []);
+        if (!partidos.length) {
+            contenedor.appendChild(texto('p', 'No hay partidos por jugar (o aún no se descargaron).', 'text-muted'));
+        }
+
+        partidos.forEach(partido => {
+            const tarjeta = document.createElement('div');
+            tarjeta.className = 'col-md-6';
+            const cuerpo = document.createElement('div');
+            cuerpo.className = 'card card-body';
+            cuerpo.appendChild(texto('div', partido.torneo + ' · ' + partido.ronda, 'small text-muted mb-2'));
+
+            const anotado = enCola.get(partido.id);
+            [partido.local, partido.visitante].forEach(equipo => {
+                const boton = texto('button', '🏆 ' + equipo.nombre, 'btn w-100 mb-2 ' +
+                    (anotado && anotado.ganador === equipo.id ? 'btn-success' : 'btn-outline-primary'));
+                boton.type = 'button';
+                boton.disabled = Boolean(anotado);
+                boton.addEventListener('click', () => anotar(partido, equipo));
+                cuerpo.appendChild(boton);
+            });
+            if (anotado) {
+                cuerpo.appendChild(texto('div', '⏳ Guardado en el dispositivo, falta enviarlo', 'small text-warning'));
+            }
+            tarjeta.appendChild(cuerpo);
+            contenedor.appendChild(tarjeta);
+        });
+
+        const avisos = document.getElementById('avisos');
+        avisos.replaceChildren();
+        leer(AVISOS, []).forEach(aviso => {
+            avisos.appendChild(texto('div', aviso, 'alert alert-warning py-2'));
+        });
+
+        document.getElementById('pendientes').textContent = cola.length + ' por enviar';
+        const conexion = document.getElementById('conexion');
+        conexion.textContent = navigator.onLine ? 'En línea' : 'Sin conexión';
+        conexion.className = 'badge ' + (navigator.onLine ? 'bg-success' : 'bg-danger');
+    }
+
+    function anotar(partido, equipo) {
+        const cola = leer(COLA, []);
+        cola.push({
+            id: nuevoId(),
+            partido: partido.id,
+            ganador: equipo.id,
+            anotado: new Date().toISOString(),
+        });
+        guardar(COLA, cola);
+        pintar();
+        sincronizar();
+    }
+
+    // ===== SERVIDOR =====
+
+    async function comprimir(cuerpo) {
+        if (!window.CompressionStream) {
+            return { cuerpo: cuerpo, cabeceras: {} };
+        }
+        const flujo = new Blob([cuerpo]).stream().pipeThrough(new CompressionStream('gzip'));
+        return { cuerpo: await new Response(flujo).blob(), cabeceras: { 'Content-Encoding': 'gzip' } };
+    }
+
+    async function descargarPartidos() {
+        const respuesta = await fetch(raiz.dataset.urlPartidos, { credentials: 'same-origin' });
+        if (respuesta.ok && !respuesta.redirected) {
+            guardar(PARTIDOS, (await respuesta.json()).partidos);
+        }
+    }
+
+    async function sincronizar() {
+        if (enviando || !navigator.onLine) {
+            pintar();
+            return;
+        }
+        enviando = true;
+        let quedan = false;
+        try {
+            const lote = leer(COLA, []).slice(0, MAX_LOTE);
+            if (lote.length) {
+                const { cuerpo, cabeceras } = await comprimir(JSON.stringify({ resultados: lote }));
+                const respuesta = await fetch(raiz.dataset.urlSincronizar, {
+                    method: 'POST',
+                    credentials: 'same-origin',
+                    headers: Object.assign({
+                        'Content-Type': 'application/json',
+                        'X-CSRFToken': raiz.dataset.csrf,
+                    }, cabeceras),
+                    body: cuerpo,
+                });
+                if (respuesta.redirected) {
+                    throw new Error('La sesión expiró: vuelve a iniciar sesión');
+                }
+                if (!respuesta.ok) {
+                    throw new Error('El servidor respondió ' + respuesta.status);
+                }
+
+                // Lo que el servidor ya contestó sale de la cola; los conflictos se avisan
+                const contestados = new Set();
+                const avisos = leer(AVISOS, []);
+                (await respuesta.json()).resultados.forEach(resultado => {
+                    contestados.add(resultado.id);
+                    if (resultado.estado !== 'aplicado') {
+                        avisos.push(resultado.mensaje);
+                    }
+                });
+                guardar(COLA, leer(COLA, []).filter(r => !contestados.has(r.id)));
+                guardar(AVISOS, avisos.slice(-20));
+                quedan = leer(COLA, []).length > 0;
+            }
+            await descargarPartidos();
+        } catch (error) {
+            // Sin conexión o error: la cola queda intacta y se reintenta luego
+            console.warn(error);
+        } finally {
+            enviando = false;
+            pintar();
+        }
+        if (quedan) {
+            // La cola tenía más de un lote
+            sincronizar();
+        }
+    }
+
+    document.getElementById('sincronizar').addEventListener('click', () => {
+        guardar(AVISOS, []);
+        sincronizar();
+    });
+    window.addEventListener('online', sincronizar);
+    window.addEventListener('offline', pintar);
+    setInterval(sincronizar, 30000);
+
+    pintar();
+    sincronizar();
+})();
@@ -0,0 +1,54 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se generan los .gz
+    brotli = None
+
+
+class ComprimidoManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Archivos estáticos con hash en el nombre y copias .gz/.br precomprimidas.
+
+    Todo se hace una sola vez en ``collectstatic``; en cada petición el
+    servidor solo tiene que elegir el archivo ya comprimido.
+    """
+
+    extensiones_comprimibles = ('.css', '.js', '.svg', '.html', '.txt', '.json', '.map')
+    tamano_minimo = 256  # bytes; por debajo comprimir no compensa
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed.add(hashed_name)
+            yield name, hashed_name, processed
+
+        if dry_run:
+            return
+
+        for hashed_name in sorted(hashed):
+            if hashed_name.endswith(self.extensiones_comprimibles):
+                self.comprimir(hashed_name)
+
+    def comprimir(self, name):
+        """Escribe name.gz (y name.br si hay brotli) solo si ocupan menos"""
+        with self.open(name) as original:
+            contenido = original.read()
+
+        if len(contenido) < self.tamano_minimo:
+            return
+
+        variantes = {'.gz': gzip.compress(contenido, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variantes['.br'] = brotli.compress(contenido)
+
+        for sufijo, comprimido in variantes.items():
+            if len(comprimido) >= len(contenido):
+                continue
+            destino = name + sufijo
+            if self.exists(destino):
+                self.delete(destino)
+            self._save(destino, ContentFile(comprimido))
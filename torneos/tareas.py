@@ -0,0 +1,225 @@
+"""
+Cola de tareas en segundo plano guardada en la tabla Tarea.
+
+Uso::
+
+    @registrar('preparar_torneo')
+    def preparar_torneo(tarea, torneo_id):
+        tarea.reportar(50, 'Generando llave')
+        ...
+
+    tarea = encolar('preparar_torneo', torneo_id=torneo.id)
+
+El worker (``python manage.py procesar_tareas``) reclama las tareas con un
+UPDATE condicional, así varios workers nunca toman la misma tarea.
+"""
+
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Tarea
+from .organizaciones import organizacion_para_guardar, usar_organizacion
+
+logger = logging.getLogger(__name__)
+
+REGISTRO = {}
+ESPERA_BASE_REINTENTO = 10  # segundos; se duplica en cada intento
+
+
+def registrar(nombre):
+    """Decorador que registra una función como tarea"""
+    def decorador(funcion):
+        REGISTRO[nombre] = funcion
+        return funcion
+    return decorador
+
+
+def encolar(nombre, max_intentos=3, ejecutar_desde=None, **argumentos):
+    """Crea la tarea y devuelve enseguida (o la ejecuta si TAREAS_SINCRONAS).
+
+    La fila se inserta en la transacción de quien encola: el worker no la ve
+    hasta que se confirma junto con los datos que la tarea va a leer, y si la
+    transacción se deshace la tarea desaparece con ella. En modo síncrono se
+    ejecuta al confirmar (enseguida si no hay transacción abierta).
+
+    Con ``ejecutar_desde`` el worker no la toma antes de esa hora (y en modo
+    síncrono queda en la cola si todavía no es su turno).
+    """
+    if nombre not in REGISTRO:
+        raise ValueError(f"Tarea desconocida: {nombre}")
+
+    tarea = Tarea.objects.create(
+        nombre=nombre,
+        argumentos=argumentos,
+        max_intentos=max_intentos,
+        ejecutar_desde=ejecutar_desde or timezone.now(),
+        organizacion_id=organizacion_para_guardar(),
+    )
+    if getattr(settings, 'TAREAS_SINCRONAS', False) and tarea.ejecutar_desde <= timezone.now():
+        def ejecutar_ya():
+            ejecutar(tarea.id)
+            tarea.refresh_from_db()
+
+        transaction.on_commit(ejecutar_ya)
+    return tarea
+
+
+def reclamar(limite):
+    """IDs de hasta ``limite`` tareas pendientes que este worker pudo tomar"""
+    candidatas = Tarea.todos.filter(
+        estado='pendiente',
+        ejecutar_desde__lte=timezone.now(),
+    ).order_by('ejecutar_desde').values_list('id', flat=True)[:limite]
+
+    reclamadas = []
+    for tarea_id in candidatas:
+        ahora = timezone.now()
+        tomada = Tarea.todos.filter(id=tarea_id, estado='pendiente').update(
+            estado='en_proceso',
+            iniciada=ahora,
+            latido=ahora,
+        )
+        if tomada:
+            reclamadas.append(tarea_id)
+    return reclamadas
+
+
+def ejecutar(tarea_id):
+    """Ejecuta una tarea ya reclamada (o recién creada si es síncrona)"""
+    tarea = Tarea.todos.get(id=tarea_id)
+    funcion = REGISTRO.get(tarea.nombre)
+    tarea.intentos += 1
+
+    try:
+        if funcion is None:
+            raise ValueError(f"Tarea desconocida: {tarea.nombre}")
+
+        with usar_organizacion(tarea.organizacion_id):
+            resultado = funcion(tarea, **tarea.argumentos)
+
+        Tarea.todos.filter(id=tarea.id).update(
+            estado='completada',
+            intentos=tarea.intentos,
+            progreso=100,
+            resultado=resultado,
+            terminada=timezone.now(),
+        )
+    except Exception as e:
+        logger.exception('Falló la tarea %s', tarea)
+        reintentar = tarea.intentos < tarea.max_intentos and funcion is not None
+        espera = ESPERA_BASE_REINTENTO * 2 ** (tarea.intentos - 1)
+        Tarea.todos.filter(id=tarea.id).update(
+            estado='pendiente' if reintentar else 'fallida',
+            intentos=tarea.intentos,
+            mensaje=f'❌ {e}'[:200],
+            error=traceback.format_exc(),
+            ejecutar_desde=timezone.now() + timedelta(seconds=espera),
+            terminada=None if reintentar else timezone.now(),
+        )
+    finally:
+        # En hilos/procesos del worker cada tarea usa y libera su propia conexión
+        if not getattr(settings, 'TAREAS_SINCRONAS', False):
+            connections.close_all()
+
+
+def latir(tarea_ids):
+    """Marca como vivas las tareas que este worker tiene en curso"""
+    if not tarea_ids:
+        return 0
+    return Tarea.todos.filter(id__in=list(tarea_ids), estado='en_proceso').update(latido=timezone.now())
+
+
+def liberar_atascadas(minutos=30):
+    """Devuelve a la cola tareas 'en_proceso' de un worker que murió.
+
+    Se mira el último latido (el worker late por sus tareas en curso y cada
+    ``reportar`` también cuenta), no la hora de inicio: una tarea larga pero
+    viva no se ejecuta dos veces. El intento perdido cuenta, y la que ya agotó
+    sus intentos queda fallida en vez de volver a la cola para siempre.
+    """
+    ahora = timezone.now()
+    limite = ahora - timedelta(minutes=minutos)
+    atascadas = Tarea.todos.filter(
+        Q(latido__lt=limite) | Q(latido__isnull=True, iniciada__lt=limite),
+        estado='en_proceso',
+    )
+    fallidas = atascadas.filter(intentos__gte=F('max_intentos') - 1).update(
+        estado='fallida',
+        intentos=F('intentos') + 1,
+        mensaje='❌ El worker dejó de responder',
+        terminada=ahora,
+    )
+    devueltas = atascadas.update(
+        estado='pendiente',
+        intentos=F('intentos') + 1,
+        ejecutar_desde=ahora,
+    )
+    return fallidas + devueltas
+
+
+# ===== TAREAS DEL PROYECTO =====
+
+@registrar('preparar_torneo')
+def preparar_torneo(tarea, torneo_id):
+    """Genera la llave y asigna los equipos (antes se hacía dentro del admin)"""
+    from .ciclo import TRANSICIONES
+    from .models import Torneo
+
+    torneo = Torneo.todos.get(id=torneo_id)
+    # Otra tarea (o alguien desde el admin) pudo prepararlo mientras esta esperaba:
+    # asignar de nuevo pisaría los cruces y quizá resultados ya anotados
+    if torneo.llave_generada or torneo.estado not in TRANSICIONES['generar_llave'][0]:
+        return {'mensaje': f'⚠️ "{torneo.nombre}" ya tenía llave o no estaba en inscripción: no se hizo nada.'}
+
+    tarea.reportar(10, 'Generando llave')
+    with transaction.atomic():
+        # Todo o nada: si falla al asignar, el reintento vuelve a empezar con el torneo sin llave
+        torneo.generar_llave()
+
+        if torneo.equipo_set.count() < torneo.num_equipos:
+            return {'mensaje': f'⚠️ Se creó la llave pero faltan equipos. Necesitas {torneo.num_equipos}, tienes {torneo.equipo_set.count()}.'}
+
+        tarea.reportar(60, 'Asignando equipos')
+        torneo.asignar_equipos_llave()
+    return {'mensaje': f'✅ Torneo "{torneo.nombre}" listo. Se crearon {torneo.partido_set.count()} partidos con equipos asignados.'}
+
+
+@registrar('archivar_torneo')
+def archivar_torneo(tarea, torneo_id, podar=False):
+    from .archivo import archivar_torneo as archivar
+    from .models import Torneo
+
+    archivo = archivar(Torneo.todos.get(id=torneo_id), podar=podar)
+    return {'archivo_id': archivo.id, 'bytes': len(archivo.datos)}
+
+
+@registrar('reconstruir_busqueda')
+def reconstruir_busqueda(tarea):
+    from .busqueda import reconstruir_indice
+
+    return {'equipos': reconstruir_indice()}
+
+
+@registrar('predecir')
+def predecir(tarea, torneo_id):
+    """Probabilidades de la llave tras un resultado, para que no las calcule un visitante"""
+    from .prediccion import recalcular
+
+    prediccion = recalcular(torneo_id)
+    return {'equipos': len(prediccion['filas']) if prediccion else 0}
+
+
+@registrar('enviar_notificaciones')
+def enviar_notificaciones(tarea):
+    """Envía un lote de avisos por una sola conexión SMTP y programa lo que quede"""
+    from .notificaciones import enviar_pendientes, programar_envio
+
+    resultado = enviar_pendientes()
+    programar_envio(espera=0)
+    return resultado
@@ -1,3 +1,630 @@
-from django.test import TestCase
+import datetime
+import shutil
+import tempfile
+import time
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from decimal import Decimal
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends import locmem
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import busqueda, eventos, llave, marcador, notificaciones, pagos, prediccion, replicas, tareas
+from .models import (
+    Categoria, Equipo, EventoTorneo, FotoEventos, LibroPagos, Notificacion, Organizacion, Pago, Partido,
+    PrediccionTorneo, Tarea, Torneo,
+)
+
+
+class CorreoContado(locmem.EmailBackend):
+    """locmem que cuenta cuántas conexiones se abren"""
+    abiertas = 0
+
+    def open(self):
+        CorreoContado.abiertas += 1
+        return True
+
+
+class CorreoCaido(locmem.EmailBackend):
+    def open(self):
+        raise ConnectionRefusedError('servidor caído')
+
+
+def crear_torneo(equipos=4, email=None, organizacion=None, nombre='Copa'):
+    categoria = Categoria.objects.create(nombre='Libre', organizacion=organizacion)
+    torneo = Torneo.objects.create(
+        nombre=nombre, categoria=categoria, fecha_inicio=datetime.date(2026, 1, 1),
+        fecha_fin=datetime.date(2026, 1, 2), precio_inscripcion=100, num_equipos=equipos,
+    )
+    for i in range(equipos):
+        Equipo.objects.create(
+            torneo=torneo, nombre=f'Equipo {i}', capitan=f'Capitán {i}', telefono='1',
+            email=email or f'capitan{i}@example.com',
+        )
+    return torneo
+
+
+@override_settings(EMAIL_BACKEND='torneos.tests.CorreoContado')
+class EnvioPorLotesTests(TestCase):
+    def setUp(self):
+        CorreoContado.abiertas = 0
+
+    def test_un_lote_usa_una_sola_conexion(self):
+        torneo = crear_torneo(4)
+        for equipo in torneo.equipo_set.all():
+            notificaciones.pago_confirmado(equipo)
+
+        resultado = notificaciones.enviar_pendientes()
+
+        self.assertEqual(resultado, {'enviadas': 4, 'fallidas': 0, 'pospuestas': 0})
+        self.assertEqual(CorreoContado.abiertas, 1)
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [f'capitan{i}@example.com' for i in range(4)])
+        self.assertFalse(Notificacion.todos.exclude(estado='enviada').exists())
+
+    def test_mismo_destinatario_y_texto_sale_una_vez(self):
+        torneo = crear_torneo(2, email='club@example.com')
+        local, visitante = torneo.equipo_set.order_by('id')
+        partido = Partido.objects.create(
+            torneo=torneo, ronda='final', equipo_local=local, equipo_visitante=visitante,
+            fecha=datetime.date(2026, 1, 2), hora=datetime.time(18, 0),
+        )
+        notificaciones.partido_programado(partido)
+
+        resultado = notificaciones.enviar_pendientes()
+
+        self.assertEqual(resultado['enviadas'], 2)
+        self.assertEqual(CorreoContado.abiertas, 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_aviso_pendiente_se_reemplaza(self):
+        equipo = crear_torneo(2).equipo_set.first()
+        notificaciones.avance(equipo, 'Semifinales')
+        notificaciones.avance(equipo, 'Semifinales', campeon=True)
+
+        self.assertEqual(Notificacion.todos.count(), 1)
+        notificaciones.enviar_pendientes()
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_lote_mayor_que_el_limite_sigue_en_otra_pasada(self):
+        torneo = crear_torneo(4)
+        for equipo in torneo.equipo_set.all():
+            notificaciones.pago_confirmado(equipo)
+
+        self.assertEqual(notificaciones.enviar_pendientes(limite=3)['enviadas'], 3)
+        self.assertEqual(notificaciones.enviar_pendientes(limite=3)['enviadas'], 1)
+        self.assertEqual(CorreoContado.abiertas, 2)
+        self.assertEqual(len(mail.outbox), 4)
+
+    @override_settings(EMAIL_BACKEND='torneos.tests.CorreoCaido')
+    def test_servidor_caido_pospone_sin_gastar_intentos(self):
+        torneo = crear_torneo(2)
+        for equipo in torneo.equipo_set.all():
+            notificaciones.pago_confirmado(equipo)
+
+        with self.assertLogs('torneos.notificaciones', 'WARNING'):
+            resultado = notificaciones.enviar_pendientes()
+
+        self.assertEqual(resultado, {'enviadas': 0, 'fallidas': 0, 'pospuestas': 2})
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(list(Notificacion.todos.values_list('estado', 'intentos')), [('pendiente', 0)] * 2)
+
+
+def extracto(texto, codificacion='utf-8'):
+    return SimpleUploadedFile('extracto.csv', texto.encode(codificacion), content_type='text/csv')
+
+
+class PagosTests(TestCase):
+    def setUp(self):
+        self.torneo = crear_torneo(2)
+        self.equipo = self.torneo.equipo_set.order_by('id').first()
+
+    def test_abonos_con_instancias_viejas_no_se_pisan(self):
+        primera = Equipo.objects.get(id=self.equipo.id)
+        segunda = Equipo.objects.get(id=self.equipo.id)
+
+        pagos.registrar_pago(primera, Decimal('30'))
+        pagos.registrar_pago(segunda, Decimal('40'))
+
+        self.equipo.refresh_from_db()
+        self.assertEqual(self.equipo.monto_pagado, Decimal('70'))
+        self.assertFalse(self.equipo.pago_confirmado)
+        self.assertEqual(LibroPagos.resumen(self.torneo.id)['recaudado'], Decimal('70'))
+
+    def test_abono_que_completa_confirma_el_pago(self):
+        pagos.registrar_pago(self.equipo, Decimal('100'))
+
+        self.equipo.refresh_from_db()
+        self.assertTrue(self.equipo.pago_confirmado)
+        self.assertEqual(LibroPagos.resumen(self.torneo.id)['pagados'], 1)
+
+    def test_monto_no_finito_o_negativo_se_rechaza(self):
+        for monto in ('NaN', 'Infinity', '0', '-5'):
+            with self.subTest(monto=monto), self.assertRaises(ValueError):
+                pagos.registrar_pago(self.equipo, Decimal(monto))
+        self.assertFalse(Pago.objects.exists())
+
+    def test_anular_deja_el_movimiento_negativo(self):
+        pagos.registrar_pago(self.equipo, Decimal('60'))
+        pagos.anular_pagos(Equipo.objects.get(id=self.equipo.id))
+
+        self.equipo.refresh_from_db()
+        self.assertEqual(self.equipo.monto_pagado, 0)
+        self.assertEqual(sorted(Pago.objects.values_list('monto', flat=True)), [Decimal('-60'), Decimal('60')])
+
+    def test_conciliar_suma_sobre_el_total_guardado(self):
+        pagos.registrar_pago(Equipo.objects.get(id=self.equipo.id), Decimal('20'))
+        archivo = extracto(f'monto;referencia\n50;EQ{self.equipo.id}\nNaN;EQ{self.equipo.id}\n30;nadie\n')
+
+        resultado = pagos.conciliar_extracto(archivo)
+
+        self.assertEqual(len(resultado['conciliados']), 1)
+        self.assertEqual([f['motivo'] for f in resultado['sin_conciliar']], ['Monto inválido', 'Sin equipo asociado'])
+        self.equipo.refresh_from_db()
+        self.assertEqual(self.equipo.monto_pagado, Decimal('70'))
+
+    def test_conciliar_bloquea_con_una_escritura_antes_de_leer(self):
+        archivo = extracto(f'monto,referencia\n50,EQ{self.equipo.id}\n')
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as consultas:
+            pagos.conciliar_extracto(archivo, torneo=self.torneo)
+
+        sql = [c['sql'] for c in consultas if not c['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        self.assertTrue(sql[0].startswith('UPDATE "torneos_equipo"'), sql[0])
+
+    def test_extracto_latin1_es_error_del_formulario(self):
+        usuario = User.objects.create_superuser('admin', 'admin@example.com', 'clave')
+        self.client.force_login(usuario)
+
+        respuesta = self.client.post('/equipos/conciliar/', {
+            'archivo': extracto('monto;nombre\n50;Año Ñandú\n', 'latin-1'),
+        })
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('UTF-8', str(respuesta.context['form'].errors['archivo']))
+        self.assertFalse(Pago.objects.exists())
+
+
+class InscripcionTests(TestCase):
+    def setUp(self):
+        self.usuario = User.objects.create_superuser('admin', 'admin@example.com', 'clave')
+        self.client.force_login(self.usuario)
+        self.torneo = crear_torneo(2)
+
+    def inscribir(self, nombre, jugadores=6):
+        datos = {'torneo': self.torneo.id, 'nombre': nombre, 'capitan': 'Capitana', 'telefono': '1', 'email': 'c@example.com'}
+        for i in range(1, jugadores + 1):
+            datos[f'jugador{i}'] = f'{nombre} jugador {i}'
+        return self.client.post('/inscribir/', datos)
+
+    def test_inscribir_indexa_el_equipo_una_sola_vez(self):
+        with mock.patch('torneos.busqueda.indexar_equipo', wraps=busqueda.indexar_equipo) as indexar:
+            with self.captureOnCommitCallbacks(execute=True):
+                respuesta = self.inscribir('Ñandúes')
+
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertEqual(indexar.call_count, 1)
+        self.assertEqual(busqueda.buscar_ids('ñandues jugador')[0], [Equipo.objects.get(nombre='Ñandúes').id])
+
+    def test_plantel_invalido_no_deja_el_equipo_a_medias(self):
+        respuesta = self.inscribir('Cóndores', jugadores=3)
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertFalse(Equipo.objects.filter(nombre='Cóndores').exists())
+
+    def test_totales_de_la_lista_respetan_la_busqueda(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.inscribir('Ñandúes')
+        buscado = Equipo.objects.get(nombre='Ñandúes')
+        pagos.registrar_pago(buscado, Decimal('100'))
+
+        respuesta = self.client.get('/equipos/', {'q': 'ñandues'})
+
+        self.assertEqual(
+            [respuesta.context[c] for c in ('total_equipos', 'pagados', 'pendientes', 'recaudado')],
+            [1, 1, 0, Decimal('100')],
+        )
+        self.assertEqual(self.client.get('/equipos/').context['total_equipos'], 3)
+
+
+class LlaveCacheTests(TestCase):
+    def test_un_resultado_cambia_la_clave_sin_borrar_la_cache(self):
+        torneo = crear_torneo(4)
+        torneo.generar_llave()
+        torneo.asignar_equipos_llave()
+        antes = llave.llave_renderizada(Torneo.objects.get(id=torneo.id))
+
+        # Otro proceso: su caché no se entera de nada, pero la versión del torneo cambió
+        with mock.patch('django.core.cache.cache.delete_many') as borrar:
+            partido = Partido.objects.filter(ronda='semifinales').order_by('id').first()
+            Torneo.objects.get(id=torneo.id).avanzar_ganador(partido, partido.equipo_local)
+        despues = llave.llave_renderizada(Torneo.objects.get(id=torneo.id))
+
+        borrar.assert_not_called()
+        self.assertNotEqual(antes, despues)
+        self.assertIn('#22543d', despues)  # el ganador se pinta de verde
+
+
+class AvanzarGanadorTests(TestCase):
+    def setUp(self):
+        self.torneo = crear_torneo(4)
+        self.torneo.generar_llave()
+        self.torneo.asignar_equipos_llave()
+
+    def partido(self, ronda='semifinales', i=0):
+        return Partido.objects.filter(torneo=self.torneo, ronda=ronda).order_by('id')[i]
+
+    def anotar(self, partido, lado='local'):
+        return Torneo.objects.get(id=self.torneo.id).avanzar_ganador(partido, getattr(partido, f'equipo_{lado}'))
+
+    def ganadores(self):
+        return EventoTorneo.todos.filter(torneo=self.torneo, tipo='ganador').count()
+
+    def assertPartidosComoLaLlave(self):
+        estado = eventos.estado_actual(self.torneo.id)
+        for partido in Partido.objects.filter(torneo=self.torneo):
+            fila = estado['partidos'][str(partido.id)]
+            self.assertEqual(
+                (partido.equipo_local_id, partido.equipo_visitante_id, partido.ganador_id),
+                (fila['local'], fila['visitante'], fila['ganador']),
+            )
+        self.assertEqual(Torneo.objects.get(id=self.torneo.id).campeon_id, estado['campeon'])
+
+    def test_partido_fuera_de_la_llave_no_deja_nada(self):
+        local, visitante = self.torneo.equipo_set.order_by('id')[:2]
+        suelto = Partido.objects.create(torneo=self.torneo, ronda='final', equipo_local=local, equipo_visitante=visitante)
+
+        with self.assertRaisesMessage(ValueError, 'no está en la llave'):
+            self.anotar(suelto)
+
+        suelto.refresh_from_db()
+        self.assertFalse(suelto.terminado)
+        self.assertEqual(self.ganadores(), 0)
+        self.assertEqual(self.client.get(f'/torneos/{self.torneo.id}/llave/').status_code, 200)
+
+    def test_dos_instancias_viejas_anotan_una_sola_vez(self):
+        primera, segunda = self.partido(), self.partido()
+        self.anotar(primera)
+        with self.assertRaisesMessage(ValueError, 'Partido ya terminado'):
+            self.anotar(segunda, 'visitante')
+
+        self.assertEqual(self.ganadores(), 1)
+        self.assertEqual(self.partido().ganador_id, primera.equipo_local_id)
+        self.assertPartidosComoLaLlave()
+
+    def test_corregir_y_deshacer_sobre_lo_anotado(self):
+        partido = self.partido()
+        self.anotar(partido)
+        self.assertEqual(self.partido('final').equipo_local_id, partido.equipo_local_id)
+
+        eventos.corregir_resultado(self.partido(), partido.equipo_visitante)
+        self.assertEqual(self.partido('final').equipo_local_id, partido.equipo_visitante_id)
+        self.assertPartidosComoLaLlave()
+
+        eventos.deshacer_resultado(self.partido())
+        self.assertEqual(self.partido().ganador_id, partido.equipo_local_id)  # vuelve al anotado
+        eventos.deshacer_resultado(self.partido())
+        self.assertFalse(self.partido().terminado)
+        self.assertIsNone(self.partido('final').equipo_local_id)
+        self.assertPartidosComoLaLlave()
+
+        self.anotar(self.partido(), 'visitante')  # se puede volver a anotar
+        self.assertPartidosComoLaLlave()
+
+    def test_reproduccion_desde_fotos_da_la_misma_llave(self):
+        with mock.patch.object(eventos, 'CADA_FOTO', 2):
+            self.anotar(self.partido(i=0))
+            self.anotar(self.partido(i=1), 'visitante')
+            self.anotar(self.partido('final'))
+
+        self.assertTrue(FotoEventos.objects.filter(torneo=self.torneo).exists())
+        todos = EventoTorneo.todos.filter(torneo=self.torneo).order_by('numero').values_list('numero', 'tipo', 'datos')
+        self.assertEqual(eventos.estado_actual(self.torneo.id), eventos.reproducir(todos))
+        self.assertEqual(Torneo.objects.get(id=self.torneo.id).estado, 'finalizado')
+        self.assertPartidosComoLaLlave()
+
+
+class MarcadorTests(TestCase):
+    def setUp(self):
+        torneo = crear_torneo(4)
+        torneo.generar_llave()
+        torneo.asignar_equipos_llave()
+        self.partido = Partido.objects.filter(torneo=torneo, ronda='semifinales').order_by('id').first()
+
+    def resultado(self, cliente_id, lado):
+        return {'id': cliente_id, 'partido': self.partido.id, 'ganador': getattr(self.partido, f'equipo_{lado}_id')}
+
+    def test_lote_con_dos_ganadores_para_el_mismo_partido(self):
+        respuesta = marcador.aplicar_lote([
+            self.resultado('a', 'local'), self.resultado('b', 'visitante'), self.resultado('c', 'local'),
+        ])
+
+        self.assertEqual([r['estado'] for r in respuesta], ['aplicado', 'conflicto', 'aplicado'])
+        self.assertIn('Ya estaba registrado', respuesta[2]['mensaje'])
+        self.assertEqual(EventoTorneo.todos.filter(tipo='ganador').count(), 1)
+
+    def test_conflicto_aunque_el_partido_leido_este_viejo(self):
+        viejo = Partido.objects.select_related('torneo').get(id=self.partido.id)
+        marcador.aplicar_lote([self.resultado('a', 'local')])  # otro árbitro anota primero
+
+        self.assertFalse(viejo.terminado)
+        estado, mensaje = marcador._aplicar(viejo, self.partido.equipo_visitante_id)
+        self.assertEqual(estado, 'conflicto')
+        self.assertIn(self.partido.equipo_local.nombre, mensaje)
+        self.assertEqual(EventoTorneo.todos.filter(tipo='ganador').count(), 1)
+
+
+@override_settings(TAREAS_SINCRONAS=False)
+class PrepararTorneoTests(TestCase):
+    def setUp(self):
+        self.torneo = crear_torneo(4)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'clave'))
+        self.url = f'/admin/torneos/torneo/{self.torneo.id}/preparar/'
+
+    def en_cola(self):
+        return Tarea.todos.filter(nombre='preparar_torneo', argumentos__torneo_id=self.torneo.id)
+
+    def test_dos_clics_encolan_una_sola_tarea(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.assertEqual(self.en_cola().count(), 1)
+
+    def test_torneo_con_llave_no_se_encola(self):
+        self.torneo.generar_llave()
+        self.client.get(self.url)
+        self.assertFalse(self.en_cola().exists())
+
+    def test_la_tarea_no_vuelve_a_asignar_una_llave_ya_preparada(self):
+        primera, segunda = (tareas.encolar('preparar_torneo', torneo_id=self.torneo.id) for _ in range(2))
+        tareas.ejecutar(primera.id)
+        tareas.ejecutar(segunda.id)
+
+        segunda.refresh_from_db()
+        self.assertEqual(segunda.estado, 'completada')
+        self.assertIn('no se hizo nada', segunda.resultado['mensaje'])
+        self.assertEqual(EventoTorneo.todos.filter(torneo=self.torneo, tipo='equipos_asignados').count(), 1)
+        self.assertEqual(Partido.objects.filter(torneo=self.torneo).count(), 3)
+
+
+@skipIf(prediccion.np is None, 'sin NumPy no hay predicción')
+@override_settings(TAREAS_SINCRONAS=False)
+class PrediccionTests(TestCase):
+    def setUp(self):
+        self.torneo = crear_torneo(4)
+        self.torneo.generar_llave()
+        self.torneo.asignar_equipos_llave()
+        self.url = f'/torneos/{self.torneo.id}/llave/'
+
+    def calcular_en_el_worker(self):
+        tarea = Tarea.todos.get(nombre='predecir', estado='pendiente', argumentos__torneo_id=self.torneo.id)
+        tareas.ejecutar(tarea.id)
+        cache.clear()  # el worker es otro proceso: la caché de la web no se entera
+
+    def test_la_web_ve_la_prediccion_del_worker_y_cambia_el_etag(self):
+        antes = self.client.get(self.url)
+        self.assertIsNone(antes.context['prediccion'])
+
+        self.calcular_en_el_worker()
+        despues = self.client.get(self.url, HTTP_IF_NONE_MATCH=antes['ETag'])
+
+        self.assertEqual(despues.status_code, 200)
+        self.assertEqual(len(despues.context['prediccion']['filas']), 4)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=despues['ETag']).status_code, 304)
+
+    def test_un_resultado_deja_vieja_la_prediccion_guardada(self):
+        self.client.get(self.url)
+        self.calcular_en_el_worker()
+        partido = Partido.objects.filter(torneo=self.torneo, ronda='semifinales').first()
+        Torneo.objects.get(id=self.torneo.id).avanzar_ganador(partido, partido.equipo_local)
+
+        self.assertIsNone(self.client.get(self.url).context['prediccion'])
+        self.calcular_en_el_worker()
+        self.assertIsNotNone(self.client.get(self.url).context['prediccion'])
+        self.assertEqual(PrediccionTorneo.objects.filter(torneo=self.torneo).count(), 1)
+
+    def test_un_calculo_viejo_no_pisa_uno_nuevo(self):
+        viejo = Torneo.objects.get(id=self.torneo.id)
+        Torneo.tocar(self.torneo.id)
+        prediccion.recalcular(self.torneo.id)
+        prediccion._guardar(viejo)
+
+        guardada = PrediccionTorneo.objects.get(torneo=self.torneo)
+        self.assertEqual(guardada.version, Torneo.objects.get(id=self.torneo.id).actualizado)
+
+
+class OrganizacionTests(TestCase):
+    def setUp(self):
+        self.a = Organizacion.objects.create(nombre='Liga A', slug='a')
+        self.b = Organizacion.objects.create(nombre='Liga B', slug='b')
+        self.torneo_a = crear_torneo(2, organizacion=self.a, nombre='Copa A')
+        self.torneo_b = crear_torneo(2, organizacion=self.b, nombre='Copa B')
+
+    def usuario(self, nombre, *organizaciones):
+        usuario = User.objects.create_user(nombre, f'{nombre}@example.com', 'clave', is_staff=True)
+        usuario.organizaciones.set(organizaciones)
+        return usuario
+
+    def torneos_conciliables(self, usuario):
+        self.client.force_login(usuario)
+        return [t.nombre for t in self.client.get('/equipos/conciliar/').context['form'].fields['torneo'].queryset]
+
+    def test_conciliar_lista_los_torneos_de_quien_pide(self):
+        self.assertEqual(self.torneos_conciliables(self.usuario('de_b', self.b)), ['Copa B'])
+        self.assertEqual(self.torneos_conciliables(self.usuario('de_a', self.a)), ['Copa A'])
+
+    def test_miembro_solo_ve_los_equipos_de_su_organizacion(self):
+        self.client.force_login(self.usuario('de_a', self.a))
+        equipos = self.client.get('/equipos/').context['equipos']
+        self.assertEqual({e.torneo_id for e in equipos}, {self.torneo_a.id})
+
+    def test_usuario_sin_organizacion_no_ve_nada(self):
+        self.client.force_login(self.usuario('suelto'))
+        self.assertEqual(len(self.client.get('/equipos/').context['equipos']), 0)
+        self.assertEqual(len(self.torneos_conciliables(self.usuario('otro_suelto'))), 0)
+
+    def test_no_puede_elegir_una_organizacion_ajena(self):
+        self.client.force_login(self.usuario('de_a', self.a))
+        equipos = self.client.get('/equipos/', {'org': 'b'}).context['equipos']
+        self.assertEqual({e.torneo_id for e in equipos}, {self.torneo_a.id})
+
+    def test_llave_publica_se_ve_con_la_organizacion_del_torneo(self):
+        # Un anónimo con varias organizaciones no tiene ninguna elegida
+        respuesta = self.client.get(f'/torneos/{self.torneo_b.id}/llave/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['torneo'], self.torneo_b)
+
+
+class LiberarAtascadasTests(TestCase):
+    def en_proceso(self, hace_minutos, intentos=0, latido_hace=None):
+        ahora = timezone.now()
+        return Tarea.todos.create(
+            nombre='reconstruir_busqueda', estado='en_proceso', intentos=intentos,
+            iniciada=ahora - datetime.timedelta(minutes=hace_minutos),
+            latido=ahora - datetime.timedelta(minutes=hace_minutos if latido_hace is None else latido_hace),
+        )
+
+    def test_tarea_larga_que_late_no_se_libera(self):
+        tarea = self.en_proceso(90, latido_hace=1)
+        self.assertEqual(tareas.liberar_atascadas(), 0)
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, 'en_proceso')
+
+    def test_reportar_cuenta_como_latido(self):
+        tarea = self.en_proceso(90)
+        tarea.reportar(50, 'A mitad')
+        self.assertEqual(tareas.liberar_atascadas(), 0)
+
+    def test_latir_mantiene_vivas_las_tareas_del_worker(self):
+        tarea = self.en_proceso(90)
+        tareas.latir([tarea.id])
+        self.assertEqual(tareas.liberar_atascadas(), 0)
+
+    def test_sin_latido_vuelve_a_la_cola_contando_el_intento(self):
+        tarea = self.en_proceso(45)
+        self.assertEqual(tareas.liberar_atascadas(), 1)
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), ('pendiente', 1))
+
+    def test_agotados_los_intentos_queda_fallida(self):
+        tarea = self.en_proceso(45, intentos=2)
+        self.assertEqual(tareas.liberar_atascadas(), 1)
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), ('fallida', 3))
+        self.assertIsNotNone(tarea.terminada)
+
+
+class RouterTests(SimpleTestCase):
+    """Decisiones del router, sin tocar la base"""
+
+    def setUp(self):
+        connections.settings[replicas.REPLICA] = connections.settings[DEFAULT_DB_ALIAS]
+        self.addCleanup(connections.settings.pop, replicas.REPLICA)
+        self.router = replicas.ReplicaRouter()
+
+    def leer(self):
+        return self.router.db_for_read(Torneo)
+
+    def test_sin_marcar_lee_del_principal(self):
+        self.assertEqual(self.leer(), DEFAULT_DB_ALIAS)
+
+    def test_vista_de_solo_lectura_lee_de_la_replica(self):
+        token = replicas._leer_replica.set(True)
+        self.addCleanup(replicas._leer_replica.reset, token)
+        self.assertEqual(self.leer(), replicas.REPLICA)
+
+    def test_despues_de_escribir_lee_del_principal(self):
+        tokens = [replicas._leer_replica.set(True), replicas._escribio.set(False)]
+        self.addCleanup(replicas._escribio.reset, tokens[1])
+        self.addCleanup(replicas._leer_replica.reset, tokens[0])
+
+        self.assertEqual(self.router.db_for_write(Torneo), DEFAULT_DB_ALIAS)
+        self.assertIs(replicas._escribio.get(), True)
+        self.assertEqual(self.leer(), DEFAULT_DB_ALIAS)
+
+    def test_sin_replica_configurada_lee_del_principal(self):
+        connections.settings.pop(replicas.REPLICA)
+        self.addCleanup(connections.settings.__setitem__, replicas.REPLICA, {})
+        token = replicas._leer_replica.set(True)
+        self.addCleanup(replicas._leer_replica.reset, token)
+        self.assertEqual(self.leer(), DEFAULT_DB_ALIAS)
+
+
+@override_settings(REPLICA_RETRASO=10)
+class ReplicaTests(TransactionTestCase):
+    """Dos bases SQLite: la réplica es una copia (backup) del principal en un momento dado"""
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp(prefix='replica_')
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        connections.settings[replicas.REPLICA] = {
+            **connections.settings[DEFAULT_DB_ALIAS], 'NAME': f'{directorio}/replica.sqlite3',
+        }
+        self.addCleanup(self.quitar_replica)
+
+        self.usuario = User.objects.create_superuser('admin', 'admin@example.com', 'clave')
+        self.client.force_login(self.usuario)
+        self.torneo = crear_torneo(4)
+        self.equipo = self.torneo.equipo_set.order_by('id').first()
+
+    def quitar_replica(self):
+        connections[replicas.REPLICA].close()
+        del connections[replicas.REPLICA]
+        del connections.settings[replicas.REPLICA]
+
+    def replicar(self):
+        """La réplica se pone al día con el principal"""
+        connections[DEFAULT_DB_ALIAS].ensure_connection()
+        connections[replicas.REPLICA].ensure_connection()
+        connections[DEFAULT_DB_ALIAS].connection.backup(connections[replicas.REPLICA].connection)
+
+    def pagados(self, **cookies):
+        self.client.cookies.load(cookies)
+        return self.client.get('/equipos/').context['pagados']
+
+    def test_get_lee_de_la_replica_atrasada(self):
+        self.replicar()
+        Equipo.objects.filter(id=self.equipo.id).update(pago_confirmado=True)
+        LibroPagos.recalcular([self.torneo.id])
+
+        self.assertEqual(self.pagados(), 0)
+        self.replicar()
+        self.assertEqual(self.pagados(), 1)
+
+    def test_quien_escribio_lee_del_principal(self):
+        self.replicar()
+        respuesta = self.client.post(f'/equipos/{self.equipo.id}/pago/')
+
+        self.assertIn(replicas.COOKIE, respuesta.cookies)
+        self.assertEqual(self.pagados(), 1)  # la réplica todavía no lo tiene
+
+    def test_cookie_vencida_vuelve_a_la_replica(self):
+        self.replicar()
+        Equipo.objects.filter(id=self.equipo.id).update(pago_confirmado=True)
+        LibroPagos.recalcular([self.torneo.id])
+
+        self.assertEqual(self.pagados(**{replicas.COOKIE: str(int(time.time()) + 10)}), 1)
+        self.assertEqual(self.pagados(**{replicas.COOKIE: str(int(time.time()) - 1)}), 0)
+
+    def test_leer_no_escribe_en_el_principal(self):
+        LibroPagos.todos.all().delete()  # torneo sin libro: se suma desde los equipos
+        Equipo.objects.filter(id=self.equipo.id).update(pago_confirmado=True)
+        self.replicar()
+
+        respuesta = self.client.get('/equipos/')
+
+        self.assertEqual(respuesta.context['pagados'], 1)
+        self.assertNotIn(replicas.COOKIE, respuesta.cookies)
+        self.assertFalse(LibroPagos.todos.exists())
+
+    def test_dentro_de_una_transaccion_lee_del_principal(self):
+        token = replicas._leer_replica.set(True)
+        self.addCleanup(replicas._leer_replica.reset, token)
+        self.assertEqual(Torneo.objects.all().db, replicas.REPLICA)
+        with transaction.atomic():
+            self.assertEqual(Torneo.objects.all().db, DEFAULT_DB_ALIAS)
@@ -0,0 +1,8 @@
+import unicodedata
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes ni espacios repetidos (para comparar nombres)"""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.lower().split())
@@ -1,8 +1,34 @@
+from collections import Counter
+from datetime import timedelta
+
 from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from .models import Equipo, Partido, Torneo, Jugador, Categoria
+from django.core.paginator import Paginator
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Sum
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.safestring import mark_safe
+from django.views.decorators.http import condition
+from .models import Equipo, Partido, Torneo, Jugador, Categoria, LibroPagos, TorneoArchivado, Tarea
+from .archivo import archivos_en_memoria, torneos_sin_archivar
+from django.conf import settings
 from django.utils import timezone
-from .forms import EquipoForm
+from .organizaciones import organizacion_del_torneo
+from .forms import EquipoForm, AbonoForm, ConciliacionForm
+from . import auditoria, busqueda, condicional, eventos, llave, marcador, notificaciones, pagos, perfilado, prediccion, replicas
+
+POR_PAGINA = 50
+MAX_AUTOCOMPLETAR = 20
+
+
+def _paginar(request, queryset, por_pagina=POR_PAGINA):
+    """Página pedida (?pagina=) y los filtros actuales para armar los enlaces"""
+    pagina = Paginator(queryset, por_pagina).get_page(request.GET.get('pagina'))
+    filtros = request.GET.copy()
+    filtros.pop('pagina', None)
+    return pagina, filtros.urlencode()
 
 @login_required
 def dashboard(request):
@@ -37,71 +63,176 @@ def inscribir_equipo(request):
     if request.method == 'POST':
         form = EquipoForm(request.POST)
         if form.is_valid():
-            # Guardar equipo
-            equipo = form.save(commit=False)
-            equipo.pago_confirmado = False  # Por defecto no pagado
-            equipo.save()
-            
-            # Guardar jugadores
-            for i in range(1, 7):
-                nombre_jugador = form.cleaned_data.get(f'jugador{i}')
-                if nombre_jugador:
-                    Jugador.objects.create(
-                        equipo=equipo,
-                        nombre=nombre_jugador,
-                        edad=0  # Podemos agregar campo edad después
-                    )
-            
-            return redirect('dashboard')
+            # Equipo y jugadores juntos: se indexa una vez al confirmar
+            try:
+                with transaction.atomic():
+                    equipo = form.save(commit=False)
+                    equipo.pago_confirmado = False  # Por defecto no pagado
+                    equipo.save()
+                    
+                    for jugador in form.jugadores():
+                        Jugador.objects.create(equipo=equipo, **jugador)
+            except IntegrityError:
+                # Otro equipo inscribió el mismo documento entre la validación y el guardado
+                form.add_error(None, 'Un documento del plantel se acaba de inscribir en otro equipo del torneo')
+            else:
+                return redirect('dashboard')
     else:
         form = EquipoForm()
     
     return render(request, 'inscribir_equipo.html', {'form': form})
 
 @login_required
+@replicas.solo_lectura
 def lista_equipos(request):
     # Obtener filtros
     torneo_id = request.GET.get('torneo')
     pago_status = request.GET.get('pago')
+    q = request.GET.get('q', '').strip()
     
     # Filtrar equipos
-    equipos = Equipo.objects.all().select_related('torneo')
+    filtrados = Equipo.objects.all()
+    
+    if q:
+        filtrados = busqueda.filtrar_queryset(filtrados, q)
     
     if torneo_id:
-        equipos = equipos.filter(torneo_id=torneo_id)
+        filtrados = filtrados.filter(torneo_id=torneo_id)
     
     if pago_status == 'pagado':
-        equipos = equipos.filter(pago_confirmado=True)
+        filtrados = filtrados.filter(pago_confirmado=True)
     elif pago_status == 'pendiente':
-        equipos = equipos.filter(pago_confirmado=False)
+        filtrados = filtrados.filter(pago_confirmado=False)
+    
+    # La tabla (solo las columnas que muestra)
+    equipos = filtrados.select_related('torneo').only(
+        'nombre', 'capitan', 'telefono', 'pago_confirmado', 'monto_pagado', 'torneo__nombre'
+    ).annotate(total_jugadores=Count('jugador')).order_by('torneo_id', 'nombre')
     
     # Obtener torneos para el filtro
-    torneos = Torneo.objects.all()
+    torneos = Torneo.objects.values('id', 'nombre')
+    pagina, filtros = _paginar(request, equipos)
     
-    # Estadísticas
-    total_equipos = equipos.count()
-    pagados = equipos.filter(pago_confirmado=True).count()
-    pendientes = total_equipos - pagados
+    if q:
+        # Una búsqueda no está en el libro: se suman los equipos encontrados
+        resumen = filtrados.aggregate(
+            total=Count('id'),
+            pagados=Count('id', filter=Q(pago_confirmado=True)),
+            recaudado=Sum('monto_pagado'),
+        )
+        resumen['recaudado'] = resumen['recaudado'] or 0
+        resumen['pendientes'] = resumen['total'] - resumen['pagados']
+    else:
+        # Estadísticas (precalculadas en el libro de pagos, sin recontar equipos)
+        resumen = LibroPagos.resumen(torneo_id)
+    pagados = resumen['pagados']
+    pendientes = resumen['pendientes']
+    if pago_status == 'pagado':
+        pendientes = 0
+    elif pago_status == 'pendiente':
+        pagados = 0
+    total_equipos = pagados + pendientes
     
     return render(request, 'lista_equipos.html', {
-        'equipos': equipos,
+        'equipos': pagina.object_list,
+        'pagina': pagina,
+        'filtros': filtros,
         'torneos': torneos,
         'total_equipos': total_equipos,
         'pagados': pagados,
         'pendientes': pendientes,
+        'recaudado': resumen['recaudado'],
+        'abono_form': AbonoForm(),
         'torneo_seleccionado': torneo_id,
         'pago_seleccionado': pago_status,
     })
 
+@login_required
+def estado_tarea(request, tarea_id):
+    """Estado de una tarea en segundo plano (para consultar su avance)"""
+    tarea = get_object_or_404(Tarea, id=tarea_id)
+    return JsonResponse({
+        'id': tarea.id,
+        'nombre': tarea.nombre,
+        'estado': tarea.estado,
+        'progreso': tarea.progreso,
+        'mensaje': tarea.mensaje,
+        'intentos': tarea.intentos,
+        'resultado': tarea.resultado,
+    })
+
+@staff_member_required
+def marcador_partidos(request):
+    """Página del marcador sin conexión (solo staff: anota resultados de cualquier torneo)"""
+    return render(request, 'marcador.html')
+
+@staff_member_required
+def marcador_pendientes(request):
+    """Partidos por jugar, para guardarlos en el dispositivo"""
+    return JsonResponse({'partidos': marcador.partidos_pendientes()})
+
+@staff_member_required
+def marcador_sincronizar(request):
+    """Recibe un lote de resultados anotados sin conexión"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Usa POST'}, status=405)
+    
+    try:
+        resultados = marcador.leer_lote(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    return JsonResponse({'resultados': marcador.aplicar_lote(resultados, request.user)})
+
+@login_required
+@replicas.solo_lectura
+def buscar_equipos(request):
+    """Búsqueda de equipos, capitanes y jugadores ordenada por relevancia (JSON)"""
+    try:
+        pagina = int(request.GET.get('pagina', 1))
+    except ValueError:
+        pagina = 1
+    
+    resultado = busqueda.buscar(
+        request.GET.get('q', ''),
+        torneo_id=request.GET.get('torneo') or None,
+        pagina=pagina,
+    )
+    
+    return JsonResponse({
+        'total': resultado['total'],
+        'pagina': resultado['pagina'],
+        'paginas': resultado['paginas'],
+        'resultados': [
+            {
+                'id': equipo.id,
+                'nombre': equipo.nombre,
+                'capitan': equipo.capitan,
+                'email': equipo.email,
+                'torneo': equipo.torneo.nombre,
+                'pago_confirmado': equipo.pago_confirmado,
+                'jugadores': [jugador.nombre for jugador in equipo.jugador_set.all()],
+            }
+            for equipo in resultado['equipos']
+        ],
+    })
+
 @login_required
 def marcar_pago(request, equipo_id):
     """Marcar/desmarcar pago de un equipo"""
     equipo = get_object_or_404(Equipo, id=equipo_id)
     
     if request.method == 'POST':
-        # Cambiar estado de pago
-        equipo.pago_confirmado = not equipo.pago_confirmado
-        equipo.save()
+        # Cambiar estado de pago (queda registrado como movimiento)
+        if equipo.pago_confirmado:
+            pagos.anular_pagos(equipo)
+        elif equipo.saldo_pendiente() > 0:
+            pagos.registrar_pago(equipo, equipo.saldo_pendiente(), referencia='Marcado manual')
+        else:
+            Equipo.objects.filter(id=equipo.id).update(pago_confirmado=True)
+            LibroPagos.recalcular([equipo.torneo_id])
+            auditoria.registrar('confirmacion', equipo, torneo_id=equipo.torneo_id, equipo=equipo.id)
+            notificaciones.pago_confirmado(equipo)
         
         # Redirigir de vuelta
         return redirect('lista_equipos')
@@ -109,16 +240,63 @@ def marcar_pago(request, equipo_id):
     return redirect('lista_equipos')
 
 @login_required
+def registrar_abono(request, equipo_id):
+    """Registrar un pago parcial de un equipo"""
+    equipo = get_object_or_404(Equipo.objects.select_related('torneo'), id=equipo_id)
+    
+    if request.method == 'POST':
+        form = AbonoForm(request.POST)
+        if form.is_valid():
+            pagos.registrar_pago(equipo, form.cleaned_data['monto'], referencia=form.cleaned_data['referencia'])
+            messages.success(request, f'✅ Abono registrado. Saldo pendiente de {equipo}: ${equipo.saldo_pendiente()}')
+        else:
+            messages.error(request, '❌ Monto no válido')
+    
+    return redirect('lista_equipos')
+
+@login_required
+def conciliar_pagos(request):
+    """Conciliar un extracto bancario (CSV) contra los equipos inscritos"""
+    resultado = None
+    
+    if request.method == 'POST':
+        form = ConciliacionForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                resultado = pagos.conciliar_extracto(
+                    form.cleaned_data['archivo'],
+                    torneo=form.cleaned_data['torneo'],
+                )
+            except ValueError as e:
+                form.add_error('archivo', str(e))
+            else:
+                messages.success(
+                    request,
+                    f"✅ {len(resultado['conciliados'])} pagos conciliados por ${resultado['total']}. "
+                    f"{len(resultado['sin_conciliar'])} filas sin conciliar."
+                )
+    else:
+        form = ConciliacionForm()
+    
+    return render(request, 'conciliar_pagos.html', {
+        'form': form,
+        'resultado': resultado,
+    })
+
+@login_required
+@replicas.solo_lectura
 def calendario(request):
     """Vista principal del calendario"""
     # Filtros
     fecha_filtro = request.GET.get('fecha')
     torneo_id = request.GET.get('torneo')
     
-    # Obtener partidos
-    partidos = Partido.objects.all().select_related(
+    # Obtener partidos (solo las columnas que muestra la tabla)
+    partidos = Partido.objects.select_related(
         'equipo_local', 'equipo_visitante', 'torneo'
-    ).order_by('fecha', 'hora')
+    ).only(
+        'fecha', 'hora', 'equipo_local__nombre', 'equipo_visitante__nombre', 'torneo__nombre'
+    ).order_by('fecha', 'hora', 'id')
     
     if fecha_filtro:
         partidos = partidos.filter(fecha=fecha_filtro)
@@ -126,23 +304,30 @@ def calendario(request):
     if torneo_id:
         partidos = partidos.filter(torneo_id=torneo_id)
     
-    # Obtener fechas únicas para el mini-calendario
-    fechas_con_partidos = Partido.objects.dates('fecha', 'day')
+    # Fechas con partidos para el mini-calendario (las 10 primeras, ya contadas)
+    fechas_con_partidos = Partido.objects.filter(fecha__isnull=False).values('fecha').annotate(
+        total=Count('id')
+    ).order_by('fecha')[:10]
     
     # Obtener torneos para filtro
-    torneos = Torneo.objects.all()
+    torneos = Torneo.objects.values('id', 'nombre')
     
     # Estadísticas
-    partidos_hoy = Partido.objects.filter(fecha=timezone.now().date()).count()
+    hoy = timezone.now().date()
+    partidos_hoy = Partido.objects.filter(fecha=hoy).count()
+    pagina, filtros = _paginar(request, partidos)
     
     return render(request, 'calendario.html', {
-        'partidos': partidos,
+        'partidos': pagina.object_list,
+        'pagina': pagina,
+        'filtros': filtros,
         'torneos': torneos,
         'fechas_con_partidos': fechas_con_partidos,
+        'proximos_dias': [hoy + timedelta(days=i) for i in range(1, 8)],
         'partidos_hoy': partidos_hoy,
         'fecha_filtro': fecha_filtro,
         'torneo_seleccionado': torneo_id,
-        'hoy': timezone.now().date(),
+        'hoy': hoy,
     })
 
 @login_required
@@ -156,23 +341,46 @@ def agregar_partido(request):
         equipo_visitante_id = request.POST.get('equipo_visitante')
         
         # Validación básica
-        if all([torneo_id, fecha, hora, equipo_local_id, equipo_visitante_id]):
-            Partido.objects.create(
+        if not all([torneo_id, fecha, hora, equipo_local_id, equipo_visitante_id]):
+            messages.error(request, '❌ Completa todos los campos')
+        elif equipo_local_id == equipo_visitante_id:
+            messages.error(request, '❌ Un equipo no puede jugar contra sí mismo')
+        elif Equipo.objects.filter(torneo_id=torneo_id, id__in=[equipo_local_id, equipo_visitante_id]).count() != 2:
+            messages.error(request, '❌ Los dos equipos deben pertenecer al torneo seleccionado')
+        else:
+            partido = Partido.objects.create(
                 torneo_id=torneo_id,
                 fecha=fecha,
                 hora=hora,
                 equipo_local_id=equipo_local_id,
                 equipo_visitante_id=equipo_visitante_id,
             )
+            notificaciones.partido_programado(partido)
             return redirect('calendario')
     
-    # Si es GET o error, mostrar formulario
-    torneos = Torneo.objects.all()
-    equipos = Equipo.objects.all()
-    
+    # Si es GET o error, mostrar formulario (los equipos se buscan con autocompletar_equipos)
     return render(request, 'agregar_partido.html', {
-        'torneos': torneos,
-        'equipos': equipos,
+        'torneos': Torneo.objects.values('id', 'nombre'),
+        'hoy': timezone.now().date(),
+        'max_autocompletar': MAX_AUTOCOMPLETAR,
+    })
+
+@login_required
+@replicas.solo_lectura
+def autocompletar_equipos(request):
+    """Equipos de un torneo cuyo nombre contiene ?q= (JSON, para los selectores)"""
+    try:
+        torneo_id = int(request.GET.get('torneo', ''))
+    except ValueError:
+        return JsonResponse({'resultados': []})
+    
+    equipos = Equipo.objects.filter(torneo_id=torneo_id)
+    q = request.GET.get('q', '').strip()
+    if q:
+        equipos = equipos.filter(nombre__icontains=q)
+    
+    return JsonResponse({
+        'resultados': list(equipos.order_by('nombre').values('id', 'nombre')[:MAX_AUTOCOMPLETAR]),
     })
     
 @login_required
@@ -205,56 +413,106 @@ def lista_torneos(request):
     })
     
     
+@condicional.politica_cache(condicional.segundos_torneo)
+@replicas.solo_lectura
+@organizacion_del_torneo
+@condition(etag_func=condicional.etag_torneo, last_modified_func=condicional.modificado_torneo)
+def llave_torneo(request, torneo_id):
+    """Llave del torneo para proyectar en pantalla o imprimir"""
+    torneo = get_object_or_404(Torneo.objects.select_related('categoria', 'campeon'), id=torneo_id)
+    
+    # Posiciones reconstruidas desde el historial de eventos
+    posiciones = eventos.posiciones(eventos.estado_actual(torneo.id))
+    nombres = Equipo.todos.in_bulk([fila['equipo'] for fila in posiciones])
+    for fila in posiciones:
+        fila['nombre'] = nombres[fila['equipo']].nombre if fila['equipo'] in nombres else '—'
+        fila['ronda_display'] = eventos.NOMBRES_RONDAS.get(fila['ronda'], fila['ronda'])
+    
+    return render(request, 'llave.html', {
+        'torneo': torneo,
+        'svg': mark_safe(llave.llave_renderizada(torneo, 'svg')),
+        'posiciones': posiciones,
+        'prediccion': None if torneo.campeon_id else prediccion.predecir(torneo),
+    })
+
+@condicional.politica_cache(condicional.segundos_torneo)
+@replicas.solo_lectura
+@organizacion_del_torneo
+@condition(etag_func=condicional.etag_torneo, last_modified_func=condicional.modificado_torneo)
+def exportar_llave(request, torneo_id, formato):
+    """Descargar la llave como SVG o PNG"""
+    if formato not in llave.FORMATOS:
+        raise Http404("Formato no soportado")
+    
+    torneo = get_object_or_404(Torneo.objects.select_related('campeon'), id=torneo_id)
+    contenido = llave.llave_renderizada(torneo, formato)
+    
+    if contenido is None:
+        return HttpResponse('Exportar a PNG requiere instalar Pillow', status=501, content_type='text/plain')
+    
+    tipo = 'image/png' if formato == 'png' else 'image/svg+xml'
+    respuesta = HttpResponse(contenido, content_type=tipo)
+    respuesta['Content-Disposition'] = f'inline; filename="llave-{torneo.id}.{formato}"'
+    return respuesta
+    
+@condicional.politica_cache(300)
+@replicas.solo_lectura
+@condition(etag_func=condicional.etag_historial, last_modified_func=condicional.modificado_historial)
 def historial_torneos(request):
-    # Obtener torneos finalizados del más reciente al más antiguo
-    torneos_finalizados = Torneo.objects.filter(
-        estado='finalizado'
-    ).order_by('-fecha_fin')
-    
-    # Pre-cargar datos relacionados para eficiencia
-    torneos_con_datos = torneos_finalizados.select_related(
-        'categoria', 'campeon'
-    ).prefetch_related(
-        'equipo_set__jugador_set',
-        'partido_set'
-    )
+    """Historial servido desde los archivos comprimidos (no lee equipos ni partidos)"""
+    archivados = list(TorneoArchivado.objects.all())
     
-    # Preparar datos para el template
-    torneos_procesados = []
-    for torneo in torneos_con_datos:
-        # Obtener subcampeón (perdedor de la final)
-        subcampeon = None
-        partido_final = torneo.partido_set.filter(ronda='final', terminado=True).first()
-        if partido_final and partido_final.ganador:
-            # Determinar qué equipo NO es el ganador
-            if partido_final.equipo_local == partido_final.ganador:
-                subcampeon = partido_final.equipo_visitante
-            else:
-                subcampeon = partido_final.equipo_local
-        
-        equipos_con_jugadores = []
-        for equipo in torneo.equipo_set.all():
-            equipos_con_jugadores.append({
-                'equipo': equipo,
-                'jugadores': list(equipo.jugador_set.all()[:5]),
-                'total_jugadores': equipo.jugador_set.count()
-            })
-        
-        torneos_procesados.append({
-            'torneo': torneo,
-            'campeon': torneo.campeon,
-            'subcampeon': subcampeon,
-            'equipos_con_jugadores': equipos_con_jugadores,
-            'total_equipos': torneo.equipo_set.count(),
-            'total_partidos': torneo.partido_set.filter(terminado=True).count(),
-            'partidos_finales': list(torneo.partido_set.filter(
-                ronda__in=['final', 'semifinales']
-            ).order_by('ronda')[:3]),
-        })
+    # Torneos finalizados que aún no se archivaron (se arman al vuelo, todos juntos)
+    archivados += archivos_en_memoria(torneos_sin_archivar())
+    archivados.sort(key=lambda archivo: archivo.fecha_fin, reverse=True)
     
     context = {
-        'torneos': torneos_procesados,
-        'total_torneos': torneos_finalizados.count(),
+        'torneos': [archivo.datos_historial() for archivo in archivados],
+        'total_torneos': len(archivados),
         'titulo': 'Historial de Torneos Finalizados',
     }
-    return render(request, 'torneos/historial.html', context)
\ No newline at end of file
+    return render(request, 'torneos/historial.html', context)
+
+@staff_member_required
+def lista_perfiles(request):
+    """Perfiles guardados por PerfiladoMiddleware"""
+    return render(request, 'admin/perfiles.html', {
+        'title': 'Perfiles de peticiones',
+        'perfiles': perfilado.listar(),
+        'muestreo': getattr(settings, 'PERFILADO_MUESTREO', 0),
+    })
+
+@staff_member_required
+def ver_perfil(request, nombre):
+    """Detalle de un perfil: funciones más costosas y consultas SQL"""
+    perfil = perfilado.abrir(nombre)
+    if perfil is None:
+        raise Http404("Perfil no encontrado")
+    
+    # Consultas repetidas (mismo SQL): la pista típica de un N+1
+    repetidas = Counter(consulta['sql'] for consulta in perfil['consultas'])
+    
+    return render(request, 'admin/perfil.html', {
+        'title': f"Perfil {perfil['ruta']}",
+        'perfil': perfil,
+        'funciones': perfilado.funciones_principales(nombre),
+        'lentas': sorted(perfil['consultas'], key=lambda c: c['ms'], reverse=True)[:20],
+        'repetidas': [(sql, veces) for sql, veces in repetidas.most_common(10) if veces > 1],
+        'ms_sql': round(sum(c['ms'] for c in perfil['consultas']), 1),
+    })
+
+@staff_member_required
+def exportar_perfil(request, nombre, formato):
+    """Descarga el perfil: .folded (flamegraph.pl / speedscope) o .prof (pstats / snakeviz)"""
+    if perfilado.abrir(nombre) is None:
+        raise Http404("Perfil no encontrado")
+    
+    if formato == 'folded':
+        respuesta = HttpResponse(perfilado.folded(nombre), content_type='text/plain; charset=utf-8')
+    elif formato == 'prof' and (perfilado.directorio() / f'{nombre}.prof').exists():
+        respuesta = HttpResponse((perfilado.directorio() / f'{nombre}.prof').read_bytes(), content_type='application/octet-stream')
+    else:
+        raise Http404("Formato no disponible")
+    
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre}.{formato}"'
+    return respuesta
@@ -0,0 +1,104 @@
+"""
+Middleware WSGI que sirve STATIC_ROOT con cabeceras de caché de larga duración.
+
+Los archivos con hash en el nombre (generados por ComprimidoManifestStaticFilesStorage)
+nunca cambian, así que se marcan como ``immutable`` durante un año. Si el navegador
+acepta brotli o gzip se entrega la copia precomprimida en collectstatic.
+"""
+
+import mimetypes
+import os
+import re
+from pathlib import Path
+from wsgiref.util import FileWrapper
+
+UN_ANO = 60 * 60 * 24 * 365
+CACHE_SIN_HASH = 60  # segundos para archivos sin hash (pueden cambiar)
+PATRON_HASH = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+CODIFICACIONES = (('br', '.br'), ('gzip', '.gz'))
+
+
+def codificaciones_aceptadas(cabecera):
+    """{codificación: q} de CODIFICACIONES según Accept-Encoding (q=0 = rechazada)"""
+    valores = {}
+    for parte in cabecera.split(','):
+        nombre, *parametros = [trozo.strip() for trozo in parte.split(';')]
+        if not nombre:
+            continue
+        q = 1.0
+        for parametro in parametros:
+            clave, _, valor = parametro.partition('=')
+            if clave.strip().lower() == 'q':
+                try:
+                    q = float(valor)
+                except ValueError:
+                    q = 0.0
+        valores[nombre.lower()] = q
+
+    comodin = valores.get('*', 0.0)
+    return {codificacion: valores.get(codificacion, comodin) for codificacion, _ in CODIFICACIONES}
+
+
+class EstaticosWSGI:
+    def __init__(self, application, root, prefix):
+        self.application = application
+        self.root = Path(root).resolve() if root else None
+        self.prefix = '/' + prefix.strip('/') + '/'
+
+    def __call__(self, environ, start_response):
+        ruta = environ.get('PATH_INFO', '')
+        if (
+            self.root is None
+            or environ.get('REQUEST_METHOD') not in ('GET', 'HEAD')
+            or not ruta.startswith(self.prefix)
+        ):
+            return self.application(environ, start_response)
+
+        archivo = self.buscar(ruta[len(self.prefix):])
+        if archivo is None:
+            return self.application(environ, start_response)
+
+        return self.servir(archivo, environ, start_response)
+
+    def buscar(self, relativo):
+        """Devuelve la ruta del archivo dentro de root o None (evita ../)"""
+        archivo = (self.root / relativo).resolve()
+        if self.root not in archivo.parents or not archivo.is_file():
+            return None
+        return archivo
+
+    def servir(self, archivo, environ, start_response):
+        tipo, _ = mimetypes.guess_type(archivo.name)
+        headers = [
+            ('Content-Type', tipo or 'application/octet-stream'),
+            ('Vary', 'Accept-Encoding'),
+        ]
+
+        if PATRON_HASH.search(archivo.name):
+            headers.append(('Cache-Control', f'public, max-age={UN_ANO}, immutable'))
+        else:
+            headers.append(('Cache-Control', f'public, max-age={CACHE_SIN_HASH}'))
+
+        # Elegir la variante precomprimida que acepte el cliente (la de mayor q;
+        # a igual q, en el orden de CODIFICACIONES)
+        aceptadas = codificaciones_aceptadas(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        opciones = [
+            (-aceptadas[codificacion], orden, codificacion, sufijo)
+            for orden, (codificacion, sufijo) in enumerate(CODIFICACIONES)
+            if aceptadas.get(codificacion, 0) > 0
+        ]
+        for _, _, codificacion, sufijo in sorted(opciones):
+            comprimido = archivo.with_name(archivo.name + sufijo)
+            if comprimido.is_file():
+                archivo = comprimido
+                headers.append(('Content-Encoding', codificacion))
+                break
+
+        headers.append(('Content-Length', str(os.path.getsize(archivo))))
+        start_response('200 OK', headers)
+
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return [b'']
+
+        wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return wrapper(open(archivo, 'rb'))
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,9 +47,13 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'torneos.replicas.ReplicaMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'torneos.middleware.OrganizacionMiddleware',
+    'torneos.auditoria.AuditoriaMiddleware',
+    'torneos.perfilado.PerfiladoMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -83,6 +88,18 @@ DATABASES = {
     }
 }
 
+# Réplica de solo lectura (opcional, ver torneos/replicas.py): las vistas
+# públicas leen de ella; quien acaba de escribir lee del principal durante
+# REPLICA_RETRASO segundos
+if os.environ.get('DATABASE_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': DATABASES['default']['ENGINE'],
+        'NAME': os.environ['DATABASE_REPLICA'],
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['torneos.replicas.ReplicaRouter']
+REPLICA_RETRASO = int(os.environ.get('REPLICA_RETRASO', '10'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -119,19 +136,56 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
-STATIC_ROOT = '/home/VoleibolApp/staticfiles'
+STATIC_ROOT = os.environ.get('STATIC_ROOT', BASE_DIR / 'staticfiles')
+STATICFILES_DIRS = [BASE_DIR / 'static']
+
+# En local se usa el almacenamiento normal; en producción se cambia por el
+# de nombres con hash y copias .gz/.br (ver bloque de PythonAnywhere)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
 
 # Agregar al final de settings.py
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/login/'
 
+# Cola de tareas: el worker es `python manage.py procesar_tareas`.
+# Con TAREAS_SINCRONAS=1 las tareas se ejecutan en la misma petición (sin worker)
+TAREAS_SINCRONAS = os.environ.get('TAREAS_SINCRONAS') == '1'
+
+# Perfilado (ver torneos/perfilado.py): el staff puede pedir ?perfilar=1 y
+# además se perfila al azar esta proporción de peticiones (0 = nunca)
+PERFILADO_MUESTREO = float(os.environ.get('PERFILADO_MUESTREO', '0'))
+PERFILADO_DIR = os.environ.get('PERFILADO_DIR', BASE_DIR / 'perfiles')
+PERFILADO_MAXIMO = 50  # perfiles que se conservan
+
+# Avisos a los capitanes (ver torneos/notificaciones.py). En local los correos
+# se muestran en la consola; en producción se configura el servidor SMTP.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS') == '1'
+EMAIL_TIMEOUT = 10
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'Torneos de Vóley <torneos@localhost>')
+# Ruta a una función enviar(telefono, texto) de la pasarela de SMS (vacío = sin SMS)
+NOTIFICACIONES_SMS = os.environ.get('NOTIFICACIONES_SMS', '')
+
 import os
 
 # Configuración para PythonAnywhere (Jaren24)
 if 'PYTHONANYWHERE_DOMAIN' in os.environ:
     DEBUG = False
     ALLOWED_HOSTS = ['VoleibolApp.pythonanywhere.com']
+    STATIC_ROOT = os.environ.get('STATIC_ROOT', '/home/VoleibolApp/staticfiles')
+    STORAGES['staticfiles']['BACKEND'] = 'torneos.storage.ComprimidoManifestStaticFilesStorage'
     print("✅ Ejecutando en PythonAnywhere")
 else:
     DEBUG = True
@@ -2,9 +2,12 @@ from django.contrib import admin
 from django.views.generic import RedirectView
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
-from torneos.views import dashboard, inscribir_equipo, lista_equipos, marcar_pago, calendario, agregar_partido, lista_torneos, historial_torneos
+from torneos.views import dashboard, inscribir_equipo, lista_equipos, buscar_equipos, marcar_pago, registrar_abono, conciliar_pagos, calendario, agregar_partido, autocompletar_equipos, lista_torneos, llave_torneo, exportar_llave, historial_torneos, estado_tarea, marcador_partidos, marcador_pendientes, marcador_sincronizar, lista_perfiles, ver_perfil, exportar_perfil
 
 urlpatterns = [
+    path('admin/perfiles/', lista_perfiles, name='lista_perfiles'),
+    path('admin/perfiles/<str:nombre>/', ver_perfil, name='ver_perfil'),
+    path('admin/perfiles/<str:nombre>.<str:formato>', exportar_perfil, name='exportar_perfil'),
     path('admin/', admin.site.urls),  # Lo dejamos pero no lo usaremos
     path('login/', auth_views.LoginView.as_view(template_name='registration/login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),
@@ -13,8 +16,18 @@ urlpatterns = [
     path('', RedirectView.as_view(pattern_name='dashboard')),
     path('equipos/', lista_equipos, name='lista_equipos'),
     path('equipos/<int:equipo_id>/pago/', marcar_pago, name='marcar_pago'),
+    path('equipos/<int:equipo_id>/abono/', registrar_abono, name='registrar_abono'),
+    path('equipos/conciliar/', conciliar_pagos, name='conciliar_pagos'),
+    path('equipos/buscar/', buscar_equipos, name='buscar_equipos'),
+    path('equipos/autocompletar/', autocompletar_equipos, name='autocompletar_equipos'),
     path('calendario/', calendario, name='calendario'),
     path('calendario/nuevo/', agregar_partido, name='agregar_partido'),
     path('torneos/', lista_torneos, name='lista_torneos'),
+    path('torneos/<int:torneo_id>/llave/', llave_torneo, name='llave_torneo'),
+    path('torneos/<int:torneo_id>/llave.<str:formato>', exportar_llave, name='exportar_llave'),
     path('historial/', historial_torneos, name='historial'),
+    path('tareas/<int:tarea_id>/', estado_tarea, name='estado_tarea'),
+    path('marcador/', marcador_partidos, name='marcador'),
+    path('marcador/partidos/', marcador_pendientes, name='marcador_pendientes'),
+    path('marcador/sincronizar/', marcador_sincronizar, name='marcador_sincronizar'),
 ]
\ No newline at end of file
@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/6.0/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
+from voley_app.estaticos import EstaticosWSGI
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'voley_app.settings')
 
 application = get_wsgi_application()
+
+# Servir los estáticos con hash y precomprimidos sin pasar por Django
+application = EstaticosWSGI(application, settings.STATIC_ROOT, settings.STATIC_URL)